@@ -0,0 +1,114 @@
+"""
+Build step for the game's images, so the game loads them ready to draw instead of decoding full-resolution art
+and scaling it on every start.
+
+Each image is scaled (or cropped) to the size it is drawn at, and small icons are packed into atlases with their
+hover variants pre-rendered. Opaque images are stored without an alpha channel, so the game can convert() them
+rather than convert_alpha(): blitting them then skips per-pixel blending. The results are written to a cache
+directory under the sha256 of the source files and build settings, so they are only rebuilt when the art changes.
+Run `python asset_pipeline.py` to build everything the game registers ahead of time, e.g. before packaging.
+"""
+import hashlib
+import json
+import os
+import threading
+import pygame
+
+PIPELINE_FORMAT = 1 # bump when the build output changes, so images built by older code are rebuilt
+ATLAS_WIDTH = 512 # atlases are packed in rows up to this wide
+ATLAS_PADDING = 1 # transparent gap around every icon, so scaling or filtering never bleeds a neighbour in
+
+
+# building ───────────────────────────────────────────────────────────────
+def build_digest(paths, settings):
+    """sha256 over the source files' bytes and the build settings (JSON-able), what the build output is cached under."""
+    digest = hashlib.sha256(json.dumps([PIPELINE_FORMAT, settings]).encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def is_opaque(surface):
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return True
+    return pygame.mask.from_surface(surface, 254).count() == surface.get_width() * surface.get_height() # every pixel alpha 255
+
+def fit(surface, scale=None, crop=None):
+    """The surface scaled to scale, or cut down to its top left crop (e.g. a background bigger than the screen)."""
+    if scale:
+        surface = pygame.transform.scale(surface, scale)
+    if crop and (surface.get_width() > crop[0] or surface.get_height() > crop[1]):
+        surface = surface.subsurface((0, 0, min(crop[0], surface.get_width()), min(crop[1], surface.get_height()))).copy()
+    return surface
+
+def without_alpha(surface):
+    """An opaque surface copied to 24 bits, so it's saved (and later loaded) without an alpha channel."""
+    opaque = pygame.Surface(surface.get_size(), 0, 24)
+    opaque.blit(surface, (0, 0))
+    return opaque
+
+def atlas_layout(sizes, width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    """Packs sizes left to right in rows (shelves). Returns (x, y, w, h) for each size, in order, and the atlas size."""
+    rects, x, y, row_height, used_width = [], padding, padding, 0, 0
+    for w, h in sizes:
+        if x > padding and x + w + padding > width: # next shelf
+            x, y, row_height = padding, y + row_height + padding, 0
+        rects.append((x, y, w, h))
+        used_width = max(used_width, x + w + padding)
+        x += w + padding
+        row_height = max(row_height, h)
+    return rects, (used_width, y + row_height + padding)
+
+
+# caching ────────────────────────────────────────────────────────────────
+def cached(cache_dir, digest, build):
+    """The surface cached under digest, built with build() and saved there on a miss. cache_dir None = never cached."""
+    cache_path = os.path.join(cache_dir, f"{digest}.png") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return pygame.image.load(cache_path)
+        except (pygame.error, OSError): # unreadable or half-written, build it again
+            pass
+    surface = build()
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # unique per process and thread, so two builds of the same image never write the same file, and the extension picks the format
+            temp_path = f"{cache_path[:-len('.png')]}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+            pygame.image.save(surface, temp_path)
+            os.replace(temp_path, cache_path) # never leave a half-written image behind
+        except (pygame.error, OSError): # read-only install, build again next start
+            pass
+    return surface
+
+def build_image(path, cache_dir=None, scale=None, crop=None):
+    """The image at path scaled/cropped to the size it's drawn at, without an alpha channel if it's opaque. Not converted."""
+    def build():
+        image = fit(pygame.image.load(path), scale, crop)
+        return without_alpha(image) if image.get_flags() & pygame.SRCALPHA and is_opaque(image) else image
+    return cached(cache_dir, build_digest([path], {"scale": scale, "crop": crop}), build)
+
+def build_atlas(icons, rects, size, cache_dir=None):
+    """
+    One surface holding every icon at the rect atlas_layout() gave it. icons is a list of (path, size, tint),
+    tint None or the colour the icon is multiplied by (a button's hover variant of the icon before it).
+    """
+    def build():
+        atlas = pygame.Surface(size, pygame.SRCALPHA, 32)
+        loaded = {}
+        for (path, icon_size, tint), (x, y, w, h) in zip(icons, rects):
+            if (path, icon_size) not in loaded:
+                loaded[(path, icon_size)] = fit(pygame.image.load(path), icon_size)
+            icon = loaded[(path, icon_size)].copy() # tinting the copy leaves the plain one alone
+            if tint is not None:
+                icon.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+            atlas.blit(icon, (x, y), special_flags=pygame.BLEND_RGBA_MAX) # copies alpha too, the atlas starts all clear
+        return atlas
+    paths = sorted({path for path, _, _ in icons})
+    return cached(cache_dir, build_digest(paths, {"icons": [(os.path.basename(p), s, t) for p, s, t in icons], "rects": rects}), build)
+
+
+if __name__ == "__main__": # build everything the game registers into its cache ahead of time
+    from game_constants import ASSETS
+    built = ASSETS.build_all()
+    print(f"Built {built} images into {ASSETS.build_dir}")
@@ -0,0 +1,155 @@
+import threading
+import pygame
+from asset_pipeline import build_image, build_atlas, atlas_layout
+
+
+class AssetRegistry:
+    """
+    The game's images and sounds by name, registered up front but only loaded the first time they're asked for,
+    so startup doesn't decode art for screens that aren't showing (or are never shown).
+
+    Screens hold their assets with acquire(owner, names) and let go with release(owner): an asset is counted once
+    per screen holding it, and is unloaded when the last one lets go (e.g. when the screen is evicted).
+    Assets fetched with get() but never acquired (the button press sound) are kept for the whole session.
+    preload(names) decodes images on a background thread, so a screen's art is ready before it is entered;
+    converting them for the display is left to get(), as that has to happen on the main thread. get() waits for an
+    image the thread is decoding right now rather than decoding it again, and takes over the ones it hasn't started.
+    Images go through the build step in asset_pipeline.py, its output is cached in build_dir (None = not cached).
+    """
+    def __init__(self, build_dir=None):
+        self.build_dir = build_dir
+        self.specs = {} # name -> (decode() on any thread or None, finish(decoded) on the main thread)
+        self.assets = {} # name -> loaded asset
+        self.decoded = {} # name -> decoded by the preload thread, waiting for get() to finish it
+        self.held = {} # owner -> names it acquired
+        self.refs = {} # name -> number of owners holding it
+        self.loads = 0 # assets loaded (again after being unloaded counts again)
+        self._lock = threading.Lock() # guards self.decoded, self._to_decode and self._in_flight between the main and preload threads
+        self._to_decode = []
+        self._in_flight = {} # name -> Event set when the preload thread has finished decoding it
+        self._thread = None
+
+    # registering ─────────────────────────────────────────────────────────
+    def image(self, name, path, scale=None, crop=None):
+        """An image drawn at scale (or cut down to crop), pre-scaled by the build step."""
+        self.specs[name] = (lambda: build_image(path, self.build_dir, scale, crop), for_display)
+
+    def atlas(self, name, icons):
+        """
+        Small images packed into one atlas surface (name), each registered under its own name as a subsurface of it.
+        icons is a list of (icon name, path, size, tint), tint None or the colour it's multiplied by, e.g. for hover.
+        """
+        rects, size = atlas_layout([icon_size for _, _, icon_size, _ in icons])
+        sources = [(path, icon_size, tint) for _, path, icon_size, tint in icons]
+        self.specs[name] = (lambda: build_atlas(sources, rects, size, self.build_dir), for_display)
+        for (icon_name, *_), rect in zip(icons, rects):
+            self.specs[icon_name] = (None, lambda _, rect=rect: self.get(name).subsurface(rect))
+
+    def sound(self, name, path, volume=None):
+        def finish(_):
+            sound = pygame.mixer.Sound(path)
+            if volume is not None:
+                sound.set_volume(volume)
+            return sound
+        self.specs[name] = (None, finish) # small, and the mixer is left to the main thread
+
+    def __contains__(self, name):
+        return name in self.specs
+
+    # loading ─────────────────────────────────────────────────────────────
+    def get(self, name):
+        """The asset, loaded now if it wasn't already (finishing its preload if that got to it first)."""
+        asset = self.assets.get(name)
+        if asset is None:
+            decode, finish = self.specs[name]
+            with self._lock:
+                if name in self._to_decode:
+                    self._to_decode.remove(name) # not started yet, decoded below instead
+                in_flight = self._in_flight.get(name)
+            if in_flight is not None:
+                in_flight.wait() # being decoded on the preload thread, doing it here too would only do it twice
+            with self._lock:
+                decoded = self.decoded.pop(name, None)
+            if decoded is None and decode is not None:
+                decoded = decode()
+            asset = self.assets[name] = finish(decoded)
+            self.loads += 1
+        return asset
+
+    def preload(self, names):
+        """Starts decoding the images in names that aren't loaded yet on a background thread."""
+        with self._lock:
+            for name in names:
+                if (self.specs[name][0] is not None and name not in self.assets and name not in self.decoded
+                        and name not in self._to_decode and name not in self._in_flight):
+                    self._to_decode.append(name)
+            if not self._to_decode or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="asset-preload", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._to_decode:
+                    return
+                name = self._to_decode.pop(0)
+                done = self._in_flight[name] = threading.Event()
+            try:
+                decoded = self.specs[name][0]()
+            except (pygame.error, OSError): # get() will try again and raise where the asset is used
+                decoded = None
+            with self._lock:
+                if decoded is not None and name not in self.assets:
+                    self.decoded[name] = decoded
+                del self._in_flight[name]
+            done.set()
+
+    # ownership ───────────────────────────────────────────────────────────
+    def acquire(self, owner, names):
+        """Marks owner (e.g. a state name) as using names, which are then kept loaded until it releases them."""
+        held = self.held.setdefault(owner, set())
+        for name in names:
+            if name not in held:
+                held.add(name)
+                self.refs[name] = self.refs.get(name, 0) + 1
+
+    def release(self, owner):
+        """Lets go of everything owner acquired, unloading the assets nobody else holds. Returns the names unloaded."""
+        unloaded = []
+        for name in self.held.pop(owner, ()):
+            self.refs[name] -= 1
+            if self.refs[name] == 0:
+                del self.refs[name]
+                self.unload(name)
+                unloaded.append(name)
+        return unloaded
+
+    def build_all(self):
+        """Runs the build step for every registered image and atlas now, filling build_dir. Returns how many were built."""
+        builds = [decode for decode, _ in self.specs.values() if decode is not None]
+        for decode in builds:
+            decode()
+        return len(builds)
+
+    def unload(self, name):
+        self.assets.pop(name, None)
+        with self._lock:
+            self.decoded.pop(name, None)
+
+    def stats(self):
+        images = [asset for asset in self.assets.values() if isinstance(asset, pygame.Surface) and asset.get_parent() is None] # not atlas icons
+        return {
+            "registered": len(self.specs),
+            "loaded": len(self.assets),
+            "loads": self.loads,
+            "image_bytes": sum(image.get_width() * image.get_height() * image.get_bytesize() for image in images),
+        }
+
+
+def for_display(image):
+    """The image converted to the display's format, without per-pixel alpha if it has none (those blit faster)."""
+    return image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+
+
+ASSETS = AssetRegistry() # shared by every screen, the game's assets are registered in game_constants
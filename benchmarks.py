@@ -0,0 +1,352 @@
+"""
+Microbenchmarks for the economy hot paths.
+
+Each benchmark is timed against the early, mid and late game saves in benchmark_data/, the results are written
+to benchmark_data/results.json and compared with benchmark_data/baseline.json to flag regressions.
+Medians are compared, and anything over the threshold is run again in a fresh process before it's reported, so noise
+(including a process that happens to run slow throughout, e.g. from its memory layout) isn't flagged.
+
+    python benchmarks.py                    run everything and compare with the baseline
+    python benchmarks.py --save-baseline    run everything and store the results as the new baseline
+    python benchmarks.py --only user_update --quick
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window/audio needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from game_constants import *
+from game_logic import User, apply_upgrades
+from utils import format_large_number, simulate_offline_progress
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_data") # the same files whatever directory it's run from
+FIXTURES = ["early_game", "mid_game", "late_game"]
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+REGRESSION_THRESHOLD = 0.25 # flag anything more than 25% slower than the baseline
+REGRESSION_RERUNS = 3 # a benchmark over the threshold is run again this many times, each in a new process, it's only reported if it stays slow
+BASELINE_RUNS = 3 # --save-baseline stores the median of this many runs (each in its own process), so one lucky (or unlucky) run doesn't set the bar
+
+BENCHMARKS = {} # name -> setup function, filled by the @benchmark decorator
+FRESH_USER_BENCHMARKS = set() # names whose op changes the user for good, each op gets a freshly loaded one
+
+
+def benchmark(name, fresh_user=False):
+    """
+    Registers a benchmark. The decorated function receives a freshly loaded User for the fixture
+    and returns the zero-argument callable that gets timed (one call = one op).
+    With fresh_user the setup is run again before every op, outside the timing, so every op starts from the fixture.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        if fresh_user:
+            FRESH_USER_BENCHMARKS.add(name)
+        return setup
+    return register
+
+
+def load_fixture(name):
+    with open(os.path.join(BENCHMARK_DIR, f"{name}.json")) as f:
+        data = json.load(f)
+    return data["user_data"]
+
+
+# benchmarks ─────────────────────────────────────────────────────────────
+@benchmark("user_update")
+def bench_user_update(user):
+    return lambda: user.update(1 / FPS)
+
+@benchmark("get_effective_time")
+def bench_get_effective_time(user):
+    generators = list(user.generators.values())
+    def op():
+        for gen in generators:
+            gen.get_effective_time(user.generators)
+    return op
+
+@benchmark("apply_upgrades")
+def bench_apply_upgrades(user):
+    return lambda: apply_upgrades(user)
+
+@benchmark("income_per_second")
+def bench_income_per_second(user):
+    return lambda: user.income_per_second
+
+def _bench_buy(user, quantity):
+    user.money = float("inf") # never run out of money, the amount is reset after each op instead
+    gen = user.generators["g1"]
+    start_amount = gen.amount
+    def op():
+        gen.buy(user, quantity)
+        gen.amount = start_amount # keep the price (and the upgrade tier) where the fixture had it
+    return op
+
+@benchmark("generator_buy_single")
+def bench_generator_buy_single(user):
+    return _bench_buy(user, 1)
+
+@benchmark("generator_buy_bulk")
+def bench_generator_buy_bulk(user):
+    return _bench_buy(user, 100)
+
+@benchmark("format_large_number")
+def bench_format_large_number(user):
+    numbers = [user.money, user.income_per_second] + [gen.cycle_output for gen in user.generators.values()] + [gen.next_price for gen in user.generators.values()]
+    def op():
+        for number in numbers:
+            format_large_number(number)
+    return op
+
+@benchmark("user_to_dict")
+def bench_user_to_dict(user):
+    return user.to_dict
+
+@benchmark("user_from_dict")
+def bench_user_from_dict(user):
+    data = user.to_dict()
+    return lambda: User.from_dict(data)
+
+@benchmark("simulate_offline_progress", fresh_user=True) # a night away moves the user on, the next op would measure a later game
+def bench_simulate_offline_progress(user):
+    return lambda: simulate_offline_progress(user, 8 * 60 * 60) # a night away
+
+def _game_menu(user):
+    from game_states import GameMenu # imported here as it builds the whole ui
+    return GameMenu(screen, user, None)
+
+@benchmark("game_menu_frame_full")
+def bench_game_menu_frame_full(user):
+    menu = _game_menu(user)
+    menu.renderer.enabled = False # the old path: background, every widget and a flip every frame
+    def op():
+        user.update(1 / FPS)
+        menu.render()
+    return op
+
+@benchmark("game_menu_frame_dirty")
+def bench_game_menu_frame_dirty(user):
+    menu = _game_menu(user)
+    def op():
+        user.update(1 / FPS)
+        menu.render()
+    return op
+
+@benchmark("game_menu_frame_panel")
+def bench_game_menu_frame_panel(user):
+    menu = _game_menu(user)
+    menu.open_panel("shop") # the game underneath is a frozen, dimmed snapshot
+    def op():
+        user.update(1 / FPS)
+        menu.render()
+    return op
+
+_texture_display = []
+def _texture_menu(user, panel=None):
+    """A game menu drawing through the texture backend (SDL's software renderer when there's no GPU), for comparing with the surface path."""
+    from texture_rendering import TextureDisplay, TextureRenderer
+    if not _texture_display:
+        _texture_display.append(TextureDisplay((SCREEN_WIDTH, SCREEN_HEIGHT), GAME_TITLE)) # one window for every fixture
+    menu = _game_menu(user)
+    if panel:
+        menu.open_panel(panel)
+    menu.renderer = TextureRenderer(_texture_display[0], screen, menu.renderer.background)
+    return menu
+
+def close_texture_display():
+    """Frees the texture benchmarks' window while SDL is still up, see TextureDisplay.close()."""
+    while _texture_display:
+        _texture_display.pop().close()
+
+@benchmark("game_menu_frame_texture")
+def bench_game_menu_frame_texture(user):
+    menu = _texture_menu(user)
+    def op():
+        user.update(1 / FPS)
+        menu.render()
+    return op
+
+@benchmark("game_menu_frame_texture_panel")
+def bench_game_menu_frame_texture_panel(user):
+    menu = _texture_menu(user, "shop")
+    def op():
+        user.update(1 / FPS)
+        menu.render()
+    return op
+
+
+# running ────────────────────────────────────────────────────────────────
+def time_op(op, repeat=5, min_time=0.2):
+    """Times op with timeit, returns (best, median) seconds per op and the number of ops per repeat."""
+    timer = timeit.Timer(op)
+    number = 1
+    while True: # calibrate: find a number of calls that takes long enough to measure
+        elapsed = timer.timeit(number)
+        if elapsed >= 0.01:
+            break
+        number *= 10
+    number = max(1, int(number * min_time / elapsed)) # enough calls per repeat to take about min_time
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return min(timings), statistics.median(timings), number
+
+def time_fresh_op(make_op, repeat=5, min_time=0.2):
+    """
+    Like time_op, for an op that can only run once: make_op() is timeit's setup, so each timed op is freshly built.
+    One op per repeat, repeated until about repeat * min_time has passed. Returns (best, median) seconds per op and 1.
+    """
+    ops = []
+    timer = timeit.Timer(lambda: ops[-1](), setup=lambda: ops.append(make_op()))
+    elapsed = max(timer.timeit(1), 1e-6)
+    timings = timer.repeat(repeat=max(repeat, min(int(repeat * min_time / elapsed), 1000)), number=1)
+    return min(timings), statistics.median(timings), 1
+
+def fresh_user(fixture):
+    user = User.from_dict(copy.deepcopy(load_fixture(fixture)))
+    apply_upgrades(user)
+    return user
+
+def measure(name, fixture, quick=False):
+    setup = BENCHMARKS[name]
+    repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+    if name in FRESH_USER_BENCHMARKS:
+        best, median, number = time_fresh_op(lambda: setup(fresh_user(fixture)), repeat, min_time)
+    else:
+        best, median, number = time_op(setup(fresh_user(fixture)), repeat, min_time)
+    return {"best_us": best * 1e6, "median_us": median * 1e6, "ops": number}
+
+def run_benchmarks(names=None, fixtures=FIXTURES, quick=False):
+    results = {}
+    for name in BENCHMARKS:
+        if names and name not in names:
+            continue
+        results[name] = {fixture: measure(name, fixture, quick) for fixture in fixtures}
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def run_in_new_process(names=None, quick=False):
+    """run_benchmarks in a fresh interpreter, since one process can be consistently faster or slower than the next."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        command = [sys.executable, os.path.abspath(__file__), "--output", path] + (["--only", *names] if names else []) + (["--quick"] if quick else [])
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+def median_of_runs(runs):
+    """One set of results whose median times are the medians over runs (results of run_benchmarks with the same names)."""
+    merged = copy.deepcopy(runs[0])
+    for name, fixtures in merged["results"].items():
+        for fixture, result in fixtures.items():
+            result["median_us"] = statistics.median(run["results"][name][fixture]["median_us"] for run in runs)
+            result["best_us"] = min(run["results"][name][fixture]["best_us"] for run in runs)
+    return merged
+
+def find_regressions(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares median times with the baseline (the median of the repeats, one noisy repeat doesn't move it),
+    returns [(name, fixture, baseline_us, current_us)] for anything slower than the threshold.
+    """
+    regressions = []
+    for name, fixtures in current["results"].items():
+        for fixture, result in fixtures.items():
+            old = baseline.get("results", {}).get(name, {}).get(fixture)
+            if old and result["median_us"] > old["median_us"] * (1 + threshold):
+                regressions.append((name, fixture, old["median_us"], result["median_us"]))
+    return regressions
+
+def confirm_regressions(current, baseline, threshold=REGRESSION_THRESHOLD, reruns=REGRESSION_RERUNS, quick=False):
+    """Runs each flagged benchmark again in a new process, keeping its fastest median, and returns the regressions that are still there."""
+    regressions = find_regressions(current, baseline, threshold)
+    for _ in range(reruns):
+        if not regressions:
+            break
+        rerun = run_in_new_process(sorted({name for name, _, _, _ in regressions}), quick)
+        for name, fixture, _, _ in regressions:
+            result = rerun["results"][name][fixture]
+            if result["median_us"] < current["results"][name][fixture]["median_us"]:
+                current["results"][name][fixture] = result
+        regressions = find_regressions(current, baseline, threshold)
+    return regressions
+
+def print_results(current, baseline=None):
+    print(f"{'benchmark':<28}" + "".join(f"{fixture:>22}" for fixture in FIXTURES))
+    for name, fixtures in current["results"].items():
+        row = f"{name:<28}"
+        for fixture in FIXTURES:
+            result = fixtures.get(fixture)
+            if result is None:
+                row += f"{'-':>22}"
+                continue
+            cell = f"{result['median_us']:.2f}us"
+            old = (baseline or {}).get("results", {}).get(name, {}).get(fixture)
+            if old:
+                cell += f" ({(result['median_us'] / old['median_us'] - 1) * 100:+.0f}%)"
+            row += f"{cell:>22}"
+        print(row)
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the economy hot paths")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="only run these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer, shorter repeats (noisier)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the median of a few runs as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="fractional slowdown counted as a regression")
+    parser.add_argument("--output", help="only write the results to this file, without comparing (used for the reruns in a new process)")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.only, quick=args.quick)
+    if args.output:
+        write_json(args.output, current)
+        return 0
+    baseline = None
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    regressions = confirm_regressions(current, baseline, args.threshold, quick=args.quick) if baseline and not args.save_baseline else []
+    write_json(RESULTS_FILE, current)
+    print_results(current, baseline)
+
+    if args.save_baseline:
+        runs = [current] + [run_in_new_process(args.only, args.quick) for _ in range(BASELINE_RUNS - 1)]
+        saved = median_of_runs(runs)
+        if baseline and args.only: # keep the benchmarks that weren't run
+            saved["results"] = {**baseline.get("results", {}), **saved["results"]}
+        write_json(BASELINE_FILE, saved)
+        print(f"\nSaved the median of {len(runs)} runs as the baseline in {BASELINE_FILE}")
+        return 0
+    if baseline is None:
+        print(f"\nNo baseline yet, run with --save-baseline to create {BASELINE_FILE}")
+        return 0
+
+    for name, fixture, old, new in regressions:
+        print(f"REGRESSION {name} [{fixture}]: {old:.2f}us -> {new:.2f}us")
+    if not regressions:
+        print(f"\nNo regressions over {args.threshold:.0%} against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    try:
+        status = main()
+    finally:
+        close_texture_display()
+    sys.exit(status)
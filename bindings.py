@@ -0,0 +1,66 @@
+class Binding:
+    """
+    A display_callback whose value is only recomputed after what it shows changed.
+    Made by BindingSet.bind(), which marks it stale; calling it returns the cached value otherwise.
+    """
+    __slots__ = ("compute", "stale", "value", "version")
+
+    def __init__(self, compute):
+        self.compute = compute # the old display_callback lambda
+        self.stale = True
+        self.value = None
+        self.version = 0 # bumped every time the value actually changes
+
+    def __call__(self):
+        if self.stale:
+            self.stale = False
+            value = self.compute()
+            if value != self.value:
+                self.value = value
+                self.version += 1
+        return self.value
+
+
+class BindingSet:
+    """
+    The bindings of one screen and the changes that make them stale.
+    A binding is registered under keys naming what it shows, e.g. "money" or a row slot; the screen calls invalidate(key)
+    when the model's change events (see events.py) say that changed, so nothing is read while the model is still.
+    Values that change continuously without an event (a cycle timer counting down) are bound with watch=[getters]:
+    poll() reads those each frame and marks the bindings of the ones that changed, so only they cost anything per frame.
+    """
+    def __init__(self):
+        self.keys = {} # key -> bindings
+        self.watched = {} # getter -> [last value, bindings]
+
+    def bind(self, compute, *keys, watch=()):
+        binding = Binding(compute)
+        for key in keys:
+            self.keys.setdefault(key, []).append(binding)
+        for getter in watch:
+            field = self.watched.get(getter)
+            if field is None:
+                field = self.watched[getter] = [getter(), []]
+            field[1].append(binding)
+        return binding
+
+    def invalidate(self, *keys):
+        """Marks the bindings registered under keys stale, they're recomputed the next time they're shown. Returns how many."""
+        marked = 0
+        for key in keys:
+            for binding in self.keys.get(key, ()):
+                binding.stale = True
+                marked += 1
+        return marked
+
+    def poll(self):
+        """Reads every watched getter once and marks the bindings of the ones that changed as stale. Returns how many changed."""
+        changed = 0
+        for getter, field in self.watched.items():
+            value = getter()
+            if value != field[0]:
+                field[0] = value
+                for binding in field[1]:
+                    binding.stale = True
+                changed += 1
+        return changed
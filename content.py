@@ -0,0 +1,159 @@
+"""
+Game content (the generators, their managers, upgrade tiers and time milestones) loaded from a content pack:
+a JSON file designers can edit, or replace to ship a new generator set, without touching code.
+
+A pack is validated once and compiled into flat tables indexed by generator (an id -> index map, one list per field,
+upgrade tier tables shared between the generators using them, with their thresholds and best-multiplier-so-far arrays
+precomputed for bisect). The compiled tables are cached on disk under the sha256 of the pack, so later starts with
+the same pack load them straight away and skip validating and compiling.
+"""
+import hashlib
+import json
+import os
+from bisect import bisect_right
+
+COMPILED_FORMAT = 1 # bump when the compiled layout changes, so caches written by older code are ignored
+GENERATOR_FIELDS = ("name", "base_rate", "base_price", "growth_rate", "base_time")
+
+
+# validation ─────────────────────────────────────────────────────────────
+def _require(condition, message):
+    if not condition:
+        raise ValueError(f"invalid content pack: {message}")
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _check_ascending(values, what):
+    _require(isinstance(values, list) and all(_is_number(v) for v in values), f"{what} must be a list of numbers")
+    _require(all(a < b for a, b in zip(values, values[1:])), f"{what} must be in ascending order")
+
+def validate_pack(pack):
+    """Raises ValueError describing the first problem found in the pack."""
+    _require(isinstance(pack, dict), "the pack must be a JSON object")
+    tiers = pack.get("upgrade_tiers", {})
+    _require(isinstance(tiers, dict), "upgrade_tiers must map a table name to [[threshold, multiplier], ...]")
+    for name, table in tiers.items():
+        _require(isinstance(table, list) and all(isinstance(tier, list) and len(tier) == 2 for tier in table),
+                 f"upgrade tier table {name!r} must be a list of [threshold, multiplier] pairs")
+        _check_ascending([tier[0] for tier in table], f"the thresholds of upgrade tier table {name!r}")
+        _require(all(_is_number(tier[1]) and tier[1] > 0 for tier in table), f"the multipliers of upgrade tier table {name!r} must be positive")
+    global_upgrades = pack.get("global_upgrades")
+    _require(global_upgrades is None or global_upgrades in tiers, f"global_upgrades names an unknown tier table {global_upgrades!r}")
+    _check_ascending(pack.get("time_milestones", []), "time_milestones")
+    _check_ascending(pack.get("global_time_milestones", []), "global_time_milestones")
+
+    generators = pack.get("generators")
+    _require(isinstance(generators, list) and generators, "generators must be a non-empty list")
+    seen = set()
+    for generator in generators:
+        _require(isinstance(generator, dict), "every generator must be an object")
+        gid = generator.get("id")
+        _require(isinstance(gid, str) and gid, "every generator needs a string id")
+        _require(gid not in seen, f"generator id {gid!r} is used twice")
+        seen.add(gid)
+        _require(isinstance(generator.get("name"), str), f"generator {gid!r} needs a name")
+        for field in GENERATOR_FIELDS[1:]:
+            _require(_is_number(generator.get(field)) and generator[field] > 0, f"{field} of generator {gid!r} must be a positive number")
+        _require(generator.get("upgrades") is None or generator["upgrades"] in tiers, f"generator {gid!r} uses an unknown tier table {generator.get('upgrades')!r}")
+        manager = generator.get("manager")
+        _require(isinstance(manager, dict) and isinstance(manager.get("name"), str) and _is_number(manager.get("cost")),
+                 f"generator {gid!r} needs a manager with a name and a cost")
+        _require(_is_number(generator.get("revenue_multiplier_price")), f"generator {gid!r} needs a revenue_multiplier_price")
+
+
+# compiling ──────────────────────────────────────────────────────────────
+def compile_pack(pack):
+    """Turns a validated pack into the indexed tables ContentTables reads, as plain JSON-able lists and dicts."""
+    table_names = list(pack.get("upgrade_tiers", {}))
+    tier_tables = []
+    for name in table_names:
+        table = pack["upgrade_tiers"][name]
+        best, running = [], 1
+        for _, multiplier in table: # best multiplier reached at or below each threshold, a tier may be lower than the one before
+            running = max(running, multiplier)
+            best.append(running)
+        tier_tables.append({"name": name, "thresholds": [t for t, _ in table], "multipliers": [m for _, m in table], "best": best})
+    tier_index = lambda name: table_names.index(name) if name is not None else -1 # -1 = no upgrades
+
+    generators = pack["generators"]
+    compiled = {
+        "format": COMPILED_FORMAT,
+        "name": pack.get("name", ""),
+        "ids": [g["id"] for g in generators],
+        "index": {g["id"]: i for i, g in enumerate(generators)},
+        "manager_names": [g["manager"]["name"] for g in generators],
+        "manager_costs": [g["manager"]["cost"] for g in generators],
+        "multiplier_prices": [g["revenue_multiplier_price"] for g in generators],
+        "tier_tables": tier_tables,
+        "tier_of": [tier_index(g.get("upgrades")) for g in generators],
+        "global_tier": tier_index(pack.get("global_upgrades")),
+        "time_milestones": list(pack.get("time_milestones", [])),
+        "global_time_milestones": list(pack.get("global_time_milestones", [])),
+    }
+    for field in GENERATOR_FIELDS:
+        compiled[field] = [g[field] for g in generators]
+    return compiled
+
+
+class ContentTables:
+    """The compiled content, one list per field indexed by self.index[generator id]."""
+    def __init__(self, compiled):
+        self.__dict__.update(compiled)
+
+    def upgrade_multiplier(self, table, amount):
+        """Best multiplier of tier table (an index, -1 for none) reached by owning amount."""
+        if table < 0:
+            return 1
+        tiers = self.tier_tables[table]
+        reached = bisect_right(tiers["thresholds"], amount)
+        return tiers["best"][reached - 1] if reached else 1
+
+    # the dict views the rest of the game was written against
+    def generator_prototypes(self):
+        return {gid: {field: getattr(self, field)[i] for field in GENERATOR_FIELDS} for i, gid in enumerate(self.ids)}
+
+    def manager_prototypes(self):
+        return {gid: {"name": self.manager_names[i], "cost": self.manager_costs[i]} for i, gid in enumerate(self.ids)}
+
+    def revenue_multiplier_prices(self):
+        return dict(zip(self.ids, self.multiplier_prices))
+
+    def generator_upgrades(self):
+        tables = [list(zip(t["thresholds"], t["multipliers"])) for t in self.tier_tables] # shared, not copied per generator
+        upgrades = {gid: tables[table] for gid, table in zip(self.ids, self.tier_of) if table >= 0}
+        if self.global_tier >= 0:
+            upgrades["global"] = tables[self.global_tier]
+        return upgrades
+
+
+# loading ────────────────────────────────────────────────────────────────
+def load_content(pack_path, cache_dir=None):
+    """
+    Loads a content pack. The compiled tables are looked up in cache_dir under the hash of the pack's bytes first;
+    on a miss the pack is validated and compiled, and the result is written there for next time.
+    """
+    with open(pack_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw + f"format {COMPILED_FORMAT}".encode()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                return ContentTables(json.load(f))
+        except (OSError, ValueError): # unreadable or half-written, recompile it
+            pass
+
+    pack = json.loads(raw)
+    validate_pack(pack)
+    compiled = compile_pack(pack)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(compiled, f)
+            os.replace(temp_path, cache_path) # never leave a half-written cache behind
+        except OSError: # read-only install, compile again next start
+            pass
+    return ContentTables(compiled)
@@ -1,38 +1,85 @@
+import threading
+import time
 import ntplib
 from datetime import datetime, timezone
 
 class NTPTimer:
     """
-    A class to interact with an NTP server to fetch the current time
-    and calculate elapsed time since the instance was created.
+    A non-blocking time service backed by an NTP server.
+    The NTP server is queried once on a background thread, and the resulting offset is cached
+    against time.monotonic() so that now() answers instantly without any network round-trips.
+    Until a sync lands (or if the machine is offline) system UTC time is served and is_synced stays False.
     """
 
-    def __init__(self, host: str = 'pool.ntp.org'):
+    def __init__(self, host: str = 'pool.ntp.org', timeout: float = 1, start_sync: bool = True, client=None):
         """
-        Initialise the NTPTimer instance and record the initial timestamp
+        Initialise the NTPTimer instance, record the initial timestamp and kick off the background sync.
+        client is anything with ntplib.NTPClient's request(host, version, timeout), e.g. a fake in tests
         """
         self.host = host  # Store the NTP server hostname
-        self.start = self.get_current_time()  # Record the initial timestamp
+        self.client = client if client is not None else ntplib.NTPClient()
+        self.timeout = timeout # seconds to wait for the NTP server before giving up
+        self.sync_error = None # the last error raised while syncing, kept for debugging instead of printing
+        self._anchor = None # (epoch seconds, monotonic seconds) captured together when the sync landed
+        self._sync_thread = None
+        self.start_monotonic = time.monotonic() # monotonic clock is immune to system clock changes
+        self.start = self.now()  # Record the initial timestamp
+        if start_sync:
+            self.start_sync()
 
-    def get_current_time(self) -> datetime:
+    @property
+    def is_synced(self) -> bool:
+        """True once the NTP offset has been cached, False while serving system time."""
+        return self._anchor is not None
+
+    def start_sync(self):
+        """Starts the one-off NTP query on a daemon thread so the caller never waits on the network."""
+        if self._sync_thread is None or not self._sync_thread.is_alive():
+            self._sync_thread = threading.Thread(target=self.sync, name="ntp-sync", daemon=True)
+            self._sync_thread.start()
+        return self._sync_thread
+
+    def sync(self) -> bool:
         """
-        Query the NTP server and return the current time as a datetime object.
-        If the NTP server is unreachable or times out, fall back to system UTC time.
+        Query the NTP server once (blocking) and cache the offset against the monotonic clock.
+        Returns True if the sync succeeded. On failure the timer keeps serving system time.
         """
-        client = ntplib.NTPClient() # Create a NTP client instance
         try:
-            # Send a request to the NTP server with a 1-second timeout
-            resp = client.request(self.host, version=3, timeout=1)
-            # resp.tx_time is the time in seconds in UTC time
-            return datetime.fromtimestamp(resp.tx_time, tz=timezone.utc)
+            # Send a request to the NTP server with a short timeout
+            resp = self.client.request(self.host, version=3, timeout=self.timeout)
         except (ntplib.NTPException, TimeoutError, OSError) as e: # Catch NTP errors, timeout, or socket errors
-            print(f"NTP request failed or timed out: {e}. Falling back to system time.")
-            return datetime.now(timezone.utc) # Fallback to system's current UTC time
+            self.sync_error = e
+            return False
+        # resp.offset is the difference between the NTP clock and the system clock, corrected for round-trip delay
+        self._anchor = (time.time() + resp.offset, time.monotonic()) # assigned in one go so readers never see half an anchor
+        self.sync_error = None
+        return True
+
+    def wait_for_sync(self, timeout: float = None) -> bool:
+        """Blocks until the background sync has finished (or timeout passes). Returns is_synced."""
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout)
+        return self.is_synced
+
+    def now(self) -> datetime:
+        """
+        Return the current UTC time instantly.
+        Uses the cached NTP offset once synced, otherwise falls back to system UTC time.
+        """
+        anchor = self._anchor
+        if anchor is None:
+            return datetime.now(timezone.utc) # not synced (yet), serve system time
+        epoch_at_sync, monotonic_at_sync = anchor
+        return datetime.fromtimestamp(epoch_at_sync + (time.monotonic() - monotonic_at_sync), tz=timezone.utc)
+
+    def get_current_time(self) -> datetime:
+        """
+        Kept for existing callers, now() never touches the network so this is safe to call every save.
+        """
+        return self.now()
 
     def elapsed_seconds(self) -> float:
         """
         Calculate the number of seconds elapsed since the instance was created.
         """
-        now = self.get_current_time()  # Get the current time from the NTP server
-        delta = now - self.start  # Calculate the time difference
-        return delta.total_seconds()  # Return the elapsed time in seconds
\ No newline at end of file
+        return time.monotonic() - self.start_monotonic  # Return the elapsed time in seconds
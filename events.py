@@ -0,0 +1,67 @@
+"""
+Change events published by the model (User, Generator, Manager), so caches, milestone checks and the ui
+can react to what changed instead of re-reading every attribute every frame.
+
+Events are queued by publish() and delivered once per frame by dispatch(), coalesced per (type, source):
+a generator completing three cycles in one frame arrives as one CYCLE_COMPLETED event with count 3.
+Publishing an event type nobody subscribed to returns straight away.
+"""
+
+MONEY_CHANGED = "money_changed" # source: User, old/new: money
+AMOUNT_CHANGED = "amount_changed" # source: Generator, old/new: amount owned
+MANAGER_HIRED = "manager_hired" # source: Manager, new: id of the managed generator
+MULTIPLIER_BOUGHT = "multiplier_bought" # source: Generator, old/new: revenue_multiplier
+CYCLE_COMPLETED = "cycle_completed" # source: Generator, new: money made by one cycle, count: cycles completed
+
+
+class ModelEvent:
+    """One coalesced change: old is the value before the first change this frame, new the latest, count how many changes there were."""
+    __slots__ = ("type", "source", "old", "new", "count")
+
+    def __init__(self, type, source, old=None, new=None, count=1):
+        self.type = type
+        self.source = source
+        self.old = old
+        self.new = new
+        self.count = count
+
+    def __repr__(self):
+        return f"ModelEvent({self.type}, {self.source!r}, old={self.old!r}, new={self.new!r}, count={self.count})"
+
+
+class EventDispatcher:
+    def __init__(self):
+        self.listeners = {} # event type -> [callback(event)]
+        self.pending = {} # (event type, source) -> ModelEvent waiting for dispatch()
+
+    def subscribe(self, event_type, callback):
+        self.listeners.setdefault(event_type, []).append(callback)
+        return callback
+
+    def unsubscribe(self, event_type, callback):
+        callbacks = self.listeners.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.listeners.pop(event_type, None) # so publish() goes back to doing nothing
+
+    def publish(self, event_type, source, old=None, new=None, count=1):
+        if event_type not in self.listeners: # nobody listening
+            return
+        key = (event_type, source)
+        event = self.pending.get(key)
+        if event is None:
+            self.pending[key] = ModelEvent(event_type, source, old, new, count)
+        else: # already changed this frame, keep the first old value
+            event.new = new
+            event.count += count
+
+    def dispatch(self):
+        """Delivers the events queued since the last call, call once per frame. Returns how many were delivered."""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, {}
+        for event in pending.values():
+            for callback in list(self.listeners.get(event.type, ())): # a listener may unsubscribe itself
+                callback(event)
+        return len(pending)
@@ -0,0 +1,87 @@
+import time
+import pygame
+from game_constants import *
+
+INPUT_EVENTS = {pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL,
+                pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT}
+HIDDEN_EVENTS = {pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN}
+SHOWN_EVENTS = {pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWMAXIMIZED, pygame.WINDOWEXPOSED}
+
+
+class FramePacer:
+    """
+    Picks the main loop's frame rate from what the player is doing. It runs at full rate (FPS) while they're playing,
+    drops to IDLE_FPS after IDLE_AFTER seconds without input or while the window is unfocused, and to HIDDEN_FPS
+    without rendering while the window is minimized or hidden. Any input snaps it back to full rate.
+    The economy still advances by the real time between frames, so a slower loop earns the same.
+
+    It also measures what the loop costs: fps (frames per second) and cpu_ms (process CPU time per frame),
+    each averaged over the last MEASURE_INTERVAL seconds.
+    """
+    MEASURE_INTERVAL = 1.0 # seconds
+
+    def __init__(self, fps=FPS, idle_fps=IDLE_FPS, hidden_fps=HIDDEN_FPS, idle_after=IDLE_AFTER, clock=time.monotonic, cpu_clock=time.process_time):
+        self.full_fps = fps
+        self.idle_fps = idle_fps
+        self.hidden_fps = hidden_fps
+        self.idle_after = idle_after
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.visible = True # False while minimized or hidden, nothing is rendered
+        self.focused = True
+        self.last_input = clock()
+        self.exposed = False # the window came back, the current state must redraw everything (see take_exposed())
+        self.fps = 0.0
+        self.cpu_ms = 0.0
+        self.measure_start = clock()
+        self.measure_cpu = cpu_clock()
+        self.measure_frames = 0
+
+    def handle_events(self, events):
+        for event in events:
+            if event.type in INPUT_EVENTS:
+                self.last_input = self.clock()
+            elif event.type in HIDDEN_EVENTS:
+                self.visible = False
+            elif event.type in SHOWN_EVENTS:
+                if not self.visible or event.type == pygame.WINDOWEXPOSED: # the window's contents may have been lost
+                    self.exposed = True
+                self.visible = True
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                self.focused = False
+            elif event.type == pygame.WINDOWFOCUSGAINED:
+                self.focused = True
+                self.last_input = self.clock()
+
+    @property
+    def mode(self):
+        if not self.visible:
+            return "hidden"
+        if not self.focused or self.clock() - self.last_input >= self.idle_after:
+            return "idle"
+        return "active"
+
+    def target_fps(self):
+        return {"hidden": self.hidden_fps, "idle": self.idle_fps, "active": self.full_fps}[self.mode]
+
+    def should_render(self):
+        return self.visible
+
+    def take_exposed(self):
+        """True once after the window was shown again."""
+        exposed, self.exposed = self.exposed, False
+        return exposed
+
+    def tick(self, game_clock):
+        """Ends a frame: waits on game_clock (a pygame.time.Clock) for the current rate and updates the measurements."""
+        self.measure_frames += 1
+        now = self.clock()
+        if now - self.measure_start >= self.MEASURE_INTERVAL:
+            cpu = self.cpu_clock()
+            self.fps = self.measure_frames / (now - self.measure_start)
+            self.cpu_ms = (cpu - self.measure_cpu) / self.measure_frames * 1000
+            self.measure_start, self.measure_cpu, self.measure_frames = now, cpu, 0
+        return game_clock.tick(self.target_fps())
+
+    def stats(self):
+        return {"mode": self.mode, "target_fps": self.target_fps(), "fps": round(self.fps, 1), "cpu_ms": round(self.cpu_ms, 3)}
@@ -1,6 +1,10 @@
 import pygame
 import os
 import sys
+from render_cache import get_font # fonts are loaded once and shared
+from content import load_content
+from asset_registry import ASSETS # images and sounds are loaded on first use, see asset_registry.py
+from texture_rendering import TextureDisplay
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller bundling purposes """
@@ -8,8 +12,16 @@ def resource_path(relative_path):
         # PyInstaller creates a temp folder and stores path in _MEIPASS
         base_path = sys._MEIPASS # type: ignore 
     except AttributeError:
-        base_path = os.path.abspath(".")
+        base_path = os.path.dirname(os.path.abspath(__file__)) # the assets sit next to the code, whatever directory it's run from
+
+    return os.path.join(base_path, relative_path)
 
+def user_data_path(relative_path):
+    """ Get absolute path to a file the game writes (saves, caches), next to the executable when bundled """
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable) # the PyInstaller temp folder is read-only and deleted on exit
+    else:
+        base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
 pygame.init()
@@ -17,13 +29,33 @@ pygame.font.init()
 
 
 DEBUG_MODE = False
+DEBUG_DIRTY_RECTS = False # outline the regions redrawn by the dirty-rect renderer
 
 # Screen settings
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 GAME_TITLE = "Idle Tutor Tycoon"
 FPS = 60
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+IDLE_FPS = 10 # frame rate after IDLE_AFTER seconds without input, or while the window is unfocused
+HIDDEN_FPS = 2 # loop rate while the window is minimized or hidden, nothing is drawn but the economy keeps going
+IDLE_AFTER = 30 # seconds without input before the frame rate drops to IDLE_FPS
+DIRTY_RECT_RENDERING = True # redraw only what changed in the game menu, False = redraw everything every frame
+OVERLAY_DIM_ALPHA = 200 # how dark the game is dimmed under the shop/upgrades panels and menus opened from the game
+HIT_TEST_CELL_SIZE = 100 # pixels, grid cell size of the click/hover hit-test index
+OVERLAY_REFRESH_INTERVAL = 0.5 # seconds between re-snapshots of the dimmed game under an open panel
+RENDER_BACKEND = "surface" # "texture" draws through SDL's renderer (see texture_rendering.py), falls back to "surface" if it can't start
+
+def open_display():
+    """The texture backend's display (None on the surface backend) and the surface the game draws onto."""
+    if RENDER_BACKEND == "texture":
+        try:
+            display = TextureDisplay((SCREEN_WIDTH, SCREEN_HEIGHT), GAME_TITLE)
+            return display, display.screen
+        except (ImportError, pygame.error) as e:
+            print(f"Texture render backend unavailable ({e}), using the surface backend")
+    return None, pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+TEXTURE_DISPLAY, screen = open_display()
 
 # Defining file paths
 ASSETS_DIR = "assets"
@@ -31,6 +63,9 @@ IMAGES_DIR = f"{ASSETS_DIR}/images"
 SOUNDS_DIR = f"{ASSETS_DIR}/sounds"
 FONTS_DIR = f"{ASSETS_DIR}/fonts"
 SAVE_DIR = "savestates/save_data.json"
+CONTENT_PACK = f"{ASSETS_DIR}/content/base_pack.json" # the generators, managers and upgrades, see content.py
+CONTENT_CACHE_DIR = "savestates/content_cache" # compiled content packs, by hash
+ASSET_CACHE_DIR = "savestates/asset_cache" # images pre-scaled and packed by the asset build step, by hash
 
 # Colours (RGB values)
 
@@ -101,12 +136,21 @@ STARTING_MONEY = 5
 MAIN_MENU_LOGO_SIZE = 90
 MAIN_MENU_BUTTON_SIZE = 25
 LOGO_FONT = resource_path(f"{FONTS_DIR}/tabitha.ttf")
-DEFAULT_FONT = pygame.font.Font(LOGO_FONT, MAIN_MENU_BUTTON_SIZE)
+DEFAULT_FONT = get_font(LOGO_FONT, MAIN_MENU_BUTTON_SIZE)
 
 
 # ---------- LOADING STUFF -----------
 # Save/load filepath
 SAVE_FILE_NAME = "save_data.json"
+STATS_QUEUE_FILE_NAME = "stats_queue.json" # unsent leaderboard snapshots, stored next to the save file
+
+# Leaderboard/stats upload settings
+STATS_SERVER_URL = None # None = no uploads. "http://127.0.0.1:8765" with stats_server.py running for a local stand-in server
+STATS_SNAPSHOT_INTERVAL = 30 # seconds between snapshots of the user's progress
+STATS_BATCH_SIZE = 20 # max snapshots sent per upload request
+STATS_MAX_QUEUE = 1000 # oldest snapshots are dropped beyond this so an offline machine doesn't grow forever
+STATS_BASE_BACKOFF = 2 # seconds to wait after the first failed upload, doubled on each failure
+STATS_MAX_BACKOFF = 300 # cap for the upload backoff
 
 # Game States
 MAIN_MENU = "main_menu"
@@ -117,89 +161,62 @@ SETTINGS_MENU = "settings_menu"
 HELP_MENU = "help_menu"
 HELP_DETAIL_MENU = "help_detail_menu"
 TESTING = "testing"
-
-
-# Load Images
-def load_image(relative_image_path, scale=None):
-    image = pygame.image.load(resource_path(relative_image_path)).convert_alpha()
-    if scale:
-        image = pygame.transform.scale(image, scale)
-    return image
-
-williamdu = load_image("assets/images/williamdu.png", (165, 165))
-main_menu_background = load_image("assets/images/ittmainmenu.png")
-idle_tutor_tycoon_logo = load_image("assets/images/itt_logo.png")
-game_menu_background = load_image("assets/images/ittgamebackground.png")
-settings_icon = load_image("assets/images/settings_icon.png", (50, 50))
-help_icon = load_image("assets/images/help_icon.png", (50, 50))
-exit_icon = load_image("assets/images/exit_icon.png", (50, 50))
-tutorial_arrow = load_image("assets/images/tutorial_arrow.png", (100, 100))
-
-# Load UI sounds
-BUTTON_PRESS_SOUND = pygame.mixer.Sound(resource_path("assets/sounds/button_press.wav"))
-BUTTON_PRESS_SOUND.set_volume(0.3)
+PREWARM_STATES = [GAME_MENU] # built in the frames after the main menu shows, so entering the game doesn't wait for it
+EVICTABLE_STATES = [MAIN_MENU, SETTINGS_MENU, HELP_MENU, HELP_DETAIL_MENU] # rarely visited, dropped when idle and rebuilt on entry
+STATE_ASSETS = { # assets each state holds while it's built, preloaded with PREWARM_STATES and unloaded when it's evicted
+    MAIN_MENU: ["main_menu_background", "menu_icons", "settings_icon", "settings_icon_hover", "help_icon", "help_icon_hover", "exit_icon", "exit_icon_hover"],
+    GAME_MENU: ["game_menu_background", "williamdu", "tutorial_arrow", "generator_icons"],
+}
+STATE_EVICT_AFTER = 300 # seconds since an evictable state was last entered before it's dropped
+
+
+# Images, loaded the first time they're used (ASSETS.get(name)), at the size they're drawn at (see asset_pipeline.py)
+ASSETS.build_dir = user_data_path(ASSET_CACHE_DIR)
+ASSETS.image("williamdu", resource_path("assets/images/williamdu.png"), (165, 165))
+ASSETS.image("main_menu_background", resource_path("assets/images/ittmainmenu.png"))
+ASSETS.image("idle_tutor_tycoon_logo", resource_path("assets/images/itt_logo.png"))
+ASSETS.image("game_menu_background", resource_path("assets/images/ittgamebackground.png"), crop=(SCREEN_WIDTH, SCREEN_HEIGHT)) # drawn at (0, 0), the rest is off screen
+ASSETS.image("tutorial_arrow", resource_path("assets/images/tutorial_arrow.png"), (100, 100))
+MENU_ICON_SIZE = (50, 50)
+ASSETS.atlas("menu_icons", [ # the main menu's icon buttons, with the greyed copies they show when hovered
+    ("settings_icon", resource_path("assets/images/settings_icon.png"), MENU_ICON_SIZE, None),
+    ("settings_icon_hover", resource_path("assets/images/settings_icon.png"), MENU_ICON_SIZE, GRAY),
+    ("help_icon", resource_path("assets/images/help_icon.png"), MENU_ICON_SIZE, None),
+    ("help_icon_hover", resource_path("assets/images/help_icon.png"), MENU_ICON_SIZE, GRAY),
+    ("exit_icon", resource_path("assets/images/exit_icon.png"), MENU_ICON_SIZE, None),
+    ("exit_icon_hover", resource_path("assets/images/exit_icon.png"), MENU_ICON_SIZE, GRAY),
+])
+
+# UI sounds
+BUTTON_PRESS_SOUND = "button_press" # play with ASSETS.get(BUTTON_PRESS_SOUND).play()
+ASSETS.sound(BUTTON_PRESS_SOUND, resource_path("assets/sounds/button_press.wav"), volume=0.3)
+
+# Game content, loaded from the content pack (compiled once and cached, see content.py)
+CONTENT = load_content(resource_path(CONTENT_PACK), user_data_path(CONTENT_CACHE_DIR))
+
+# Generator icons, packed into one atlas. A generator without an image shows its initial instead
+GENERATOR_ICON_SIZE = (70, 70)
+ASSETS.atlas("generator_icons", [
+    (f"generator_icon_{g_id}", resource_path(f"{IMAGES_DIR}/{g_id}.png"), GENERATOR_ICON_SIZE, None)
+    for g_id in CONTENT.ids if os.path.exists(resource_path(f"{IMAGES_DIR}/{g_id}.png"))
+])
 
 # Generator prototypes
-GENERATOR_PROTOTYPES = {
-    # id: { name, base_rate (points/sec), base_price (initial cost), growth_rate (cost multiplier), base_time (time to complete cycle) }
-    "g1":   { "name": "5.3 Math Student", "base_rate": 1,   "base_price": 3.738, "growth_rate": 1.07, "base_time": 0.6 },
-    "g2": { "name": "Victor", "base_rate": 60,   "base_price": 60, "growth_rate": 1.15, "base_time": 3.0 },
-    "g3":  { "name": "Terry Bong", "base_rate": 720,  "base_price": 540, "growth_rate": 1.14, "base_time": 6.0 },
-    "g4": { "name": "Math Messiah, Andy Param", "base_rate": 4320, "base_price": 8640, "growth_rate": 1.13, "base_time": 12.0 },
-    "g5": { "name": "Eddie Wu", "base_rate": 51840, "base_price": 103680, "growth_rate": 1.12, "base_time": 24.0 },
-    "g6": { "name": "SM", "base_rate": 622080, "base_price": 1244160, "growth_rate": 1.11, "base_time": 96.0},
-    "g7": { "name": "Dilliam Wu", "base_rate": 7464960, "base_price": 14929920, "growth_rate": 1.10, "base_time": 384.0},
-    "g8": { "name": "Ko", "base_rate": 89579520, "base_price": 179159040, "growth_rate": 1.09, "base_time": 1536.0},
-    "g9": { "name": "English Advanced", "base_rate": 2149908480, "base_price": 1074954240, "growth_rate": 1.08, "base_time": 6144.0},
-    "g0": { "name": "SR 1", "base_rate": 29668737024, "base_price": 25798901760, "growth_rate": 1.07, "base_time": 36864.0},
-    
-}
+# id: { name, base_rate (points/sec), base_price (initial cost), growth_rate (cost multiplier), base_time (time to complete cycle) }
+GENERATOR_PROTOTYPES = CONTENT.generator_prototypes()
 
 # Manager prototypes
-MANAGER_PROTOTYPES = {
-    # same keys as GENERATOR_PROTOTYPES 
-    "g1": { "name": "Mr Booey",  "cost":  1000   },
-    "g2": { "name": "Teaches Math",     "cost":  15000  },
-    "g3": { "name": "Germanic Baguette Guy", "cost": 100000  },
-    "g4": { "name": "Non suspicious kookaburra", "cost": 500000 },
-    "g5": { "name": "Wu's Dad", "cost": 1200000 },
-    "g6": { "name" :"Hw Copier (not)", "cost": 10000000 },
-    "g7": { "name": "Dames Ju", "cost": 111111111 },
-    "g8": { "name" :"buStationary", "cost": 555555555 },
-    "g9": { "name" :"Useless", "cost": 10000000000 },
-    "g0": { "name" :"You", "cost": 100000000000 },
-}
+# same keys as GENERATOR_PROTOTYPES: { name, cost }
+MANAGER_PROTOTYPES = CONTENT.manager_prototypes()
 
-GENERATOR_UPGRADES = {
-    "g1":   [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g2": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g3": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g4": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g5": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g6": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g7": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g8": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g9": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "g0": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)],
-    "global": [(25, 2), (50, 4), (100, 8), (200, 16), (300, 32), (400, 64), (500, 256), (600, 256), (700, 1024), (800, 4096), (900, 16384), (1000, 81920), (1100, 327680), (1200, 1310720), (1300, 5242880), (1400, 20971520), (1500, 83886080), (1600, 335544320), (1700, 1342177280), (1800, 5368709120), (1900, 21474836480), (2000, 85899345920)]
-}
+# generator id (and "global") -> [(amount owned, level multiplier)], generators sharing a tier table share the list
+GENERATOR_UPGRADES = CONTENT.generator_upgrades()
 
 # Time-based generation milestones
-GENERATOR_TIME_MILESTONES = [25, 50, 100, 200, 300, 400, 500, 600, 1000] # Reduces time for specific generator
-GLOBAL_TIME_MILESTONES = [25, 50, 100, 200, 300, 400, 500, 600, 1000, 1200, 1600, 2000]    # Reduces time for ALL generators if all meet count
+GENERATOR_TIME_MILESTONES = CONTENT.time_milestones # Reduces time for specific generator
+GLOBAL_TIME_MILESTONES = CONTENT.global_time_milestones    # Reduces time for ALL generators if all meet count
 MIN_GENERATION_TIME = 0.01 # Minimum time a cycle can take after all reductions
 
 # Revenue multiplier upgrades (from the upgrades panel)
-REVENUE_MULTIPLIER_BASE_PRICES = {
-    "g1": 100000000,
-    "g2": 250000000,
-    "g3": 500000000,
-    "g4": 1000000000,
-    "g5": 2500000000,
-    "g6": 5000000000,
-    "g7": 10000000000,
-    "g8": 25000000000,
-    "g9": 50000000000,
-    "g0": 100000000000,
-}
+REVENUE_MULTIPLIER_BASE_PRICES = CONTENT.revenue_multiplier_prices()
 REVENUE_MULTIPLIER_GROWTH_FACTOR = 2500
@@ -1,23 +1,32 @@
+from bisect import bisect_right
 from game_constants import *
+from events import EventDispatcher, MONEY_CHANGED, AMOUNT_CHANGED, MANAGER_HIRED, MULTIPLIER_BOUGHT, CYCLE_COMPLETED
+
+def lowest_amount(generators):
+    """
+    The amount owned of the generator the user has fewest of, what global milestones are measured against.
+    Generators the user hasn't got yet (they're only created when first bought) count as none owned, which is what
+    the game menu creating every generator up front used to give, so the global milestones apply at the same amounts.
+    """
+    if len(generators) < len(GENERATOR_PROTOTYPES):
+        return 0
+    return min(g.amount for g in generators.values())
 
 def apply_upgrades(user):
     """
     Calculates and updates levels for ALL generators based on their specific
-    and the current global upgrade tiers with stacking multipliers
+    and the current global upgrade tiers with stacking multipliers.
+    The tiers come from the compiled content tables, each lookup is a bisect of the tier thresholds.
     """
-
-    highest_achieved_global_multiplier = 1  # Start with base multiplier of 1
-    for thresh_global, mult_global in GENERATOR_UPGRADES.get("global", []):
-        if all(g.amount >= thresh_global for g in user.generators.values()):
-            highest_achieved_global_multiplier = max(highest_achieved_global_multiplier, mult_global)
+    if not user.generators:
+        return
+    # the global tiers reached are the ones every generator has reached, i.e. the ones the smallest amount reached
+    highest_achieved_global_multiplier = CONTENT.upgrade_multiplier(CONTENT.global_tier, lowest_amount(user.generators))
 
     # Update each generator's level based on its specific upgrades and the global multiplier
     for gen_id, gen_obj in user.generators.items(): # loop through each generator
-        # Determine the highest applicable specific multiplier for this generator
-        specific_multiplier_for_this_gen = 1  
-        for thresh_specific, mult_specific in GENERATOR_UPGRADES.get(gen_id, []):
-            if gen_obj.amount >= thresh_specific:
-                specific_multiplier_for_this_gen = max(specific_multiplier_for_this_gen, mult_specific)
+        index = CONTENT.index.get(gen_id)
+        specific_multiplier_for_this_gen = CONTENT.upgrade_multiplier(CONTENT.tier_of[index], gen_obj.amount) if index is not None else 1
         
         # The final level is the product of the specific and global multipliers.
         new_level = specific_multiplier_for_this_gen * highest_achieved_global_multiplier
@@ -43,20 +52,25 @@ class Generator:
         self.revenue_multiplier = revenue_multiplier # multiplier for base_rate
         self.revenue_multiplier_purchases = revenue_multiplier_purchases # number of times the revenue multiplier has been purchased
 
+    @classmethod
+    def from_prototype(cls, generator_id):
+        """A new generator, none owned yet."""
+        prototype = GENERATOR_PROTOTYPES[generator_id] 
+        return cls(
+            id=generator_id,
+            name=prototype["name"],
+            base_rate=prototype["base_rate"],
+            base_price=prototype["base_price"],
+            base_time=prototype["base_time"]
+        )
+
     def get_effective_time(self, all_user_generators):
         """Calculates the effective time for a generation cycle after milestone reductions."""
-        effective_time = self.base_time
-        
-        # Apply individual generator milestones
-        for milestone in GENERATOR_TIME_MILESTONES:
-            if self.amount >= milestone:
-                effective_time /= 2
-         
-        
-        # Apply global milestones
-        for milestone in GLOBAL_TIME_MILESTONES:
-            if all(g.amount >= milestone for g in all_user_generators.values()):
-                effective_time /= 2
+        # every milestone reached halves the time, the milestones are sorted so the number reached is a bisect
+        halvings = bisect_right(GENERATOR_TIME_MILESTONES, self.amount) # individual generator milestones
+        # global milestones, reached when every generator has reached them
+        halvings += bisect_right(GLOBAL_TIME_MILESTONES, lowest_amount(all_user_generators))
+        effective_time = self.base_time / 2 ** halvings
                 
         return max(MIN_GENERATION_TIME, effective_time) # Ensure time doesn't drop below a minimum for performance purposes
     
@@ -71,12 +85,22 @@ class Generator:
         if self.is_generating and self.amount > 0:
             self.time_progress -= dt_seconds
             if self.time_progress <= 0:
+                overshoot = -self.time_progress # frame time left over after the cycle finished
                 money_generated = self.base_rate * self.level * self.amount * self.revenue_multiplier
                 user.money += money_generated
                 self.is_generating = False # Cycle complete
+                cycles = 1
                 # If managed, automatically restart the cycle
                 if self.id in user.managers:
                     self.start_generation_cycle(user.generators) # Pass all user generators for milestone checks
+                    # carry the leftover time into the new cycle (and any it completes) so income doesn't depend on the frame rate
+                    extra_cycles = int(overshoot // self.time_progress)
+                    if extra_cycles > 0:
+                        user.money += money_generated * extra_cycles
+                        overshoot -= extra_cycles * self.time_progress
+                        cycles += extra_cycles
+                    self.time_progress -= overshoot
+                user.events.publish(CYCLE_COMPLETED, self, new=money_generated, count=cycles)
     
     def manual_generate(self, user):
         """Manually starts a generation cycle for this generator."""
@@ -117,6 +141,7 @@ class Generator:
         if user.money >= total_cost:
             user.money -= total_cost
             self.amount += quantity
+            user.events.publish(AMOUNT_CHANGED, self, self.amount - quantity, self.amount)
             if user:
                 apply_upgrades(user)
             return True
@@ -135,6 +160,7 @@ class Generator:
             user.money -= cost
             self.revenue_multiplier *= 10
             self.revenue_multiplier_purchases += 1
+            user.events.publish(MULTIPLIER_BOUGHT, self, self.revenue_multiplier // 10, self.revenue_multiplier)
             return True
         return False
 
@@ -177,6 +203,7 @@ class Manager:
         if user.money >= self.cost:
             user.money -= self.cost
             user.managers[self.id] = self
+            user.events.publish(MANAGER_HIRED, self, new=self.id)
             # If the generator is now managed, ensure its cycle starts if it's not already running
             if self.id in user.generators and user.generators[self.id].amount > 0 and not user.generators[self.id].is_generating:
                 user.generators[self.id].start_generation_cycle(user.generators)
@@ -195,13 +222,25 @@ class Manager:
 class User:
     """
     The current user class. Handles the generators, managers and money owned.
+    Changes are published on self.events (see events.py) for anything that wants to react to them.
     """
     def __init__(self, money=0.0):
+        self.events = EventDispatcher()
         self.generators = {}
-        self.money = float(money)
+        self._money = float(money)
         self.managers = {} 
         self.tutorial_state = {"first_generator": False, "first_manual_generation": False, "first_manager": False, "first_upgrade": False, "help_menu_opened": False} # Tracks the player's progress through the tutorial
         
+    @property
+    def money(self):
+        return self._money
+
+    @money.setter
+    def money(self, value):
+        if MONEY_CHANGED in self.events.listeners: # skip the call entirely when nobody listens, money changes every cycle
+            self.events.publish(MONEY_CHANGED, self, self._money, value)
+        self._money = value
+
     def manual_generate(self, generator_id):
         self.ensure_generator(generator_id)
         # Check and update the tutorial state for the first manual generation.
@@ -218,14 +257,7 @@ class User:
         
     def ensure_generator(self, generator_id):
         if generator_id not in self.generators:
-            prototype = GENERATOR_PROTOTYPES[generator_id] 
-            self.generators[generator_id] = Generator(
-                id=generator_id,
-                name=prototype["name"],
-                base_rate=prototype["base_rate"],
-                base_price=prototype["base_price"],
-                base_time=prototype["base_time"]
-            )
+            self.generators[generator_id] = Generator.from_prototype(generator_id)
         
     def buy_manager(self, manager_id):
         if manager_id in self.managers:
@@ -1,10 +1,16 @@
-import pygame, sys
+import pygame, sys, time
 from game_constants import *  # import game constants
 from game_logic import *
 from ui_elements import *
 from save_loads import *
+from rendering import StaticLayer, FrozenUnderlay, make_renderer, current_frame, set_window_title
+from bindings import BindingSet
+from events import MONEY_CHANGED, AMOUNT_CHANGED, MANAGER_HIRED, MULTIPLIER_BOUGHT
+from hit_test import HitTestIndex
+from text_layout import TEXT_LAYOUT, TextPage
+from virtual_list import VirtualList
 
-from utils import format_large_number, tutorial_progress
+from utils import format_large_number, TutorialOverlay
 
 
 
@@ -13,22 +19,29 @@ class StateManager: # global state manager
     Handles state transitions and current state of the game. 
     Initialises with the screen and user objects, and passes them onto the states.
     Analogous to central station in Sydney, but less cool.
+    States are only built the first time they're entered (or prewarmed, see prewarm_step()) and kept afterwards,
+    so the main menu shows without waiting for the game menu and the others to be built.
     """
     def __init__(self, screen, user, music_player):
         self.state = MAIN_MENU # keep track of the current state name
-        self.states = {
-            MAIN_MENU: MainMenu(screen, user, self),
-            GAME_MENU: GameMenu(screen, user, self),
-            SETTINGS_MENU: SettingsMenu(screen, user, self, music_player, pass_back=None), # pass current_active_state_name
-            HELP_MENU: HelpMenu(screen, user, self, pass_back=None),
-            HELP_DETAIL_MENU: HelpDetailMenu(screen, user, self, topic=None),
+        self.factories = {
+            MAIN_MENU: lambda: MainMenu(screen, user, self),
+            GAME_MENU: lambda: GameMenu(screen, user, self),
+            SETTINGS_MENU: lambda: SettingsMenu(screen, user, self, music_player, pass_back=None), # pass current_active_state_name
+            HELP_MENU: lambda: HelpMenu(screen, user, self, pass_back=None),
+            HELP_DETAIL_MENU: lambda: HelpDetailMenu(screen, user, self, topic=None),
             } 
+        self.states = {} # state name -> state object, built on first use
+        self.last_entered = {MAIN_MENU: time.monotonic()} # state name -> time.monotonic() it was last entered, for evict_idle()
+        self.prewarm_queue = list(PREWARM_STATES) # built one per prewarm_step() call
+        ASSETS.preload([name for state_name in PREWARM_STATES for name in STATE_ASSETS.get(state_name, ())]) # decoded while the main menu shows
         self.user = user
         self.music_player = music_player
 
     def set_state(self, new_state_name, pass_back=None, topic=None, original_state=None): # set the state of the game
         self.state = new_state_name # Update current active state name
-        pygame.display.set_caption(f"{GAME_TITLE} - {new_state_name.replace('_', ' ').title()}") # set the window title to the current state
+        self.last_entered[new_state_name] = time.monotonic()
+        set_window_title(f"{GAME_TITLE} - {new_state_name.replace('_', ' ').title()}") # set the window title to the current state
 
         # update pass_back for states that use it
         target_state_object = self.get_state_object(new_state_name)
@@ -40,6 +53,13 @@ class StateManager: # global state manager
                 target_state_object.setup_ui()
             if hasattr(target_state_object, 'original_state') and original_state is not None:
                 target_state_object.original_state = original_state
+            if hasattr(target_state_object, 'underlay') and hasattr(target_state_object, 'set_underlay'):
+                # menus opened from the game are drawn over a frozen copy of it, the screen still shows the game's last frame here
+                target_state_object.set_underlay(current_frame(target_state_object.screen) if pass_back == GAME_MENU else None)
+            if hasattr(target_state_object, 'renderer'):
+                target_state_object.renderer.invalidate() # the previous state drew over the screen
+            if hasattr(target_state_object, 'hit_index'):
+                target_state_object.hit_index.hover(pygame.mouse.get_pos()) # hover was frozen while the state was away
 
 
     @property
@@ -47,8 +67,41 @@ class StateManager: # global state manager
         return self.get_state_object(self.state)
     
     
-    def get_state_object(self, state_name): # get the state object from the states dictionary
-        return self.states.get(state_name, None)
+    def get_state_object(self, state_name): # get the state object from the states dictionary, building it on first use
+        state_object = self.states.get(state_name)
+        if state_object is None and state_name in self.factories:
+            start = time.perf_counter()
+            ASSETS.acquire(state_name, STATE_ASSETS.get(state_name, ()))
+            state_object = self.states[state_name] = self.factories[state_name]()
+            print(f"Built {state_name} in {(time.perf_counter() - start) * 1000:.1f}ms") if DEBUG_MODE else None
+        return state_object
+
+    def prewarm_step(self):
+        """
+        Builds the next state in PREWARM_STATES that hasn't been built yet, call once per frame after the first one is shown
+        so states are ready before they're entered without delaying startup. Returns False once there's nothing left to build.
+        """
+        while self.prewarm_queue:
+            state_name = self.prewarm_queue.pop(0)
+            if state_name not in self.states:
+                self.get_state_object(state_name)
+                return True
+        return False
+
+    def evict(self, state_name):
+        """Drops a built state (and the assets only it used) so its memory is freed, it's rebuilt the next time it's entered. The current state is never evicted."""
+        if state_name == self.state or state_name not in self.states:
+            return False
+        del self.states[state_name]
+        ASSETS.release(state_name) # its images go too, unless another built state uses them
+        print(f"Evicted {state_name}") if DEBUG_MODE else None
+        return True
+
+    def evict_idle(self, max_idle=STATE_EVICT_AFTER):
+        """Evicts the EVICTABLE_STATES not entered for max_idle seconds (the rarely visited menus). Returns the states evicted."""
+        now = time.monotonic()
+        idle = [name for name in EVICTABLE_STATES if name in self.states and now - self.last_entered.get(name, now) >= max_idle]
+        return [name for name in idle if self.evict(name)]
     
     def __str__(self): # debugging line to print all states and their types
         state_names = {key: type(value).__name__ for key, value in self.states.items()}
@@ -63,11 +116,14 @@ class MainMenu:  # —— Main menu screen
     def __init__(self, screen, user, state_manager):
         self.screen = screen
         self.state_manager = state_manager
-        self.title_font = pygame.font.Font(LOGO_FONT, 100)
+        self.title_font = get_font(LOGO_FONT, 100)
         self.button_font = DEFAULT_FONT
         self.user = user
         # buttons in the center
         self.buttons = self.create_buttons()
+        self.hit_index = HitTestIndex.for_buttons(self.buttons) # what gets a click
+        self.static_layer = StaticLayer(background=ASSETS.get("main_menu_background"))
+        self.renderer = make_renderer(self.screen, self.static_layer.surface) # only the buttons ever change
 
 
     def create_buttons(self):
@@ -80,17 +136,17 @@ class MainMenu:  # —— Main menu screen
             ),
             Button( # settings button
                 50, 360, 80, 60,
-                "", BUTTON_UNPRESSED_COLOUR, self.button_font, WHITE, icon_image=settings_icon,
+                "", BUTTON_UNPRESSED_COLOUR, self.button_font, WHITE, icon_image=ASSETS.get("settings_icon"), hover_icon_image=ASSETS.get("settings_icon_hover"),
                 callback=self.open_settings, border_radius=15
             ),
             Button( # quit button
                 50, 560, 80, 60, "", BUTTON_UNPRESSED_COLOUR, self.button_font, 
-                WHITE, icon_image=exit_icon, callback=self.quit_game, border_radius=15
+                WHITE, icon_image=ASSETS.get("exit_icon"), hover_icon_image=ASSETS.get("exit_icon_hover"), callback=self.quit_game, border_radius=15
             ),
             
             Button( # help button
                 50, 460, 80, 60, "", BUTTON_UNPRESSED_COLOUR, self.button_font,
-                WHITE, icon_image=help_icon, callback=self.show_help, border_radius=15
+                WHITE, icon_image=ASSETS.get("help_icon"), hover_icon_image=ASSETS.get("help_icon_hover"), callback=self.show_help, border_radius=15
             ),
         ]
 
@@ -119,33 +175,24 @@ class MainMenu:  # —— Main menu screen
                 sys.exit()
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                
-                # big buttons
-                for btn in self.buttons:
-                    if btn.is_hovered(pos):
-                        btn.click()
+                self.hit_index.click(event.pos) # big buttons
+            elif event.type == pygame.MOUSEMOTION:
+                self.hit_index.hover(event.pos)
+            elif event.type == pygame.WINDOWLEAVE:
+                self.hit_index.hover(None)
 
 
         return True
 
     # updates ─────────────────────────────────────────────────
     def update(self):
-        pos = pygame.mouse.get_pos()
-        for btn in self.buttons:
-            btn.animations(pos)
+        pass # hover follows MOUSEMOTION events through the hit-test index, there's nothing to do per frame
 
 
     # rendering ───────────────────────────────────────────────────────────
     def render(self):
-        # blit background image
-        self.screen.blit(main_menu_background, (0,0)) 
-        
-        # draw buttons
-        for btn in self.buttons:
-            btn.draw(self.screen)
-
-        pygame.display.flip()
+        # background from the static layer, buttons on top
+        self.renderer.render(self.buttons)
         
 
 
@@ -160,6 +207,7 @@ class GameMenu:
     MONEY_DISPLAY_WIDTH = 300 
     INCOME_DISPLAY_WIDTH = 280 
     HUD_TEXT_GAP = 10 # gap between money and income display
+    PANEL_RECT = pygame.Rect(175, 0, 1030, SCREEN_HEIGHT) # area the shop/upgrades panels cover, dimmed under them
 
     def __init__(self, screen, user, state_manager):
         self.screen         = screen
@@ -167,15 +215,14 @@ class GameMenu:
         self.state_manager  = state_manager
         self.user           = user
         
-        self.title_font   = pygame.font.Font(LOGO_FONT, 60)
-        self.subtitle_font= pygame.font.Font(LOGO_FONT, 28)
-        self.row_font     = pygame.font.Font(LOGO_FONT, 22)
-        self.time_display_font = pygame.font.Font(LOGO_FONT, 18) # smaller font for time display
+        self.title_font   = get_font(LOGO_FONT, 60)
+        self.subtitle_font= get_font(LOGO_FONT, 28)
+        self.row_font     = get_font(LOGO_FONT, 22)
+        self.time_display_font = get_font(LOGO_FONT, 18) # smaller font for time display
         
-        self.generator_icons = self.load_generator_icons()
         self.last_time = pygame.time.get_ticks() / 1000  # track for dt
         
-        self.profile_pic = CreateFrect(5, 5, 165, 165, bg_colour=None, id="profile_picture", image=williamdu)
+        self.profile_pic = CreateFrect(5, 5, 165, 165, bg_colour=None, id="profile_picture", image=ASSETS.get("williamdu"))
         self.profile_pic_background = CreateFrect(0, 0, 175, 175, bg_colour=WHITE, id="profile_picture_background")
         self.user_name = CreateFrect(67.5, 185, 40, 40, bg_colour=None, id="user_name", font=self.row_font, font_colour=WHITE, display="You, the Boss")
         
@@ -183,14 +230,56 @@ class GameMenu:
         self.income_display_height = self.subtitle_font.get_height() + 10 # add some padding
         self.income_display_top_y = self.MONEY_DISPLAY_TOP_Y + self.money_display_height + self.HUD_TEXT_GAP
         
+        self.bindings = BindingSet() # the dynamic labels, recomputed only when the model says what they show changed
+        self.subscribe_bindings()
         self.nav_buttons = self.create_nav_column() # navigation column
-        self.rows = self.create_rows() # generator row creating
-        self.shop_rows = self.build_shop_menu()
-        self.shop_row_description = self.build_shop_description()
-        self.upgrades_rows = self.build_upgrades_panel()
+        self.previews = {} # g_id -> Generator shown in the rows until the user has one, see generator_for()
+        self.generator_list = self.create_generator_list() # generator rows, only the visible ones have widgets
+        self.money_text, self.income_text = self.create_hud_bindings() # shared by the hud and both panel headers
+        self.panels = {"shop": self.build_shop_menu(), "upgrades": self.build_upgrades_panel()} # active_panel -> Panel
         self.hud_elems = self.create_hud_elems()
+        self.tutorial_hint = TutorialOverlay(self.user, self) # drawn on top of everything else
+
+        self.static_layer = StaticLayer(background=ASSETS.get("game_menu_background"), widgets=self.get_static_widgets()) # drawn once, not every frame
+        self.renderer = make_renderer(self.screen, self.static_layer.surface) # only redraws widgets whose output changed
+        self.render_layers = {} # active_panel -> dynamic widgets in drawing order
+        self.underlay = FrozenUnderlay() # the dimmed game under an open panel
+        self.hit_index = self.build_hit_index() # what gets a click, by layer
         
 
+    # bindings ───────────────────────────────────────────────────────────
+    # Binding keys: "money", "income" (which generators are managed, every amount and multiplier), "levels" (every
+    # amount, as global milestones change every generator's level and cycle time), "managers", and a row slot's key
+    # for anything about the generator the slot shows. The user's change events mark them stale, see on_model_change().
+    def subscribe_bindings(self):
+        for event_type in (MONEY_CHANGED, AMOUNT_CHANGED, MANAGER_HIRED, MULTIPLIER_BOUGHT):
+            self.user.events.subscribe(event_type, self.on_model_change)
+
+    def on_model_change(self, event):
+        if event.type == MONEY_CHANGED:
+            self.bindings.invalidate("money")
+        elif event.type == MANAGER_HIRED:
+            self.bindings.invalidate("managers", "income", *self.slot_keys(event.new))
+        else: # AMOUNT_CHANGED or MULTIPLIER_BOUGHT, from a generator
+            self.bindings.invalidate("income", *self.slot_keys(event.source.id))
+            if event.type == AMOUNT_CHANGED:
+                self.bindings.invalidate("levels")
+
+    @staticmethod
+    def slot_key(slot):
+        return ("slot", id(slot))
+
+    def slot_keys(self, g_id):
+        """The keys of the row slots showing generator g_id, in the generator list and both panels."""
+        lists = [self.generator_list] + [panel.rows for panel in self.panels.values()]
+        return [self.slot_key(slot) for slot in (rows.slot_for(g_id) for rows in lists) if slot is not None]
+
+    def create_hud_bindings(self):
+        """The money and income texts."""
+        money_text = self.bindings.bind(lambda: f"${format_large_number(round(self.user.money))}", "money")
+        income_text = self.bindings.bind(lambda: f"{format_large_number(self.user.income_per_second)}/s (avg revenue)", "income")
+        return money_text, income_text
+
     def create_hud_elems(self): # create hud elements
         return {
             "money_display": CreateFrect(
@@ -201,7 +290,8 @@ class GameMenu:
                 bg_colour=None,
                 font=self.title_font,
                 font_colour=WHITE,
-                display_callback=lambda: f"${format_large_number(round(self.user.money))}"
+                display_callback=self.money_text,
+                glyphs=True
             ),
             "income_display": CreateFrect(
                 x=547.5,
@@ -211,26 +301,22 @@ class GameMenu:
                 bg_colour=None,
                 font=self.subtitle_font,
                 font_colour=WHITE, 
-                display_callback=lambda: f"{format_large_number(self.user.income_per_second)}/s (avg revenue)"
+                display_callback=self.income_text,
+                glyphs=True
             )
         }
 
-    def load_generator_icons(self, size=None):
-        icons = {}
-        if size is None:
-            size = (70, 70) # default large icon size
-        for g_id in GENERATOR_PROTOTYPES:
-            image_path = f"{IMAGES_DIR}/{g_id}.png"
-            icons[g_id] = load_image(image_path, size) # scale the image to 70x70
-        return icons
-
-    def create_rows(self): # create the column rows for the generators
-        rows = [] 
-        idx = 0
+    def get_generator_icon(self, g_id):
+        """The generator's icon from the generator icon atlas, None if it has no image (its row then shows its initial)."""
+        name = f"generator_icon_{g_id}"
+        return ASSETS.get(name) if name in ASSETS else None
+
+    def create_generator_list(self): # the two columns of generator rows, scrolling over every generator
         ROW_HEIGHT = 110
         ICON_SIZE   = 80
-        BAR_W, BAR_H = 320, 60
+        BAR_W = 320
         NAV_BAR_WIDTH = 180
+        TOP_Y = 180
         
         CONTENT_WIDTH = SCREEN_WIDTH - NAV_BAR_WIDTH # area for main content, right of the nav bar
         COLUMN_WIDTH = ICON_SIZE + 30 + BAR_W # width of a single generator item (icon + bar)
@@ -239,72 +325,107 @@ class GameMenu:
         MARGIN_X = (CONTENT_WIDTH - TOTAL_COLUMNS_WIDTH) // 2 # horizontal margin to centre the columns in the content area
         LEFT_COL_X = NAV_BAR_WIDTH + MARGIN_X # Starting X for the left column of generators
         RIGHT_COL_X = LEFT_COL_X + COLUMN_WIDTH + INTER_COLUMN_GAP # Starting X for the right column of generators
-        
-        for g_id, proto in GENERATOR_PROTOTYPES.items():
-            col_x = LEFT_COL_X  if idx % 2 == 0 else RIGHT_COL_X
-            row_y = 180 + (idx//2) * ROW_HEIGHT
-            bar_x = col_x + ICON_SIZE
-            self.user.ensure_generator(g_id) # ensure generator exists for display callbacks
-            generator_obj = self.user.generators[g_id]
-            
 
-            icon = CreateFrect(col_x, row_y, 
-                               ICON_SIZE, 
-                               ICON_SIZE,
-                               WHITE, 
-                               id=f"icon_{g_id}",
-                               font=self.row_font, 
-                               font_colour=BLACK,
-                               display=proto["name"][0] if not self.generator_icons.get(g_id) else "",
-                               image=self.generator_icons.get(g_id),
-                               border_radius=5) 
-
-            owned = CreateFrect(col_x+12.5, row_y+ICON_SIZE-10, 55, 24,
-                                BEIGE,
-                                font=self.row_font, 
-                                font_colour=BLACK,
-                                display_callback=lambda g=generator_obj:f"{g.amount}", 
-                                border_radius=15)
+        def build_slot(slot, idx):
+            col_x = LEFT_COL_X  if idx % 2 == 0 else RIGHT_COL_X
+            row_y = TOP_Y + (idx//2) * ROW_HEIGHT
+            self.build_generator_row(slot, idx, col_x, row_y, ICON_SIZE, BAR_W)
+
+        viewport = pygame.Rect(NAV_BAR_WIDTH, TOP_Y, CONTENT_WIDTH, SCREEN_HEIGHT - TOP_Y)
+        return VirtualList(GENERATOR_PROTOTYPES, viewport, ROW_HEIGHT, build_slot, self.assign_generator_row, columns=2)
+
+    def slot_field(self, slot, attr):
+        """
+        A watched getter for a field of the generator a recycled row slot shows, for fields that change without an event.
+        The generator object is part of the value, so the slot being handed another generator,
+        or the preview being replaced by the user's own generator, counts as a change.
+        """
+        def read():
+            if slot["item"] is None:
+                return None
+            generator = self.generator_for(slot["item"])
+            return generator, getattr(generator, attr)
+        return read
+
+    def generator_for(self, g_id):
+        """
+        The user's generator g_id, or until they buy their first one a preview of it. Previews aren't added
+        to the user, so generators the user never bought don't end up in their save.
+        """
+        generator = self.user.generators.get(g_id)
+        if generator is None:
+            generator = self.previews.get(g_id)
+            if generator is None:
+                generator = self.previews[g_id] = Generator.from_prototype(g_id)
+        return generator
+
+    def assign_generator_row(self, slot, g_id):
+        self.bindings.invalidate(self.slot_key(slot)) # now showing another generator
+        if g_id is not None:
+            icon = self.get_generator_icon(g_id)
+            slot["icon"].image = icon
+            slot["icon"].display = GENERATOR_PROTOTYPES[g_id]["name"][0] if not icon else ""
+
+    def build_generator_row(self, slot, idx, col_x, row_y, ICON_SIZE, BAR_W):
+        bar_x = col_x + ICON_SIZE
+        key = self.slot_key(slot)
+
+        icon = CreateFrect(col_x, row_y, 
+                           ICON_SIZE, 
+                           ICON_SIZE,
+                           WHITE, 
+                           id=f"icon_{idx}",
+                           font=self.row_font, 
+                           font_colour=BLACK,
+                           display="",
+                           border_radius=5) 
+
+        owned = CreateFrect(col_x+12.5, row_y+ICON_SIZE-10, 55, 24,
+                            BEIGE,
+                            font=self.row_font, 
+                            font_colour=BLACK,
+                            display_callback=self.bindings.bind(lambda s=slot:f"{self.generator_for(s['item']).amount}", key), 
+                            border_radius=15, glyphs=True)
 
-            
-            rev_bar = CreateFrect(bar_x, row_y+10, BAR_W, BAR_H,
-                                  BEIGE,
-                                  font=self.row_font, font_colour=BLACK,
-                                  display_callback=lambda g=generator_obj:
-                                      f"{format_large_number(g.cycle_output)} per cycle", border_radius=2) # show cycle output
-            
-            buy_btn = Button(bar_x+10 - 1, row_y+ICON_SIZE-10, 180, 32,
-                             "",
-                             GRAY, self.row_font, BLACK,
-                             callback=lambda current_gid=g_id: (
-                                 self.user.buy_generator(current_gid)),
-                             display_callback=lambda g=generator_obj:
-                                 f"Buy (${format_large_number(g.next_price)})" # use next_price from gen obj
-                            )
-            
-            time_display_y = row_y + ICON_SIZE - 10 # position it to the bottom of the icon
-            time_display_x = bar_x + 200 # position it to the right of buy button
-            time_display_width = BAR_W - 200 # adjust width
-            time_display_height = 32
-
-            time_rect = CreateFrect(time_display_x, time_display_y, time_display_width, time_display_height,
-                                    ALICEBLUE,
-                                    font=self.time_display_font, font_colour=BLACK,
-                                    display_callback=lambda g=generator_obj, u=self.user: (
-                                        f"{g.time_progress:.1f}s" if g.is_generating else f"{g.get_effective_time(u.generators):.1f}s"),border_radius=15,
-                                        )
-                                   
-            
-            rows.append({
-                "g_id": g_id,
-                "icon": icon, "owned": owned,
-                "rev": rev_bar, "buy": buy_btn,
-                "time_display": time_rect, 
-                }
-            )
-            idx += 1
-        return rows
+        
+        rev_bar = CreateFrect(bar_x, row_y+10, BAR_W, 60,
+                              BEIGE,
+                              font=self.row_font, font_colour=BLACK,
+                              display_callback=self.bindings.bind(lambda s=slot:
+                                  f"{format_large_number(self.generator_for(s['item']).cycle_output)} per cycle",
+                                  key, "levels"), border_radius=2) # show cycle output
+        
+        buy_btn = Button(bar_x+10 - 1, row_y+ICON_SIZE-10, 180, 32,
+                         "",
+                         GRAY, self.row_font, BLACK,
+                         callback=lambda s=slot: (
+                             self.user.buy_generator(s["item"])),
+                         display_callback=self.bindings.bind(lambda s=slot:
+                             f"Buy (${format_large_number(self.generator_for(s['item']).next_price)})", # use next_price from gen obj
+                             key)
+                        )
+        
+        time_display_y = row_y + ICON_SIZE - 10 # position it to the bottom of the icon
+        time_display_x = bar_x + 200 # position it to the right of buy button
+        time_display_width = BAR_W - 200 # adjust width
+        time_display_height = 32
+
+        time_rect = CreateFrect(time_display_x, time_display_y, time_display_width, time_display_height,
+                                ALICEBLUE,
+                                font=self.time_display_font, font_colour=BLACK,
+                                display_callback=self.bindings.bind(lambda s=slot: self.cycle_time_text(self.generator_for(s['item'])),
+                                    key, "levels", # milestones shorten the cycle, global ones too
+                                    watch=[self.slot_field(slot, "time_progress"), self.slot_field(slot, "is_generating")]), border_radius=15,
+                                glyphs=True)
+        slot.update({
+            "icon": icon, "owned": owned,
+            "rev": rev_bar, "buy": buy_btn,
+            "time_display": time_rect, 
+        })
     
+    def cycle_time_text(self, g):
+        return f"{g.time_progress:.1f}s" if g.is_generating else f"{g.get_effective_time(self.user.generators):.1f}s"
+
     def create_nav_column(self):
         btns = []
         start_y = 240
@@ -339,232 +460,219 @@ class GameMenu:
                 pygame.quit()
                 sys.exit()
 
-            elif e.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-
-                # check navigation buttons first
-                for nav_button in self.nav_buttons:
-                    if nav_button.is_hovered(pos):
-                        if nav_button.click():
-                            return True  # Event handled, stop further processing for this click
-
-                # handle interactions based on the active panel
-                if self.active_panel == "shop":
-                    # check buttons within the shop panel
-                    for r in self.shop_rows:
-                        if r["btn"].is_hovered(pos):
-                            r["btn"].click()
-                        if r["exit_menu_btn"].is_hovered(pos):
-                            r["exit_menu_btn"].click()
-                            return True  # Event handled
-                    # if the click is within the shop panel's general area but not on a button, consume the event to prevent click-through to underlying elements.
-
-                    # render a transparent black rectangle over the shop panel to prevent click-through
-                    shop_panel_rect = pygame.Rect(175, 0, 1030, SCREEN_HEIGHT)
-                    if shop_panel_rect.collidepoint(pos): # eat the click if it is on this black panel to prevent click through
-                        print("shop panel clicked") if DEBUG_MODE else None
-                        return True # Click was inside shop panel area, consume it.
-                # if click was outside shop panel, it's not handled by this block.
-
-                elif self.active_panel == "upgrades":
-                    # check for button clicks within the upgrades panel
-                    for r in self.upgrades_rows:
-                        if "btn" in r and r["btn"].is_hovered(pos):
-                            r["btn"].click()
-                            return True  # Event handled
-                        if "exit_menu_btn" in r and r["exit_menu_btn"].is_hovered(pos):
-                            r["exit_menu_btn"].click()
-                            return True  # Event handled
-                            
-                    # consume clicks within its area to prevent click-through.
-                    upgrades_panel_rect = pygame.Rect(175, 0, 1030, SCREEN_HEIGHT)
-                    if upgrades_panel_rect.collidepoint(pos):
-                        print("upgrades panel clicked") if DEBUG_MODE else None
-                        return True # Click was inside upgrades panel area, consume it.
-                
-                # if no panel is active, normally handle generator row interactions
-                elif self.active_panel is None:
-                    for r in self.rows:
-                        # Check icon click 
-                        if r["icon"].frect.collidepoint(pos): 
-                            if r["g_id"] not in self.user.managers:
-                                BUTTON_PRESS_SOUND.play()
-                            self.user.manual_generate(r["g_id"])
-                            return True  # Event handled
-                        # then check buy button click
-                        if r["buy"].is_hovered(pos):
-                            r["buy"].click()
-                            return True  # Event handled
+            elif e.type == pygame.MOUSEBUTTONDOWN and e.button == pygame.BUTTON_LEFT: # the wheel also sends button presses
+                # the topmost layer under the click gets it: the navigation column, then an open panel (which swallows
+                # clicks on its empty space), then the generator rows
+                region = self.hit_index.click(e.pos)
+                if region is not None and region.on_click is not None:
+                    return True  # Event handled, stop further processing for this click
+
+            elif e.type == pygame.MOUSEWHEEL:
+                self.scroll(pygame.mouse.get_pos(), -e.y)
+            elif e.type == pygame.MOUSEMOTION:
+                self.hit_index.hover(e.pos)
+            elif e.type == pygame.WINDOWLEAVE:
+                self.hit_index.hover(None)
 
         return True # for any stray possibility that a click was skipped and not handled. just gets eaten
 
-    # updates ──────────────────────────────────────────────────────────
-    def update(self):
+    def build_hit_index(self):
+        """The clickable regions: generator rows at the bottom, the shop/upgrades panels above them, the navigation column on top."""
+        index = HitTestIndex()
+        game = index.add_layer("game", z=0)
+        for r in self.generator_list.visible_slots():
+            game.add(r["icon"].frect, r["icon"], lambda g_id=r["item"]: self.generate(g_id))
+            game.add(r["buy"].rect, r["buy"], r["buy"].click)
+        for name, panel in self.panels.items():
+            layer = index.add_layer(name, z=1, block=self.PANEL_RECT, active=self.active_panel == name)
+            for button in panel.get_buttons():
+                layer.add(button.rect, button, button.click)
+        nav = index.add_layer("nav", z=2)
+        for nav_button in self.nav_buttons:
+            nav.add(nav_button.rect, nav_button, nav_button.click)
+        return index
+
+    def scroll(self, pos, rows):
+        """Scrolls the list under the mouse (the open panel's, or the generator rows) by a number of rows."""
+        scroll_list = self.generator_list if self.active_panel is None else self.panels[self.active_panel].rows
+        if not scroll_list.viewport.collidepoint(pos) or not scroll_list.scroll(rows):
+            return False
+        self.hit_index.hover(None) # the slots' buttons now belong to other entries
+        self.hit_index = self.build_hit_index()
+        self.hit_index.hover(pos)
+        self.render_layers.clear() # slots past the end of the catalog come and go
+        if self.active_panel is None:
+            self.rebuild_static_layer() # the generator icons are in it
+        else:
+            self.tutorial_hint.invalidate()
+            self.renderer.invalidate()
+        return True
 
+    def generate(self, g_id):
+        """Clicking a generator's icon starts a cycle by hand."""
+        if g_id not in self.user.managers:
+            ASSETS.get(BUTTON_PRESS_SOUND).play()
+        self.user.manual_generate(g_id)
 
-        mouse = pygame.mouse.get_pos()
-        for r in self.rows:
-            r["buy"].animations(mouse)
-        for nav_button in self.nav_buttons:
-            nav_button.animations(mouse)
-        for r in self.shop_rows:
-            r["btn"].animations(mouse)
-            r["exit_menu_btn"].animations(mouse)
-        for r in self.upgrades_rows:
-            r["btn"].animations(mouse)
-            r["exit_menu_btn"].animations(mouse)
+    # updates ──────────────────────────────────────────────────────────
+    def update(self):
+        pass # hover follows MOUSEMOTION events through the hit-test index, there's nothing to do per frame
 
     # rendering ──────────────────────────────────────────────────────────
+    def get_static_widgets(self):
+        """Widgets that never change, pre-drawn into the static layer. They must sit below every dynamic widget."""
+        widgets = [self.profile_pic_background, self.profile_pic, self.user_name] # the profile picture and name
+        widgets.extend(r["icon"] for r in self.generator_list.visible_slots()) # generator icons and their frames
+        return widgets
+
+    def rebuild_static_layer(self):
+        """Re-composites the static layer, call after the layout changes."""
+        self.renderer.background = self.static_layer.rebuild(self.get_static_widgets())
+        self.tutorial_hint.invalidate() # the buttons it points at may have moved
+        if self.active_panel is not None:
+            self.refresh_underlay(force=True)
+        self.renderer.invalidate()
+
+    def get_base_widgets(self):
+        """The dynamic widgets of the game itself (hud, generator rows, navigation), back to front."""
+        widgets = list(self.hud_elems.values())
+        for r in self.generator_list.visible_slots(): # owned < rev < buy < time_display to ensure correct layering, their icons are in the static layer
+            widgets.extend([r["owned"], r["rev"], r["buy"], r["time_display"]])
+        widgets.extend(self.nav_buttons)
+        return widgets
+
+    def get_render_layers(self):
+        """
+        Every dynamic widget on screen for the active panel, back to front. Built once per panel.
+        With a panel open the game underneath is in the frozen underlay, so only the panel's widgets are listed.
+        """
+        if self.active_panel in self.render_layers:
+            return self.render_layers[self.active_panel]
+        widgets = []
+        if self.active_panel is None:
+            widgets.extend(self.get_base_widgets())
+        else: # a panel: its rows, then its header
+            widgets.extend(self.panels[self.active_panel].get_widgets())
+
+        # the tutorial hints on top of everything else.
+        widgets.append(self.tutorial_hint)
+        self.render_layers[self.active_panel] = widgets
+        return widgets
+
+    def refresh_underlay(self, force=False):
+        """
+        Re-takes the dimmed snapshot of the game under the open panel if anything in it changed,
+        at most every OVERLAY_REFRESH_INTERVAL seconds. Returns the regions of the screen that changed.
+        """
+        if not (force or self.underlay.due()):
+            return []
+        base_widgets = self.get_base_widgets()
+        changed = [rect for rect in (widget.check_dirty() for widget in base_widgets) if rect is not None]
+        if not (force or changed):
+            return []
+        surface = self.static_layer.surface.copy()
+        for widget in base_widgets:
+            widget.draw(surface)
+        self.renderer.background = self.underlay.capture(surface, self.PANEL_RECT)
+        return changed
+
     def render(self):
-        self.screen.blit(game_menu_background, (0,0))
-
-        # draw the hud elements 
-        for element in self.hud_elems.values():
-            element.draw(self.screen)
-
-        # draw the generator rows
-        for r in self.rows: # icon < owned < rev < buy < time_display to ensure correct layering
-            r["icon"].draw(self.screen)
-            r["owned"].draw(self.screen)
-            r["rev"].draw(self.screen)
-            r["buy"].draw(self.screen)
-            r["time_display"].draw(self.screen) # Draw the new time display
-        
-        # draw the profile picture and name
-        self.profile_pic_background.draw(self.screen)
-        self.profile_pic.draw(self.screen)
-        self.user_name.draw(self.screen)
-        
-        # draw the navigation buttons
-        for nav_button in self.nav_buttons:
-            nav_button.draw(self.screen)
-        
-        # draw the shop panel
-        if self.active_panel == "shop":
-            panel_bg = pygame.Surface((1030, SCREEN_HEIGHT), pygame.SRCALPHA)
-            panel_bg.fill((0,0,0,200))
-            self.screen.blit(panel_bg, (175,0))
-            for r in self.shop_rows:
-                r["icon"].draw(self.screen)
-                r["name"].draw(self.screen)
-                r["cost"].draw(self.screen)
-                r["btn"].draw(self.screen)
-                r["money_display"].draw(self.screen)
-                r["income_display"].draw(self.screen)
-                r["menu_name"].draw(self.screen)
-                r["exit_menu_btn"].draw(self.screen)
-            for r in self.shop_row_description.values():
-                r.draw(self.screen)
-        # draw the upgrades panel
-        elif self.active_panel == "upgrades":
-            panel_bg = pygame.Surface((1030, SCREEN_HEIGHT), pygame.SRCALPHA)
-            panel_bg.fill((0,0,0,200))
-            self.screen.blit(panel_bg, (175,0))
-            for r in self.upgrades_rows:
-                r["icon"].draw(self.screen)
-                r["name"].draw(self.screen)
-                r["level"].draw(self.screen)
-                r["price"].draw(self.screen)
-                r["btn"].draw(self.screen)
-                r["money_display"].draw(self.screen)
-                r["income_display"].draw(self.screen)  
-                r["menu_name"].draw(self.screen)
-                # Only draw multiplier if it exists in this row (only first row)
-                if "multiplier" in r:
-                    r["multiplier"].draw(self.screen)
-                r["exit_menu_btn"].draw(self.screen)
-        # draw the tutorial hints on top of everything else.
-        
-        tutorial_progress(self.user, self.screen, self)
-        
-        # flip the display
-        pygame.display.flip()
+        # delivers this frame's model changes (marking the labels showing them stale) and reads the cycle timers,
+        # then redraws only the widgets that changed and pushes those regions to the display
+        self.user.events.dispatch()
+        self.bindings.poll()
+        if self.active_panel is None:
+            self.renderer.render(self.get_render_layers())
+        else:
+            self.renderer.render(self.get_render_layers(), extra_dirty=self.refresh_underlay())
         
+    # panels ─────────────────────────────────────────────────────────────
+    def build_panel_header(self, title, exit_x):
+        """The header shared by every row of a panel: its title, the money and income, and the exit button."""
+        return {
+            "menu_name": CreateFrect(
+                180,
+                20,
+                self.MONEY_DISPLAY_WIDTH,
+                self.money_display_height,
+                bg_colour=LIGHT_BLUE,
+                font=self.title_font,
+                font_colour=WHITE,
+                display=title
+            ),
+            "money_display": CreateFrect(
+                537.5,
+                20,
+                self.MONEY_DISPLAY_WIDTH,
+                self.money_display_height,
+                bg_colour=None,
+                font=self.title_font,
+                font_colour=WHITE,
+                display_callback=self.money_text,
+                glyphs=True
+            ),
+            "income_display": CreateFrect(
+                547.5,
+                100,
+                self.INCOME_DISPLAY_WIDTH,
+                self.income_display_height,
+                bg_colour=None,
+                font=self.subtitle_font,
+                font_colour=WHITE,
+                display_callback=self.income_text,
+                glyphs=True
+            ),
+            "exit_menu_btn": Button(
+                exit_x, 20, 60, 40, "Exit", GRAY, self.row_font, BLACK,
+                callback=lambda: self.open_panel(None),
+                border_radius=15
+            ),
+        }
+
     # shop menu ──────────────────────────────────────────────────────────
     def build_shop_menu(self):
-        rows = []
         y0, row_h = 135, 65  
-        # create the rows for the shop menu
-        for idx, (gid, mproto) in enumerate(MANAGER_PROTOTYPES.items()):
+        # create the row slots for the shop menu, handed a manager each as the list scrolls
+        def build_slot(slot, idx):
             y = y0 + idx*row_h
-            
- 
             icon_y = y + (50 - 45) // 2  
-
-            icon_frect = CreateFrect(
+            slot["icon"] = CreateFrect(
                 200, icon_y, 45, 45, bg_colour=WHITE, 
-                image=self.generator_icons.get(gid),
                 border_radius=10
             )
-
-            name_frect = CreateFrect(
+            slot["name"] = CreateFrect(
                 270, y, 280, 50, bg_colour=BEIGE,
                 font=self.row_font, font_colour=BLACK,
-                display=f"{mproto["name"]}", border_radius=15
+                display="", border_radius=15
             )
-            cost_frect = CreateFrect(
+            slot["cost"] = CreateFrect(
                 570, y, 180, 50, bg_colour=BEIGE,
                 font=self.row_font, font_colour=BLACK,
-                display_callback=lambda mp=mproto: f"${format_large_number(mp["cost"])}", border_radius=15
+                display="", border_radius=15
             )
-            buy_btn = Button(
+            slot["btn"] = Button(
                 770, y, 155, 50, "Buy", GRAY, self.row_font, WHITE,
-                callback=lambda current_gid=gid: self.user.buy_manager(current_gid),
-                display_callback=lambda current_gid=gid, mp=mproto, um=self.user.managers: (
-                    "Owned" if current_gid in um else (
-                        f"Buy" if (current_gid in self.user.generators and self.user.generators[current_gid].amount > 0) 
+                callback=lambda s=slot: self.user.buy_manager(s["item"]),
+                display_callback=self.bindings.bind(lambda s=slot, um=self.user.managers: (
+                    "Owned" if s["item"] in um else (
+                        f"Buy" if (s["item"] in self.user.generators and self.user.generators[s["item"]].amount > 0) 
                         else "Locked"
                     )
-                ), border_radius=15
+                ), "managers", self.slot_key(slot)), border_radius=15
             )
-            exit_menu_btn = Button(
-                1135, 20, 60, 40, "Exit", GRAY, self.row_font, BLACK,
-                callback=lambda: self.open_panel(None),
-                border_radius=15
-            )
-            menu_name = CreateFrect(
-                180,
-                20,
-                self.MONEY_DISPLAY_WIDTH,
-                self.money_display_height,
-                bg_colour=LIGHT_BLUE,
-                font=self.title_font,
-                font_colour=WHITE,
-                display="Managers"
-            )
-            money_display = CreateFrect(
-                    537.5,
-                    20,
-                    self.MONEY_DISPLAY_WIDTH,
-                    self.money_display_height,
-                    bg_colour=None,
-                    font=self.title_font,
-                    font_colour=WHITE,
-                    display_callback=lambda: f"${format_large_number(round(self.user.money))}"
-                )
-            income_display = CreateFrect(
-                547.5,
-                100,
-                self.INCOME_DISPLAY_WIDTH,
-                self.income_display_height,
-                bg_colour=None,
-                font=self.subtitle_font,
-                font_colour=WHITE,
-                display_callback=lambda: f"{format_large_number(self.user.income_per_second)}/s (avg revenue)"
-            )
-            row_data = {
-                "icon": icon_frect,
-                "name": name_frect,
-                "cost": cost_frect,
-                "btn": buy_btn,
-                "menu_name": menu_name,
-                "money_display": money_display,
-                "income_display": income_display,
-                "exit_menu_btn": exit_menu_btn
-            }
-            rows.append(row_data)
-    
-        return rows  # return the list of rows for the shop menu
+
+        def assign_slot(slot, gid):
+            self.bindings.invalidate(self.slot_key(slot))
+            if gid is not None:
+                mproto = MANAGER_PROTOTYPES[gid]
+                slot["icon"].image = self.get_generator_icon(gid)
+                slot["name"].display = f"{mproto["name"]}"
+                slot["cost"].display = f"${format_large_number(mproto["cost"])}"
+
+        rows = VirtualList(MANAGER_PROTOTYPES, pygame.Rect(self.PANEL_RECT.left, y0, self.PANEL_RECT.width, SCREEN_HEIGHT - y0), row_h, build_slot, assign_slot)
+        header = self.build_panel_header("Managers", exit_x=1135)
+        header.update(self.build_shop_description())
+        return Panel("shop", header, rows)
     
     def build_shop_description(self):
         description_row = {
@@ -584,118 +692,68 @@ class GameMenu:
         return description_row  # return the description row for the shop menu
     
     def build_upgrades_panel(self):
-        rows = []
         y0, row_h = 135, 65 
         x_start = 270
         
-        # Create the single x10 multiplier header at the top
-        multiplier = CreateFrect(
-            x_start + 700,  # Align with buy buttons
-            100,             
-            140,            
-            25,         
-            bg_colour=LIGHT_BLUE,
-            font=self.row_font,
-            font_colour=WHITE, 
-            display="x10 multiplier",
-            border_radius=15
-        )
-        
-        for idx, (gid, proto) in enumerate(GENERATOR_PROTOTYPES.items()):
+        def build_slot(slot, idx):
             y = y0 + idx * row_h
-            self.user.ensure_generator(gid)
-            generator_obj = self.user.generators[gid]
-            
-
             icon_y = y + (50 - 45) // 2 
-            icon_frect = CreateFrect(
+            slot["icon"] = CreateFrect(
                 200, icon_y, 45, 45, bg_colour=BLACK, 
-                image=self.generator_icons.get(gid),
                 border_radius=10
             )
 
-            name_frect = CreateFrect(
+            slot["name"] = CreateFrect(
                 x_start, y, 280, 50, bg_colour=BEIGE,
                 font=self.row_font, font_colour=BLACK,
-                display=f"{proto['name']}", border_radius=15
+                display="", border_radius=15
             )
 
-            multiplier_display = CreateFrect(
+            slot["level"] = CreateFrect(
                 x_start + 300, y, 140, 50, bg_colour=BEIGE,
                 font=self.row_font, font_colour=BLACK,
-                display_callback=lambda g=generator_obj: f"x{format_large_number(g.level * g.revenue_multiplier)}",
+                display_callback=self.bindings.bind(lambda s=slot: f"x{format_large_number(self.generator_for(s['item']).level * self.generator_for(s['item']).revenue_multiplier)}",
+                                                    self.slot_key(slot), "levels"),
                 border_radius=15
             )
 
-            price_frect = CreateFrect(
+            slot["price"] = CreateFrect(
                 x_start + 460, y, 220, 50, bg_colour=BEIGE,
                 font=self.row_font, font_colour=BLACK,
-                display_callback=lambda g=generator_obj: f"${format_large_number(g.get_next_revenue_multiplier_price())}",
+                display_callback=self.bindings.bind(lambda s=slot: f"${format_large_number(self.generator_for(s['item']).get_next_revenue_multiplier_price())}",
+                                                    self.slot_key(slot)),
                 border_radius=15
             )
 
-            buy_multiplier = Button(
+            slot["btn"] = Button(
                 x_start + 700, y, 140, 50, "Buy x10", GRAY, self.row_font, WHITE,
-                callback=lambda current_gid=gid, g=generator_obj: self.user.buy_generator_revenue_multiplier(current_gid) if g.id in self.user.generators else None,
-                display_callback=lambda g=generator_obj: "Buy x10" if ((g.id in self.user.generators and self.user.generators[g.id].amount > 0)) else "Locked",
+                callback=lambda s=slot: self.user.buy_generator_revenue_multiplier(s["item"]) if s["item"] in self.user.generators else None,
+                display_callback=self.bindings.bind(lambda s=slot: "Buy x10" if ((s["item"] in self.user.generators and self.user.generators[s["item"]].amount > 0)) else "Locked",
+                                                    self.slot_key(slot)),
                 border_radius=15
             )
 
-            menu_name = CreateFrect(
-                180,
-                20,
-                self.MONEY_DISPLAY_WIDTH,
-                self.money_display_height,
-                bg_colour=LIGHT_BLUE,
-                font=self.title_font,
-                font_colour=WHITE,
-                display="Upgrades"
-            )
+        def assign_slot(slot, gid):
+            self.bindings.invalidate(self.slot_key(slot))
+            if gid is not None:
+                slot["icon"].image = self.get_generator_icon(gid)
+                slot["name"].display = f"{GENERATOR_PROTOTYPES[gid]['name']}"
 
-            money_display = CreateFrect(
-                537.5,
-                20,
-                self.MONEY_DISPLAY_WIDTH,
-                self.money_display_height,
-                bg_colour=None,
-                font=self.title_font,
-                font_colour=WHITE,
-                display_callback=lambda: f"${format_large_number(round(self.user.money))}"
-            )
-
-            income_display = CreateFrect(
-                x=547.5,
-                y=100,
-                width=self.INCOME_DISPLAY_WIDTH,
-                height=self.income_display_height,
-                bg_colour=None,
-                font=self.subtitle_font,
-                font_colour=WHITE, 
-                display_callback=lambda: f"{format_large_number(self.user.income_per_second)}/s (avg revenue)"
-            )
-            exit_menu_btn = Button(
-                1100, 20, 60, 40, "Exit", GRAY, self.row_font, BLACK,
-                callback=lambda: self.open_panel(None),
-                border_radius=15
-            )
-
-            row_data = {
-                "name": name_frect,
-                "level": multiplier_display,
-                "price": price_frect,
-                "btn": buy_multiplier,
-                "menu_name": menu_name,
-                "money_display": money_display,
-                "income_display": income_display,
-                "exit_menu_btn": exit_menu_btn,
-                "icon": icon_frect, 
-            }
-            # Add the multiplier only to the first row
-            if idx == 0:
-                row_data["multiplier"] = multiplier
-                
-            rows.append(row_data)
-        return rows
+        rows = VirtualList(GENERATOR_PROTOTYPES, pygame.Rect(self.PANEL_RECT.left, y0, self.PANEL_RECT.width, SCREEN_HEIGHT - y0), row_h, build_slot, assign_slot)
+        header = self.build_panel_header("Upgrades", exit_x=1100)
+        # the x10 multiplier label above the buy buttons
+        header["multiplier"] = CreateFrect(
+            x_start + 700,  # Align with buy buttons
+            100,             
+            140,            
+            25,         
+            bg_colour=LIGHT_BLUE,
+            font=self.row_font,
+            font_colour=WHITE, 
+            display="x10 multiplier",
+            border_radius=15
+        )
+        return Panel("upgrades", header, rows)
     
     # other def ──────────────────────────────────────────────────────────
 
@@ -703,6 +761,14 @@ class GameMenu:
         # if the panel is already open, close it
         # if the panel is not open, open it
         self.active_panel = name if self.active_panel != name else None 
+        for panel in ("shop", "upgrades"):
+            self.hit_index.set_active(panel, self.active_panel == panel)
+        self.hit_index.hover(pygame.mouse.get_pos()) # the mouse may now be over a different layer
+        if self.active_panel is None:
+            self.renderer.background = self.static_layer.surface
+        else:
+            self.refresh_underlay(force=True) # snapshot and dim the game once, the panel is drawn over it
+        self.renderer.invalidate() # everything under the panel changes
         return True # event handled
 
     def open_settings_panel(self): 
@@ -722,12 +788,12 @@ class SettingsMenu:
         self.state_manager = state_manager
         self.music_player = music_player
         self.font = DEFAULT_FONT
-        self.title_font = pygame.font.Font(LOGO_FONT, 28) 
-        self.item_font = pygame.font.Font(LOGO_FONT, 22) 
+        self.title_font = get_font(LOGO_FONT, 28) 
+        self.item_font = get_font(LOGO_FONT, 22) 
         self.volume_step = 0.05 
         self.pass_back = pass_back
-
-
+        self.underlay = FrozenUnderlay(refresh_interval=None) # the game is frozen while the menu is open
+        self.card = CreateFrect(150, 30, SCREEN_WIDTH - 300, SCREEN_HEIGHT - 60, bg_colour=LIGHT_BLUE, border_radius=20) # the menu's background over the game
 
         self.buttons = []
         self.display_elements = {} 
@@ -737,6 +803,29 @@ class SettingsMenu:
         
         self.display_elements = self.create_display_elements()
         self.buttons = self.create_buttons()
+        self.hit_index = HitTestIndex.for_buttons(self.buttons) # what gets a click
+        self.build_layers(list(self.display_elements.values()) + self.buttons)
+
+    def build_layers(self, widgets):
+        """Pre-draws the static widgets into the static layer, the rest are drawn by the renderer each frame."""
+        self.static_widgets = [w for w in widgets if w.is_static()]
+        self.static_layer = StaticLayer(fill_colour=LIGHT_BLUE, widgets=self.static_widgets)
+        self.dynamic_widgets = [w for w in widgets if not w.is_static()]
+        self.renderer = make_renderer(self.screen, self.static_layer.surface)
+
+    def set_underlay(self, source):
+        """
+        Opened from the game, the menu is drawn on a card over a frozen, dimmed copy of the game (source, the screen as it was left);
+        otherwise (source None) on a plain background. The copy is taken once, on entering.
+        """
+        if source is None:
+            self.underlay.clear()
+            self.static_layer.background = None
+            widgets = self.static_widgets
+        else:
+            self.static_layer.background = self.underlay.capture(source)
+            widgets = [self.card] + self.static_widgets
+        self.renderer.background = self.static_layer.rebuild(widgets)
 
     def create_display_elements(self):
         elements = {}
@@ -875,29 +964,19 @@ class SettingsMenu:
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                for btn in self.buttons:
-                    if btn.is_hovered(pos):
-                        btn.click()
+                self.hit_index.click(event.pos)
+            elif event.type == pygame.MOUSEMOTION:
+                self.hit_index.hover(event.pos)
+            elif event.type == pygame.WINDOWLEAVE:
+                self.hit_index.hover(None)
         return True
 
     def update(self):
-        pos = pygame.mouse.get_pos()
-        for btn in self.buttons:
-            btn.animations(pos)
+        pass # hover follows MOUSEMOTION events through the hit-test index, there's nothing to do per frame
 
     def render(self):
-        self.screen.fill(LIGHT_BLUE)
-        
-        # Draw all display elements
-        for element in self.display_elements.values():
-            element.draw(self.screen)
-
-        # Draw all buttons
-        for btn in self.buttons:
-            btn.draw(self.screen)
-            
-        pygame.display.flip()
+        # the titles and labels are in the static layer, only the buttons and now playing/volume displays are drawn
+        self.renderer.render(self.dynamic_widgets)
         
 
 class HelpMenu: # menu for help topics, methods are all self-explanatory
@@ -906,8 +985,8 @@ class HelpMenu: # menu for help topics, methods are all self-explanatory
         self.user = user
         self.state_manager = state_manager
         self.font = DEFAULT_FONT
-        self.title_font = pygame.font.Font(LOGO_FONT, 48)
-        self.item_font = pygame.font.Font(LOGO_FONT, 28)
+        self.title_font = get_font(LOGO_FONT, 48)
+        self.item_font = get_font(LOGO_FONT, 28)
         self.pass_back = pass_back
         self.buttons = []
         self.display_elements = {}
@@ -916,6 +995,9 @@ class HelpMenu: # menu for help topics, methods are all self-explanatory
     def setup_ui(self):
         self.display_elements = self.create_display_elements()
         self.buttons = self.create_buttons()
+        self.hit_index = HitTestIndex.for_buttons(self.buttons) # what gets a click
+        self.static_layer = StaticLayer(fill_colour=LIGHT_BLUE, widgets=self.display_elements.values()) # the title never changes
+        self.renderer = make_renderer(self.screen, self.static_layer.surface)
 
     def create_display_elements(self):
         elements = {}
@@ -967,29 +1049,27 @@ class HelpMenu: # menu for help topics, methods are all self-explanatory
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                for btn in self.buttons:
-                    if btn.is_hovered(pos):
-                        btn.click()
+                self.hit_index.click(event.pos)
+            elif event.type == pygame.MOUSEMOTION:
+                self.hit_index.hover(event.pos)
+            elif event.type == pygame.WINDOWLEAVE:
+                self.hit_index.hover(None)
         return True
 
     def update(self):
-        pos = pygame.mouse.get_pos()
-        for btn in self.buttons:
-            btn.animations(pos)
+        pass # hover follows MOUSEMOTION events through the hit-test index, there's nothing to do per frame
 
     def render(self):
-        self.screen.fill(LIGHT_BLUE)
-        for element in self.display_elements.values():
-            element.draw(self.screen)
-        for btn in self.buttons:
-            btn.draw(self.screen)
-        pygame.display.flip()
+        self.renderer.render(self.buttons)
     
     
 
 
 class HelpDetailMenu: # menu for help topics, methods are all self-explanatory
+    X_MARGIN = 50
+    TEXT_VIEWPORT = pygame.Rect(0, 80, SCREEN_WIDTH, SCREEN_HEIGHT - 190) # between the title and the back button, the text scrolls inside it
+    SCROLL_STEP = 40 # pixels per notch of the mouse wheel
+
     def __init__(self, screen, user, state_manager, topic=None, original_state=None):
         self.screen = screen
         self.user = user
@@ -997,32 +1077,40 @@ class HelpDetailMenu: # menu for help topics, methods are all self-explanatory
         self.topic = topic
         self.original_state = original_state
         
-        self.title_font = pygame.font.Font(LOGO_FONT, 36)
-        self.header_font = pygame.font.Font(LOGO_FONT, 28)
-        self.body_font = pygame.font.Font(LOGO_FONT, 20)
+        self.title_font = get_font(LOGO_FONT, 36)
+        self.header_font = get_font(LOGO_FONT, 28)
+        self.body_font = get_font(LOGO_FONT, 20)
         
         self.buttons = []
         self.display_elements = []
-        self.text_elements = []
+        self.pages = {} # (topic, width) -> TextPage, laid out the first time the topic is opened
+        self.page = None
+        self.scroll = 0 # pixels the text is scrolled down
         self.setup_ui()
 
     def setup_ui(self):
-        self.display_elements, self.text_elements = self.create_display_elements()
+        self.display_elements, self.page = self.create_display_elements()
+        self.scroll = 0
         self.buttons = self.create_buttons()
-
-    def wrap_text(self, text, font, max_width):
-        words = text.split(' ')
-        lines = []
-        current_line = ''
-        for word in words: # add the word to the current line
-            test_line = current_line + word + ' ' # add the word to the current line
-            if font.size(test_line)[0] < max_width: # if the line is less than the max width, add the word to the current line
-                current_line = test_line
-            else:
-                lines.append(current_line) # if the line is greater than the max width, add the current line to the lines list
-                current_line = word + ' ' # reset the current line to the word
-        lines.append(current_line) # add the last line to the lines list
-        return lines
+        self.hit_index = HitTestIndex.for_buttons(self.buttons) # what gets a click
+        # the title and the visible lines of help text are pre-drawn, only the back button is drawn each frame
+        self.static_layer = StaticLayer(fill_colour=LIGHT_BLUE, widgets=self.display_elements, blits=self.visible_text())
+        self.renderer = make_renderer(self.screen, self.static_layer.surface)
+
+    def visible_text(self):
+        return self.page.blits(self.TEXT_VIEWPORT, self.scroll) if self.page else []
+
+    def scroll_text(self, pixels):
+        """Scrolls the help text, clamped to its length. Only the lines in view are re-drawn into the static layer."""
+        if self.page is None:
+            return False
+        scroll = min(max(self.scroll + pixels, 0), self.page.max_scroll(self.TEXT_VIEWPORT))
+        if scroll == self.scroll:
+            return False
+        self.scroll = scroll
+        self.renderer.background = self.static_layer.rebuild(blits=self.visible_text())
+        self.renderer.invalidate()
+        return True
 
     def get_help_content(self):
         content = {
@@ -1051,25 +1139,25 @@ class HelpDetailMenu: # menu for help topics, methods are all self-explanatory
         return content.get(self.topic, []) # type: ignore # return the help content for the topic, or an empty list if no topic is provided
 
     def create_display_elements(self):
+        """The title, and the topic's text laid out into a TextPage (cached per topic and width, so re-opening a topic is free)."""
         display_elements = []
-        text_elements = []
         if not self.topic:
-            return display_elements, text_elements
+            return display_elements, None
 
-        x_margin = 50
-        y_start = 20
-        y_step = 25
-        y_step_header = 35
-        y_title_height = 60
-        
-        current_y = y_start
-        
-        title_frect = CreateFrect(0, current_y, SCREEN_WIDTH, 50, None, font=self.title_font, font_colour=BLACK, display=self.topic)
+        title_frect = CreateFrect(0, 20, SCREEN_WIDTH, 50, None, font=self.title_font, font_colour=BLACK, display=self.topic)
         display_elements.append(title_frect)
-        current_y += y_title_height
 
-        help_content = self.get_help_content()
-        
+        width = SCREEN_WIDTH - 2 * self.X_MARGIN # wrap the text to the width of the screen
+        page = self.pages.get((self.topic, width))
+        if page is None:
+            page = self.pages[(self.topic, width)] = self.layout_page(self.get_help_content(), width)
+        return display_elements, page
+
+    def layout_page(self, help_content, width):
+        y_step = 25
+        y_step_header = 35
+        lines = []
+        current_y = 0 # from the top of the text viewport
         for item in help_content: # loop through each item in the help content
             if item['type'] == 'header':
                 font = self.header_font
@@ -1081,17 +1169,14 @@ class HelpDetailMenu: # menu for help topics, methods are all self-explanatory
                 colour = BLACK
                 y_increment = y_step
 
-            lines = self.wrap_text(item['text'], font, SCREEN_WIDTH - 2 * x_margin) # wrap the text to the width of the screen
-            for line in lines: # loop through each line and add it to the text elements
-                text_surf = font.render(line, True, colour)
-                text_rect = text_surf.get_rect(midleft=(x_margin, current_y + y_increment / 2))
-                text_elements.append((text_surf, text_rect))
+            for text_surf in TEXT_LAYOUT.paragraph(item['text'], font, colour, width): # wrapped and rendered once per font and width
+                lines.append((text_surf, text_surf.get_rect(midleft=(self.X_MARGIN, current_y + y_increment / 2))))
                 current_y += y_increment
             
             if item['type'] == 'header': # add a small gap between headers
                 current_y += 5
 
-        return display_elements, text_elements
+        return TextPage(lines, current_y)
         
     def create_buttons(self):
         buttons = []
@@ -1114,29 +1199,19 @@ class HelpDetailMenu: # menu for help topics, methods are all self-explanatory
                     SaveStates.save_all(self.user, self.state_manager.music_player)
                 pygame.quit()
                 sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                for btn in self.buttons:
-                    if btn.is_hovered(pos):
-                        btn.click()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT: # the wheel also sends button presses
+                self.hit_index.click(event.pos)
+            elif event.type == pygame.MOUSEWHEEL:
+                self.scroll_text(-event.y * self.SCROLL_STEP)
+            elif event.type == pygame.MOUSEMOTION:
+                self.hit_index.hover(event.pos)
+            elif event.type == pygame.WINDOWLEAVE:
+                self.hit_index.hover(None)
         return True
 
     def update(self):
-        pos = pygame.mouse.get_pos()
-        for btn in self.buttons:
-            btn.animations(pos)
+        pass # hover follows MOUSEMOTION events through the hit-test index, there's nothing to do per frame
 
     def render(self):
-        self.screen.fill(LIGHT_BLUE)
-        
-        for element in self.display_elements:
-            element.draw(self.screen)
-
-        for surf, rect in self.text_elements:
-            self.screen.blit(surf, rect)
-
-        for btn in self.buttons:
-            btn.draw(self.screen)
-            
-        pygame.display.flip()
+        self.renderer.render(self.buttons)
 
@@ -0,0 +1,116 @@
+import pygame
+from game_constants import *
+
+
+class HitRegion:
+    """A clickable area: the widget it belongs to (for hover) and what a click on it does."""
+    __slots__ = ("rect", "target", "on_click")
+
+    def __init__(self, rect, target=None, on_click=None):
+        self.rect = pygame.FRect(rect)
+        self.target = target
+        self.on_click = on_click
+
+
+class HitLayer:
+    """
+    One z-order layer of regions, bucketed into a uniform grid of cells so a lookup only tests the few regions
+    in the cell under the point. A layer with a block rect (a panel) swallows clicks on its empty space,
+    so nothing underneath it gets them.
+    """
+    def __init__(self, name, z=0, block=None, active=True, cell_size=HIT_TEST_CELL_SIZE):
+        self.name = name
+        self.z = z
+        self.block = HitRegion(block) if block is not None else None # region returned for clicks on the layer's empty space
+        self.active = active
+        self.cell_size = cell_size
+        self.cells = {} # (column, row) -> regions overlapping that cell, in the order they were added (last is on top)
+
+    def add(self, rect, target=None, on_click=None):
+        region = HitRegion(rect, target, on_click)
+        for cell in self.cells_for(region.rect):
+            self.cells.setdefault(cell, []).append(region)
+        return region
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        for column in range(int(rect.left // size), int((rect.right - 1) // size) + 1):
+            for row in range(int(rect.top // size), int((rect.bottom - 1) // size) + 1):
+                yield column, row
+
+    def clear(self):
+        self.cells.clear()
+
+    def hit(self, pos):
+        cell = (int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
+        for region in reversed(self.cells.get(cell, ())): # topmost first
+            if region.rect.collidepoint(pos):
+                return region
+        if self.block is not None and self.block.rect.collidepoint(pos):
+            return self.block
+        return None
+
+
+class HitTestIndex:
+    """
+    A state's clickable regions, in layers ordered by z (e.g. the game, an open panel above it, the navigation column on top).
+    hit(pos) returns the region under the point in the topmost active layer that has one, or None.
+    """
+    def __init__(self, cell_size=HIT_TEST_CELL_SIZE):
+        self.cell_size = cell_size
+        self.layers = [] # highest z first
+        self.by_name = {}
+        self.hovered = None # widget under the mouse, see hover()
+
+    def add_layer(self, name, z=0, block=None, active=True):
+        layer = HitLayer(name, z, block, active, self.cell_size)
+        self.layers.append(layer)
+        self.layers.sort(key=lambda l: -l.z) # stable, so layers added later with the same z stay below
+        self.by_name[name] = layer
+        return layer
+
+    def layer(self, name):
+        return self.by_name[name]
+
+    def set_active(self, name, active):
+        self.by_name[name].active = active
+
+    def hit(self, pos):
+        for layer in self.layers:
+            if layer.active:
+                region = layer.hit(pos)
+                if region is not None:
+                    return region
+        return None
+
+    def click(self, pos):
+        """Clicks whatever is under pos. Returns the region that got the click (None if nothing did)."""
+        region = self.hit(pos)
+        if region is not None and region.on_click is not None:
+            region.on_click()
+        return region
+
+    def hover(self, pos):
+        """
+        Moves the hover to the widget under pos (None when the mouse left the window), driven by MOUSEMOTION.
+        Only the widget left and the widget entered are touched. Returns True if the hover changed.
+        """
+        region = self.hit(pos) if pos is not None else None
+        target = region.target if region is not None else None
+        if target is self.hovered:
+            return False
+        if self.hovered is not None and hasattr(self.hovered, "set_hovered"):
+            self.hovered.set_hovered(False)
+        if target is not None and hasattr(target, "set_hovered"):
+            target.set_hovered(True)
+        self.hovered = target
+        return True
+
+    @classmethod
+    def for_buttons(cls, buttons):
+        """An index with a single layer holding the given buttons, for screens that are just a list of buttons."""
+        index = cls()
+        layer = index.add_layer("buttons")
+        for button in buttons:
+            layer.add(button.rect, button, button.click)
+        return index
@@ -6,8 +6,11 @@ from ui_elements import *  # Import UI classes
 from game_states import *  # Import game states
 from save_loads import *  # Import save/load functions
 from utils import Music, simulate_offline_progress 
+from stats_client import StatsClient
+from frame_pacing import FramePacer
 
-# Import sys and time
+# Import os, sys and time
+import os
 import sys 
 import time
 
@@ -36,16 +39,24 @@ except Exception as e:
     print(Exception, e) if DEBUG_MODE else None
     music_player = Music(0.50) 
 
+# Leaderboard/stats uploads run on their own thread, record() below only queues snapshots. Off unless a server is set
+stats_client = None
+if STATS_SERVER_URL:
+    stats_queue_path = os.path.join(os.path.dirname(SaveStates.get_path()), STATS_QUEUE_FILE_NAME)
+    stats_client = StatsClient(STATS_SERVER_URL, queue_path=stats_queue_path, clock=lambda: timecontroller.now().timestamp())
+
 # Screen set up
 state_manager = StateManager(screen, user, music_player) # Pass music_player
-pygame.display.set_caption(f"Idle Tutor Tycoon - {GAME_TITLE}")
+set_window_title(f"Idle Tutor Tycoon - {GAME_TITLE}")
    
 # Initialise debug variables
 next_debug = 0 
+next_evict = 0 # pygame time of the next evict_idle() check
 count = 1
 
 # Main loop
 clock = pygame.time.Clock() # initialise clock 
+pacer = FramePacer() # full rate while playing, slower when idle, minimized or unfocused
 last_time = pygame.time.get_ticks() / 1000
 while True:
     events = pygame.event.get() 
@@ -56,24 +67,38 @@ while True:
         last_time = now
         user.update(dt)  
         
+        pacer.handle_events(events)
         current_state.handle_events(events) # type: ignore
         current_state.update() # type: ignore
-        current_state.render() # type: ignore
+        if pacer.take_exposed() and hasattr(current_state, 'renderer'):
+            current_state.renderer.invalidate() # the window was minimized or covered, draw all of it again
+        if pacer.should_render():
+            current_state.render() # type: ignore
     except Exception as e:
         print(e) if DEBUG_MODE else None
         print(f"\n\n(≧ヘ≦ ) No current screen found, exiting game. (≧ヘ≦ ) ") if DEBUG_MODE else None
         SaveStates.save_all(user, music_player)
+        if TEXTURE_DISPLAY is not None:
+            TEXTURE_DISPLAY.close() # textures, renderer, then windows, while SDL is still up
         pygame.quit()
         sys.exit()
 
+    user.events.dispatch() # deliver this frame's model changes (coalesced) to their listeners
     music_player.update() # update music player
+    state_manager.prewarm_step() # build one not yet visited state per frame, once the main menu is up
+    if now >= next_evict:
+        state_manager.evict_idle() # drop menus nobody has opened in a while
+        next_evict = now + STATE_EVICT_AFTER / 10
+    if stats_client:
+        stats_client.record(user) # never blocks, snapshots are uploaded in the background
 
     if DEBUG_MODE:
         now = time.time()
         if now >= next_debug:
             print(f"\n\n (づ｡◕‿‿◕｡)づ #{count} New debug info: \n")
             user.debug_generators()
+            print(f"Frame pacing: {pacer.stats()}")
             next_debug = now + 10 # Use the initialised next_debug
             count += 1            # Use the initialised count
         
-    clock.tick(FPS)
+    pacer.tick(clock)
@@ -0,0 +1,143 @@
+import os
+import pygame
+from collections import OrderedDict
+
+
+class FontRegistry:
+    """
+    Every font face the game uses, loaded once and shared, keyed on (path, size, style).
+    Each screen used to open and parse the same .ttf for its own Font objects; sharing them also means
+    the text cache and glyph atlases (keyed on the font object) are shared between screens.
+    """
+    def __init__(self):
+        self.fonts = {} # (path, size, bold, italic, underline) -> pygame.font.Font
+        self.uses = {} # same key -> number of times it was asked for
+
+    def get(self, path, size, bold=False, italic=False, underline=False):
+        key = (os.path.abspath(path) if path else None, size, bold, italic, underline) # None = pygame's default font
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(path, size)
+            font.bold, font.italic, font.underline = bold, italic, underline
+        self.uses[key] = self.uses.get(key, 0) + 1
+        return font
+
+    def stats(self):
+        """Per face: how often it was asked for, the size of its font file, and the text surfaces/glyphs cached for it."""
+        faces = {}
+        for key, font in self.fonts.items():
+            path, size, bold, italic, underline = key
+            text_surfaces = [surface for (cached_font, *_), surface in TEXT_CACHE.surfaces.items() if cached_font is font]
+            glyphs = sum(len(atlas.glyphs) for (atlas_font, _), atlas in GLYPH_ATLASES.items() if atlas_font is font)
+            faces[f"{os.path.basename(path) if path else 'default'} {size}{' bold' if bold else ''}{' italic' if italic else ''}{' underline' if underline else ''}"] = {
+                "uses": self.uses.get(key, 0),
+                "file_bytes": os.path.getsize(path) if path and os.path.exists(path) else 0,
+                "text_surfaces": len(text_surfaces),
+                "text_bytes": sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface in text_surfaces),
+                "glyphs": glyphs,
+            }
+        return {"faces": len(self.fonts), "uses": sum(self.uses.values()), "by_face": faces}
+
+
+FONTS = FontRegistry() # shared by every screen
+
+def get_font(path, size, bold=False, italic=False, underline=False):
+    """The shared Font for this face, loaded the first time it's asked for. Never change its style, ask for a styled face instead."""
+    return FONTS.get(path, size, bold, italic, underline)
+
+
+class TextCache:
+    """
+    A shared least-recently-used cache of rendered text surfaces, keyed on (font, text, colour).
+    Most labels never change ("Buy", generator names, "x10 multiplier"), so rendering them
+    every frame was wasted work; with the cache a static label costs one blit.
+    The surfaces are shared between every caller, so they must never be drawn onto or modified.
+    """
+    def __init__(self, max_size=512):
+        self.max_size = max_size # number of surfaces kept before the least recently used is evicted
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour, antialias=True):
+        """Drop-in replacement for font.render(text, antialias, colour) that reuses earlier results."""
+        key = (font, text, tuple(colour), antialias) # tuple() as pygame.Color isn't hashable
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key) # mark as most recently used
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # evict the least recently used
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"size": len(self.surfaces), "max_size": self.max_size, "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+TEXT_CACHE = TextCache() # shared by every CreateFrect and Button
+
+
+# Characters that numeric labels are made of: digits, format_large_number suffixes, "$", ".", "s" and "/"
+NUMERIC_GLYPHS = "0123456789$.,/%+-xe sKMBTQaiSpOocNDdUVgv"
+
+class GlyphAtlas:
+    """
+    Pre-rendered glyphs for one font and colour, used to compose labels that change every frame
+    (money, owned counts, countdowns) where a whole-string cache would never hit.
+    Each glyph is rendered once; a label is then drawn by blitting its glyphs side by side.
+    Characters outside the pre-rendered set are rendered and added the first time they are used.
+    """
+    def __init__(self, font, colour, charset=NUMERIC_GLYPHS):
+        self.font = font
+        self.colour = tuple(colour)
+        self.height = font.get_height()
+        self.glyphs = {} # character -> surface
+        for char in charset:
+            self.add_glyph(char)
+
+    def add_glyph(self, char):
+        surface = self.font.render(char, True, self.colour)
+        self.glyphs[char] = surface
+        return surface
+
+    def get_glyph(self, char):
+        surface = self.glyphs.get(char)
+        return surface if surface is not None else self.add_glyph(char)
+
+    def size(self, text):
+        """Width and height of the composed label, like font.size()."""
+        return sum(self.get_glyph(char).get_width() for char in text), self.height
+
+    def blit(self, screen, text, pos):
+        """Draws the label with its top left corner at pos. Returns the rect that was drawn over."""
+        x, y = pos
+        start_x = x
+        for char in text:
+            glyph = self.get_glyph(char)
+            screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return pygame.Rect(start_x, y, x - start_x, self.height)
+
+
+GLYPH_ATLASES = {} # (font, colour) -> GlyphAtlas, shared by every label using the same font and colour
+
+def get_glyph_atlas(font, colour):
+    key = (font, tuple(colour))
+    atlas = GLYPH_ATLASES.get(key)
+    if atlas is None:
+        atlas = GLYPH_ATLASES[key] = GlyphAtlas(font, colour)
+    return atlas
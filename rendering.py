@@ -0,0 +1,187 @@
+import time
+import pygame
+from game_constants import *
+from texture_rendering import TextureRenderer
+
+
+def merge_rects(rects):
+    """Merges overlapping rects so no area is redrawn twice in a frame."""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        changed = True
+        while changed: # keep absorbing until the rect no longer touches anything already merged
+            changed = False
+            for other in merged:
+                if rect.colliderect(other):
+                    merged.remove(other)
+                    rect.union_ip(other)
+                    changed = True
+                    break
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectRenderer:
+    """
+    Redraws only the parts of the screen whose widgets changed since the last frame.
+    Each frame the widgets (ui_elements.Widget, in back-to-front order) are asked whether their visual output changed;
+    the changed regions are restored from the background, every widget overlapping them is redrawn clipped to the region,
+    and only those regions are pushed to the display with pygame.display.update(rects).
+    A full redraw (background, every widget, display.flip) happens after invalidate(), e.g. when the state is entered or a panel opens.
+    """
+    def __init__(self, screen, background, enabled=DIRTY_RECT_RENDERING, debug=DEBUG_DIRTY_RECTS):
+        self.screen = screen
+        self.background = background # surface the dirty regions are restored from
+        self.enabled = enabled # False = always do a full redraw, the old path, kept for comparisons
+        self.debug = debug # outline the redrawn regions
+        self.full_redraw = True
+        self.debug_rects = [] # outlines drawn last frame that need erasing
+        self.stats = {"full_frames": 0, "full_seconds": 0.0, "dirty_frames": 0, "dirty_seconds": 0.0, "rects_pushed": 0, "pixels_pushed": 0}
+
+    def invalidate(self):
+        """Forces a full redraw next frame (the screen was drawn over by something else, or the layout changed)."""
+        self.full_redraw = True
+
+    def render(self, widgets, extra_dirty=()):
+        """
+        Draws a frame and returns the list of rects pushed to the display (the whole screen for a full redraw).
+        extra_dirty are regions to restore even if no widget changed there, e.g. where the background was replaced.
+        """
+        start = time.perf_counter()
+        if self.full_redraw or not self.enabled:
+            for widget in widgets:
+                widget.check_dirty() # record what is being drawn so the next frame can compare against it
+            self.screen.blit(self.background, (0, 0))
+            for widget in widgets:
+                widget.draw(self.screen)
+            pygame.display.flip()
+            self.full_redraw = False
+            self.debug_rects = []
+            self.stats["full_frames"] += 1
+            self.stats["full_seconds"] += time.perf_counter() - start
+            return [self.screen.get_rect()]
+
+        dirty = [rect for rect in (widget.check_dirty() for widget in widgets) if rect is not None]
+        screen_rect = self.screen.get_rect()
+        regions = [rect.clip(screen_rect) for rect in merge_rects(dirty + list(extra_dirty) + self.debug_rects)]
+        regions = [rect for rect in regions if rect.width > 0 and rect.height > 0]
+        for region in regions:
+            self.redraw_region(region, widgets)
+        if self.debug:
+            for rect in dirty:
+                pygame.draw.rect(self.screen, RED, rect.clip(screen_rect), 1)
+            self.debug_rects = dirty # erased next frame
+        if regions:
+            pygame.display.update(regions)
+        self.stats["dirty_frames"] += 1
+        self.stats["dirty_seconds"] += time.perf_counter() - start
+        self.stats["rects_pushed"] += len(regions)
+        self.stats["pixels_pushed"] += sum(rect.width * rect.height for rect in regions)
+        return regions
+
+    def redraw_region(self, region, widgets):
+        """Restores one region from the background and redraws every widget overlapping it, in order."""
+        self.screen.set_clip(region)
+        self.screen.blit(self.background, region, region)
+        for widget in widgets:
+            if widget.drawn_bounds is not None and widget.drawn_bounds.colliderect(region):
+                widget.draw(self.screen)
+        self.screen.set_clip(None)
+
+    def frame_costs(self):
+        """Average milliseconds per full-redraw frame and per dirty-rect frame, for comparing the two paths."""
+        full = self.stats["full_seconds"] / self.stats["full_frames"] * 1000 if self.stats["full_frames"] else None
+        dirty = self.stats["dirty_seconds"] / self.stats["dirty_frames"] * 1000 if self.stats["dirty_frames"] else None
+        return {"full_ms": full, "dirty_ms": dirty}
+
+
+class StaticLayer:
+    """
+    The parts of a screen that never change (background, frames, static labels) pre-composited into one surface,
+    so a full redraw costs one blit for all of them and the dirty-rect renderer restores regions from it.
+    Call rebuild() after the layout changes.
+    """
+    def __init__(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT), background=None, fill_colour=None, widgets=(), blits=()):
+        self.size = size
+        self.background = background # image drawn first, or
+        self.fill_colour = fill_colour # colour filled first
+        self.widgets = list(widgets) # drawn once, in order
+        self.blits = list(blits) # pre-rendered (surface, rect) pairs, e.g. wrapped help text
+        self.surface = None
+        self.rebuild()
+
+    def rebuild(self, widgets=None, blits=None):
+        if widgets is not None:
+            self.widgets = list(widgets)
+        if blits is not None:
+            self.blits = list(blits)
+        surface = pygame.Surface(self.size).convert() # opaque, matches the display format for fast blits
+        if self.fill_colour is not None:
+            surface.fill(self.fill_colour)
+        if self.background is not None:
+            surface.blit(self.background, (0, 0))
+        for widget in self.widgets:
+            widget.draw(surface)
+        if self.blits:
+            surface.blits(self.blits, doreturn=False)
+        self.surface = surface
+        return surface
+
+    def draw(self, screen):
+        screen.blit(self.surface, (0, 0))
+
+
+class FrozenUnderlay:
+    """
+    A snapshot of whatever sits under an overlay (the game under the shop panel, or under the settings menu),
+    with the dimming multiplied into the pixels once, so the overlay's renderer can restore from it instead of
+    redrawing and alpha-blending everything underneath every frame.
+    The owner decides when the snapshot is stale; due() rate-limits how often it is re-taken.
+    """
+    def __init__(self, dim_alpha=OVERLAY_DIM_ALPHA, refresh_interval=OVERLAY_REFRESH_INTERVAL, clock=time.monotonic):
+        self.dim_alpha = dim_alpha # how dark the dimming is, as the alpha of a black layer drawn over the snapshot
+        self.refresh_interval = refresh_interval # seconds between re-snapshots, None = never refresh
+        self.clock = clock
+        self.surface = None
+        self.last_capture = None
+
+    def capture(self, source, dim_rect=None):
+        """Copies source and dims dim_rect of it (all of it if None). Returns the frozen surface."""
+        surface = source.copy() if source.get_flags() & pygame.SRCALPHA == 0 else source.convert()
+        keep = 255 - self.dim_alpha # a black layer at dim_alpha leaves keep/255 of every channel
+        surface.fill((keep, keep, keep), dim_rect, special_flags=pygame.BLEND_RGB_MULT)
+        self.surface = surface
+        self.last_capture = self.clock()
+        return surface
+
+    def clear(self):
+        """Drops the snapshot, e.g. when nothing sits under the overlay any more."""
+        self.surface = None
+        self.last_capture = None
+
+    def due(self):
+        """True if enough time passed since the last capture to take a new one."""
+        if self.surface is None:
+            return True
+        if self.refresh_interval is None:
+            return False
+        return self.clock() - self.last_capture >= self.refresh_interval
+
+
+# backends ───────────────────────────────────────────────────────────────
+def make_renderer(screen, background):
+    """A state's renderer: through SDL's renderer when the texture backend is running, else dirty rects on the display surface."""
+    if TEXTURE_DISPLAY is not None:
+        return TextureRenderer(TEXTURE_DISPLAY, screen, background)
+    return DirtyRectRenderer(screen, background)
+
+def current_frame(screen):
+    """What's on screen now, as a surface."""
+    return TEXTURE_DISPLAY.snapshot() if TEXTURE_DISPLAY is not None else screen
+
+def set_window_title(title):
+    if TEXTURE_DISPLAY is not None:
+        TEXTURE_DISPLAY.set_title(title)
+    else:
+        pygame.display.set_caption(title)
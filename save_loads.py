@@ -1,12 +1,11 @@
 import os
 import json
-import sys
 from game_logic import User
 from game_constants import *
 from date_time import *
 from utils import Music
 
-timecontroller = NTPTimer()  # Initialise the NTP timer to get the current time from an NTP server
+timecontroller = NTPTimer()  # Initialise the NTP timer, the NTP server is queried once in the background so importing never blocks
 class SaveStates:
     """
     This is the "class" that handles the writing and reading to disk.
@@ -14,15 +13,8 @@ class SaveStates:
     """
     @staticmethod
     def get_path():
-        if getattr(sys, 'frozen', False):
-            # if running as a bundled executable
-            base_path = os.path.dirname(sys.executable)
-        else:
-            # if running as a script from the project root
-            base_path = os.path.abspath(".")
-
-        # construct the full path to the save file
-        full_save_path = os.path.join(base_path, SAVE_DIR)
+        # construct the full path to the save file, next to the executable when bundled
+        full_save_path = user_data_path(SAVE_DIR)
         save_directory = os.path.dirname(full_save_path)
 
         # Ensure the save directory exists
@@ -39,6 +31,7 @@ class SaveStates:
             "user_data": user.to_dict(),
             "music_data": music_player.to_dict(),
             "save_time": timecontroller.get_current_time().isoformat(),
+            "save_time_synced": timecontroller.is_synced, # False if the save time came from the system clock
         }
         with open(path, "w") as f:
             json.dump(save_data, f, indent=4)
@@ -83,8 +76,5 @@ class SaveStates:
         
         saved_datetime = datetime.fromisoformat(save_time_str)
         deltatime = timecontroller.get_current_time() - saved_datetime
-        return deltatime.total_seconds() # return that difference in seconds as a float
-
+        return max(0.0, deltatime.total_seconds()) # return that difference in seconds as a float, never negative if the system clock is behind the save
 
-        
- 
\ No newline at end of file
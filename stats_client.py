@@ -0,0 +1,187 @@
+import atexit
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlsplit
+
+from game_constants import *
+
+
+class StatsClient:
+    """
+    Uploads periodic snapshots of the user's progress to a leaderboard/stats server.
+    record() is called every frame from the main loop but only ever appends to an in-memory queue,
+    so the game loop never waits on the network. A daemon thread sends the queue in batches over
+    one pooled (keep-alive) HTTP connection, backing off exponentially while the server is unreachable.
+    Unsent snapshots are persisted to disk so they survive restarts.
+    """
+    def __init__(self, server_url, queue_path=None, snapshot_interval=STATS_SNAPSHOT_INTERVAL,
+                 batch_size=STATS_BATCH_SIZE, max_queue=STATS_MAX_QUEUE, clock=time.time, start=True):
+        url = urlsplit(server_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.use_https = url.scheme == "https"
+        self.upload_path = url.path.rstrip("/") + "/snapshots"
+        self.queue_path = queue_path # None = keep the queue in memory only
+        self.snapshot_interval = snapshot_interval
+        self.batch_size = batch_size
+        self.clock = clock # wall clock for snapshot timestamps, e.g. the NTP timer
+
+        self.queue = deque(maxlen=max_queue) # oldest snapshots fall off the front when full
+        self.player_id = None
+        self.load_queue()
+        if self.player_id is None:
+            self.player_id = uuid.uuid4().hex
+
+        self.uploaded = 0 # snapshots accepted by the server, for debugging/tests
+        self.failures = 0 # consecutive failed uploads, drives the backoff
+        self.last_error = None
+        self._next_snapshot = 0.0 # monotonic time of the next snapshot
+        self._connection = None # pooled HTTP connection, only touched by the worker thread
+        self._lock = threading.Lock() # guards self.queue between the game loop and the worker
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self.start()
+
+    # snapshots ──────────────────────────────────────────────────────────
+    def snapshot(self, user):
+        """Builds the snapshot dict for the current user state."""
+        return {
+            "player_id": self.player_id,
+            "time": self.clock(),
+            "money": user.money,
+            "income_per_second": user.income_per_second,
+            "generators": {gen_id: gen.amount for gen_id, gen in user.generators.items()},
+        }
+
+    def record(self, user, force=False):
+        """Queues a snapshot if the snapshot interval has passed. Cheap enough to call every frame."""
+        now = time.monotonic()
+        if not force and now < self._next_snapshot:
+            return False
+        self._next_snapshot = now + self.snapshot_interval
+        snap = self.snapshot(user)
+        with self._lock:
+            self.queue.append(snap)
+            ready = len(self.queue) >= self.batch_size
+        if ready or force:
+            self._wake.set() # full batch waiting, don't wait for the next poll
+        return True
+
+    # worker thread ──────────────────────────────────────────────────────
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stats-upload", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.snapshot_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if not self.flush():
+                # server unreachable, keep the queue safe on disk and back off
+                self.save_queue()
+                self._stop.wait(self.backoff_delay())
+        self._close_connection()
+
+    def backoff_delay(self):
+        """Seconds to wait after the current run of failures (exponential with a little jitter)."""
+        if self.failures == 0:
+            return 0
+        delay = min(STATS_MAX_BACKOFF, STATS_BASE_BACKOFF * 2 ** (self.failures - 1))
+        return delay + random.uniform(0, delay * 0.1)
+
+    def flush(self):
+        """Uploads everything queued, one batch per request. Returns False if an upload failed."""
+        sent_any = False
+        while True:
+            with self._lock:
+                batch = [self.queue[i] for i in range(min(self.batch_size, len(self.queue)))]
+            if not batch:
+                break
+            if not self._post(batch):
+                self.failures += 1
+                return False
+            with self._lock:
+                for snap in batch: # the batch is still at the front unless a full queue already dropped it
+                    if self.queue and self.queue[0] is snap:
+                        self.queue.popleft()
+            self.failures = 0
+            self.uploaded += len(batch)
+            sent_any = True
+        if sent_any and self.queue_path:
+            self.save_queue() # drained, clear whatever was persisted
+        return True
+
+    def _post(self, batch):
+        body = json.dumps({"snapshots": batch}).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        for attempt in range(2): # a pooled connection may have been closed by the server, retry once on a fresh one
+            try:
+                if self._connection is None:
+                    connection_type = http.client.HTTPSConnection if self.use_https else http.client.HTTPConnection
+                    self._connection = connection_type(self.host, self.port, timeout=5)
+                self._connection.request("POST", self.upload_path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                response.read() # must be read fully before the connection can be reused
+                if 200 <= response.status < 300:
+                    return True
+                self.last_error = f"HTTP {response.status}"
+                return False
+            except (OSError, http.client.HTTPException) as e:
+                self.last_error = e
+                self._close_connection()
+        return False
+
+    def _close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self, timeout=1.0):
+        """Stops the worker and persists anything still unsent. Called automatically at exit."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+        self.save_queue()
+
+    # persistence ────────────────────────────────────────────────────────
+    def save_queue(self):
+        if not self.queue_path:
+            return
+        with self._lock:
+            data = {"player_id": self.player_id, "queue": list(self.queue)}
+        try:
+            directory = os.path.dirname(self.queue_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = self.queue_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.queue_path) # atomic, a crash never leaves half a queue file
+        except OSError as e:
+            print(f"Could not save stats queue: {e}") if DEBUG_MODE else None
+
+    def load_queue(self):
+        if not self.queue_path or not os.path.exists(self.queue_path):
+            return
+        try:
+            with open(self.queue_path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load stats queue: {e}") if DEBUG_MODE else None
+            return
+        self.player_id = data.get("player_id")
+        self.queue.extend(data.get("queue", []))
@@ -0,0 +1,108 @@
+"""
+A local stand-in for the leaderboard/stats server, so the whole upload path can be tested offline.
+Run it with `python stats_server.py` (optionally `--port 8765 --save stats_server.json`) and the game's
+StatsClient will upload to it. Doesn't import pygame, so it can run on any machine in the shop.
+
+Endpoints:
+    POST /snapshots    {"snapshots": [...]} -> {"accepted": n}
+    GET  /leaderboard  latest snapshot of each player, richest first
+    GET  /health       {"status": "ok"}
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StatsStore:
+    """Thread-safe in-memory store of every snapshot received, optionally written to a JSON file."""
+    def __init__(self, save_path=None):
+        self.snapshots = []
+        self.latest = {} # player_id -> most recent snapshot
+        self.save_path = save_path
+        self._lock = threading.Lock()
+
+    def add(self, snapshots):
+        with self._lock:
+            for snap in snapshots:
+                self.snapshots.append(snap)
+                player = snap.get("player_id")
+                if player is not None and snap.get("time", 0) >= self.latest.get(player, {}).get("time", 0):
+                    self.latest[player] = snap
+            if self.save_path:
+                with open(self.save_path, "w") as f:
+                    json.dump(self.snapshots, f)
+        return len(snapshots)
+
+    def leaderboard(self, limit=10):
+        with self._lock:
+            players = sorted(self.latest.values(), key=lambda snap: snap.get("money", 0), reverse=True)
+        return players[:limit]
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so the client can reuse one pooled connection
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+            snapshots = data["snapshots"]
+            if not isinstance(snapshots, list):
+                raise ValueError("snapshots must be a list")
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        if self.path.rstrip("/") != "/snapshots":
+            self.send_json(404, {"error": "not found"})
+            return
+        self.send_json(200, {"accepted": self.server.store.add(snapshots)})
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/leaderboard":
+            self.send_json(200, {"leaderboard": self.server.store.leaderboard()})
+        elif self.path.rstrip("/") == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def log_message(self, format, *args): # keep the console quiet, every upload would print otherwise
+        pass
+
+
+def make_server(host="127.0.0.1", port=8765, save_path=None):
+    """Creates the stand-in server. Port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), StatsRequestHandler)
+    server.daemon_threads = True
+    server.store = StatsStore(save_path)
+    return server
+
+
+def serve_in_background(host="127.0.0.1", port=0, save_path=None):
+    """Starts the stand-in server on a daemon thread and returns (server, url), handy for tests."""
+    server = make_server(host, port, save_path)
+    threading.Thread(target=server.serve_forever, name="stats-server", daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in leaderboard/stats server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--save", default=None, help="optional JSON file to write received snapshots to")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.save)
+    print(f"Stats server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -1,3 +1,677 @@
+"""
+Tests for Idle Tutor Tycoon.
+Run with `python -m pytest tests.py`, or `python tests.py` for the differential harness report.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window/audio needed, lets the tests run headless
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import bisect
+import copy
+import pytest
+import pygame
+import random
+import time
+
+from game_constants import *
+from game_logic import User
+from utils import fast_forward
+
+
+"""Differential harness: fast-forward engine vs frame-stepped reference"""
+# fast_forward (used for offline progress) and the live User.update loop are two implementations of the same
+# economy. These build random users, advance one copy with each and check they end up in the same place.
+
+REFERENCE_DT = 1 / 120 # frame length of the reference stepper, smaller than the game's 1/60
+PHASE_TOLERANCE = 1e-6 # seconds; floating point drift allowed between the two cycle timers
+MONEY_TOLERANCE = 1e-9 # relative difference allowed in money
+
+def random_user_data(rng):
+    """Builds random (but loadable) user save data, the same shape as User.to_dict()."""
+    generators = []
+    managers = []
+    for gen_id in GENERATOR_PROTOTYPES:
+        if rng.random() < 0.2:
+            continue # not every save has every generator
+        amount = rng.choice([0, 1, rng.randint(1, 24), rng.randint(25, 120), rng.randint(200, 1100)])
+        generators.append({
+            "id": gen_id,
+            "level": rng.choice([1, 2, 4, 8, 256]),
+            "amount": amount,
+            "time_progress": rng.uniform(0, GENERATOR_PROTOTYPES[gen_id]["base_time"]),
+            "is_generating": rng.random() < 0.6,
+            "revenue_multiplier": rng.choice([1, 10, 100]),
+            "revenue_multiplier_purchases": 0,
+        })
+        if rng.random() < 0.5:
+            managers.append({"id": gen_id})
+    return {"money": rng.uniform(0, 1e9), "generators": generators, "managers": managers}
+
+def reference_step(user, seconds, dt=REFERENCE_DT):
+    """Advances the user the way main.py does, one small frame at a time."""
+    frames = int(seconds // dt)
+    for _ in range(frames):
+        user.update(dt)
+    leftover = seconds - frames * dt
+    if leftover > 0:
+        user.update(leftover)
+
+def compare_users(fast, reference):
+    """Returns a list of human readable differences between the two users (empty if they agree)."""
+    differences = []
+    money_allowance = MONEY_TOLERANCE * max(1.0, abs(reference.money))
+    for gen_id, ref_gen in reference.generators.items():
+        fast_gen = fast.generators[gen_id]
+        if fast_gen.is_generating != ref_gen.is_generating:
+            differences.append(f"{gen_id}: is_generating {fast_gen.is_generating} != {ref_gen.is_generating}")
+            continue
+        if not ref_gen.is_generating:
+            continue
+        effective_time = ref_gen.get_effective_time(reference.generators)
+        phase_difference = abs(fast_gen.time_progress - ref_gen.time_progress)
+        if phase_difference > PHASE_TOLERANCE:
+            # a cycle ending right on the final frame can land either side of the boundary because of rounding
+            if abs(phase_difference - effective_time) <= PHASE_TOLERANCE:
+                money_allowance += ref_gen.cycle_output
+            else:
+                differences.append(f"{gen_id}: time_progress {fast_gen.time_progress} != {ref_gen.time_progress}")
+    if abs(fast.money - reference.money) > money_allowance:
+        differences.append(f"money {fast.money} != {reference.money}")
+    return differences
+
+def run_differential(cases=40, seed=2025, max_seconds=120.0, dt=REFERENCE_DT):
+    """
+    Runs the harness over random users and returns a report with any mismatches
+    and how much faster fast_forward is than frame stepping.
+    """
+    rng = random.Random(seed)
+    report = {"cases": cases, "mismatches": [], "fast_seconds": 0.0, "reference_seconds": 0.0}
+    for case in range(cases):
+        data = random_user_data(rng)
+        seconds = rng.choice([0.0, dt / 2, rng.uniform(0, 5), rng.uniform(0, max_seconds)])
+        fast = User.from_dict(copy.deepcopy(data))
+        reference = User.from_dict(copy.deepcopy(data))
+
+        start = time.perf_counter()
+        fast_forward(fast, seconds)
+        report["fast_seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference_step(reference, seconds, dt)
+        report["reference_seconds"] += time.perf_counter() - start
+
+        for difference in compare_users(fast, reference):
+            report["mismatches"].append(f"case {case} (seed {seed}, {seconds:.3f}s): {difference}")
+    report["speedup"] = report["reference_seconds"] / max(report["fast_seconds"], 1e-9)
+    return report
+
+def test_fast_forward_matches_frame_stepping():
+    report = run_differential()
+    assert not report["mismatches"], "\n".join(report["mismatches"])
+
+def test_fast_forward_matches_at_game_frame_rate():
+    report = run_differential(cases=10, seed=7, dt=1 / FPS)
+    assert not report["mismatches"], "\n".join(report["mismatches"])
+
+def test_frame_stepping_is_frame_rate_independent():
+    # a long stall (e.g. dragging the window) should earn the same as many short frames
+    user_data = {"money": 0, "generators": [{"id": "g1", "amount": 10, "is_generating": True, "time_progress": 0.6}], "managers": [{"id": "g1"}]}
+    stalled = User.from_dict(copy.deepcopy(user_data))
+    stepped = User.from_dict(copy.deepcopy(user_data))
+    stalled.update(30.0)
+    reference_step(stepped, 30.0)
+    assert not compare_users(stalled, stepped)
+
+def test_global_milestones_apply_as_if_every_generator_existed():
+    # generators are only created when first bought, the game menu used to create all of them up front with none owned
+    from game_logic import apply_upgrades
+    rng = random.Random(46)
+    for _ in range(200):
+        data = random_user_data(rng) # leaves out about a fifth of the generators
+        lazy = User.from_dict(copy.deepcopy(data))
+        eager = User.from_dict(copy.deepcopy(data))
+        for gen_id in GENERATOR_PROTOTYPES:
+            eager.ensure_generator(gen_id)
+        apply_upgrades(lazy)
+        apply_upgrades(eager)
+        for gen_id, gen in lazy.generators.items():
+            assert gen.level == eager.generators[gen_id].level
+            assert gen.get_effective_time(lazy.generators) == eager.generators[gen_id].get_effective_time(eager.generators)
+    threshold = GLOBAL_TIME_MILESTONES[0]
+    user = User(0)
+    for gen_id in GENERATOR_PROTOTYPES:
+        user.ensure_generator(gen_id)
+        user.generators[gen_id].amount = threshold
+    base_time = GENERATOR_PROTOTYPES["g1"]["base_time"]
+    individual = base_time / 2 ** bisect.bisect_right(GENERATOR_TIME_MILESTONES, threshold)
+    assert user.generators["g1"].get_effective_time(user.generators) == max(MIN_GENERATION_TIME, individual / 2) # every generator reached it
+    del user.generators["g2"] # one not bought yet
+    assert user.generators["g1"].get_effective_time(user.generators) == max(MIN_GENERATION_TIME, individual)
+
+"""Time source"""
+class FakeNTPClient:
+    """Stands in for ntplib.NTPClient: answers with offset, raises error, or waits on blocker before answering."""
+    def __init__(self, offset=0.0, error=None, blocker=None):
+        self.offset, self.error, self.blocker = offset, error, blocker
+
+    def request(self, host, version=3, timeout=1):
+        if self.blocker is not None:
+            self.blocker.wait()
+        if self.error is not None:
+            raise self.error
+        return type("Response", (), {"offset": self.offset})()
+
+def test_ntp_sync_caches_the_offset_against_the_monotonic_clock():
+    from date_time import NTPTimer
+    timer = NTPTimer(start_sync=False, client=FakeNTPClient(offset=3600))
+    assert not timer.is_synced
+    before = time.monotonic()
+    assert timer.sync() and timer.is_synced
+    epoch_at_sync, monotonic_at_sync = timer._anchor
+    assert before <= monotonic_at_sync <= time.monotonic()
+    assert abs(timer.now().timestamp() - (time.time() + 3600)) < 0.5
+
+def test_failed_or_slow_ntp_sync_serves_system_time():
+    import ntplib
+    import threading
+    from date_time import NTPTimer
+    for error in (ntplib.NTPException("no reply"), TimeoutError(), OSError("offline")):
+        timer = NTPTimer(client=FakeNTPClient(error=error))
+        assert not timer.wait_for_sync(timeout=1) and timer.sync_error is error
+        assert abs(timer.now().timestamp() - time.time()) < 0.5
+    blocker = threading.Event()
+    timer = NTPTimer(client=FakeNTPClient(offset=60, blocker=blocker))
+    start = time.monotonic()
+    assert not timer.wait_for_sync(timeout=0.05) # the server hasn't answered, the caller isn't held up
+    assert time.monotonic() - start < 1
+    blocker.set()
+    assert timer.wait_for_sync(timeout=1)
+
+def test_time_elapsed_is_never_negative(tmp_path, monkeypatch):
+    import json
+    from datetime import timedelta
+    import save_loads
+    path = tmp_path / "save_data.json"
+    monkeypatch.setattr(save_loads.SaveStates, "get_path", staticmethod(lambda: str(path)))
+    now = save_loads.timecontroller.get_current_time()
+    path.write_text(json.dumps({"save_time": (now + timedelta(hours=1)).isoformat()})) # saved by a clock that was ahead
+    assert save_loads.SaveStates.time_elapsed() == 0.0
+    path.write_text(json.dumps({"save_time": (now - timedelta(seconds=90)).isoformat()}))
+    assert 90 <= save_loads.SaveStates.time_elapsed() < 95
+
+"""Leaderboard stats client"""
+def test_stats_client_uploads_in_batches():
+    from stats_client import StatsClient
+    from stats_server import serve_in_background
+    server, url = serve_in_background()
+    try:
+        batches = []
+        add = server.store.add
+        server.store.add = lambda snapshots: batches.append(len(snapshots)) or add(snapshots)
+        client = StatsClient(url, batch_size=STATS_BATCH_SIZE, start=False)
+        user = User(100)
+        for _ in range(2 * STATS_BATCH_SIZE + 5):
+            client.record(user, force=True)
+        assert client.flush()
+        assert batches == [STATS_BATCH_SIZE, STATS_BATCH_SIZE, 5]
+        assert client.uploaded == len(server.store.snapshots) == 2 * STATS_BATCH_SIZE + 5 and not client.queue
+        assert server.store.leaderboard()[0]["player_id"] == client.player_id
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_stats_client_backs_off_and_keeps_the_queue_while_offline(tmp_path):
+    import json
+    from stats_client import StatsClient
+    from stats_server import serve_in_background
+    server, url = serve_in_background()
+    server.shutdown()
+    server.server_close() # nothing listening any more, every upload fails
+    queue_path = str(tmp_path / "stats_queue.json")
+    client = StatsClient(url, queue_path=queue_path, max_queue=5, start=False)
+    assert client.backoff_delay() == 0
+    user = User(100)
+    for money in range(8):
+        user.money = money
+        client.record(user, force=True)
+    assert [snap["money"] for snap in client.queue] == [3, 4, 5, 6, 7] # the oldest dropped beyond max_queue
+    delays = []
+    for _ in range(12):
+        assert not client.flush()
+        delays.append(client.backoff_delay())
+    for failures, delay in enumerate(delays, start=1):
+        expected = min(STATS_MAX_BACKOFF, STATS_BASE_BACKOFF * 2 ** (failures - 1))
+        assert expected <= delay <= expected * 1.1 # doubled per failure, plus jitter, capped
+    assert delays[-1] <= STATS_MAX_BACKOFF * 1.1
+    client.save_queue()
+    reloaded = StatsClient(url, queue_path=queue_path, max_queue=5, start=False)
+    assert reloaded.player_id == client.player_id and list(reloaded.queue) == list(client.queue)
+    server, url = serve_in_background() # back online
+    try:
+        reloaded = StatsClient(url, queue_path=queue_path, start=False)
+        assert reloaded.flush() and len(server.store.snapshots) == 5
+        with open(queue_path) as f:
+            assert json.load(f)["queue"] == [] # drained, nothing left to resend next start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+"""Render caches"""
+def test_text_cache_reuses_surfaces_and_evicts_least_recently_used():
+    from render_cache import TextCache
+    cache = TextCache(max_size=2)
+    first = cache.render(DEFAULT_FONT, "Buy", WHITE)
+    assert cache.render(DEFAULT_FONT, "Buy", WHITE) is first
+    cache.render(DEFAULT_FONT, "Sell", WHITE)
+    cache.render(DEFAULT_FONT, "Buy", WHITE) # "Buy" is now the most recently used
+    cache.render(DEFAULT_FONT, "Owned", WHITE) # evicts "Sell"
+    assert (DEFAULT_FONT, "Sell", WHITE, True) not in cache.surfaces
+    assert cache.render(DEFAULT_FONT, "Buy", WHITE) is first
+    assert (cache.hits, cache.misses) == (3, 3)
+
+def test_glyph_atlas_composes_labels_from_cached_glyphs():
+    from render_cache import get_glyph_atlas
+    atlas = get_glyph_atlas(DEFAULT_FONT, WHITE)
+    assert get_glyph_atlas(DEFAULT_FONT, WHITE) is atlas
+    zero = atlas.glyphs["0"]
+    surface = pygame.Surface((400, 100))
+    drawn = atlas.blit(surface, "$1.05 Qa", (10, 20))
+    assert drawn.size == atlas.size("$1.05 Qa")
+    assert atlas.glyphs["0"] is zero # reused, not re-rendered
+    atlas.size("(avg)") # characters outside the numeric set are added on first use
+    assert "(" in atlas.glyphs
+
+def test_font_registry_loads_each_face_once():
+    from render_cache import FONTS, get_font
+    font = get_font(LOGO_FONT, 31)
+    assert get_font(LOGO_FONT, 31) is font
+    assert get_font(LOGO_FONT, 31, bold=True) is not font
+    assert FONTS.stats()["by_face"]["tabitha.ttf 31"]["uses"] == 2
+
+def test_button_sprites_rebuilt_only_when_text_or_hover_changes():
+    from ui_elements import Button
+    label = ["Buy"]
+    button = Button(100, 100, 200, 50, "", GRAY, DEFAULT_FONT, WHITE, display_callback=lambda: label[0])
+    normal = button.get_sprite()
+    assert button.get_sprite() is normal
+    button.animations(button.rect.center)
+    hovered = button.get_sprite()
+    assert hovered is not normal
+    button.animations((0, 0))
+    assert button.get_sprite() is normal
+    label[0] = "Locked"
+    assert button.get_sprite() is not normal
+    assert len(button.sprites) == 3
+
+def test_dirty_rect_renderer_redraws_only_changed_widgets():
+    from rendering import DirtyRectRenderer
+    from ui_elements import CreateFrect, Widget
+    with pytest.raises(TypeError):
+        Widget() # subclasses must say what they draw and where
+    label = ["$1"]
+    changing = CreateFrect(100, 100, 200, 50, GRAY, font=DEFAULT_FONT, font_colour=WHITE, display_callback=lambda: label[0])
+    unchanged = CreateFrect(600, 400, 200, 50, GRAY, font=DEFAULT_FONT, font_colour=WHITE, display="Owned")
+    renderer = DirtyRectRenderer(screen, pygame.Surface(screen.get_size()), enabled=True, debug=False)
+    assert renderer.render([changing, unchanged]) == [screen.get_rect()] # the first frame draws everything
+    assert renderer.render([changing, unchanged]) == []
+    label[0] = "$1,000"
+    dirty = renderer.render([changing, unchanged])
+    assert len(dirty) == 1 and dirty[0].contains(changing.get_bounds())
+    assert not dirty[0].colliderect(unchanged.get_bounds())
+    assert renderer.render([changing, unchanged]) == []
+
+def test_static_layer_draws_static_widgets_once_until_rebuilt():
+    from rendering import StaticLayer
+    from ui_elements import CreateFrect
+    title = CreateFrect(100, 100, 300, 60, GRAY, font=DEFAULT_FONT, font_colour=WHITE, display="Upgrades")
+    assert title.is_static()
+    draws = []
+    draw = title.draw
+    title.draw = lambda surface: draws.append(1) or draw(surface)
+    layer = StaticLayer(fill_colour=BLACK, widgets=[title])
+    before = layer.surface.copy()
+    for _ in range(3):
+        layer.draw(screen)
+    assert len(draws) == 1 # composited once, each frame is one blit of the layer
+    title.display = "Managers"
+    pixels = lambda surface: pygame.image.tobytes(surface, "RGB")
+    assert pixels(layer.surface) == pixels(before) # not picked up until rebuilt
+    layer.rebuild()
+    assert len(draws) == 2 and pixels(layer.surface) != pixels(before)
+
+def test_frozen_underlay_is_dimmed_once_and_refreshed_at_most_every_interval():
+    from game_states import GameMenu, SettingsMenu
+    from utils import Music
+    source = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    source.fill((200, 120, 40))
+    blended = source.copy() # what drawing a black layer at OVERLAY_DIM_ALPHA over the game every frame gave
+    shade = pygame.Surface(source.get_size(), pygame.SRCALPHA)
+    shade.fill((0, 0, 0, OVERLAY_DIM_ALPHA))
+    blended.blit(shade, (0, 0))
+    user = User(0)
+    menu = GameMenu(screen, user, None)
+    now = [0.0]
+    menu.underlay.clock = lambda: now[0]
+    frozen = menu.underlay.capture(source)
+    assert all(abs(a - b) <= 1 for a, b in zip(frozen.get_at((5, 5)), blended.get_at((5, 5))))
+    menu.open_panel("shop")
+    menu.render()
+    captured = menu.underlay.last_capture
+    user.money = 10**6 # the money label under the panel changes
+    now[0] += OVERLAY_REFRESH_INTERVAL / 2
+    menu.render()
+    assert menu.underlay.last_capture == captured # too soon, the game underneath stays frozen
+    now[0] += OVERLAY_REFRESH_INTERVAL
+    menu.render()
+    assert menu.underlay.last_capture == now[0]
+    settings = SettingsMenu(screen, user, None, Music(0.5))
+    plain = pygame.image.tobytes(settings.static_layer.surface, "RGB")
+    settings.set_underlay(source)
+    assert settings.static_layer.background is not None and not settings.underlay.due() # taken once, never refreshed
+    settings.set_underlay(None)
+    assert settings.underlay.surface is None and settings.static_layer.background is None and pygame.image.tobytes(settings.renderer.background, "RGB") == plain
+
+def test_bindings_recompute_only_when_the_model_reports_a_change():
+    from game_states import GameMenu
+    user = User(100)
+    menu = GameMenu(screen, user, None)
+    calls = []
+    owned = menu.bindings.bind(lambda: calls.append(1) or f"{menu.generator_for('g1').amount}", menu.slot_key(menu.generator_list.slot_for("g1")))
+    assert owned() == "0" and owned() == "0"
+    menu.render()
+    income = menu.income_text.version
+    user.money += 50 # not what it shows
+    menu.render()
+    assert owned() == "0" and len(calls) == 1 and menu.income_text.version == income
+    user.buy_generator("g1")
+    menu.render()
+    assert owned() == "1" and len(calls) == 2
+    assert len(menu.bindings.watched) == 2 * len(menu.generator_list.slots) # only the cycle timers are read every frame
+
+def test_model_events_are_coalesced_per_frame():
+    from events import MONEY_CHANGED, AMOUNT_CHANGED, CYCLE_COMPLETED
+    user = User(1000)
+    received = []
+    user.events.subscribe(AMOUNT_CHANGED, received.append)
+    user.events.subscribe(MONEY_CHANGED, received.append)
+    user.buy_generator("g1")
+    user.buy_generator("g1")
+    assert received == [] # nothing is delivered until the frame's dispatch
+    assert user.events.dispatch() == 2
+    amount, money = sorted(received, key=lambda event: event.type != AMOUNT_CHANGED)
+    assert (amount.old, amount.new, amount.count) == (0, 2, 2)
+    assert money.old == 1000 and money.new == user.money
+    user.events.unsubscribe(MONEY_CHANGED, received.append)
+    user.money += 1 # nobody listening, nothing queued
+    user.manual_generate("g1")
+    user.update(100) # unmanaged cycles aren't listened to either
+    assert user.events.pending == {}
+
+def test_hit_index_routes_clicks_by_layer():
+    from game_states import GameMenu
+    user = User(1000)
+    menu = GameMenu(screen, user, None)
+    click = lambda pos: menu.handle_events([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)])
+    buy = menu.generator_list.slots[0]["buy"]
+    click(buy.rect.center)
+    assert user.generators["g1"].amount == 1
+    click(menu.nav_buttons[0].rect.center) # open the managers panel
+    assert menu.active_panel == "shop"
+    click(buy.rect.center) # under the panel, swallowed
+    assert user.generators["g1"].amount == 1
+    user.money = MANAGER_PROTOTYPES["g1"]["cost"]
+    click(menu.panels["shop"].rows.slots[0]["btn"].rect.center)
+    assert "g1" in user.managers
+    click(menu.panels["shop"].header["exit_menu_btn"].rect.center)
+    assert menu.active_panel is None
+
+def test_hover_follows_mouse_motion_events():
+    from game_states import GameMenu
+    menu = GameMenu(screen, User(0), None)
+    move = lambda pos: menu.handle_events([pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))])
+    nav, buy = menu.nav_buttons[0], menu.generator_list.slots[0]["buy"]
+    move(nav.rect.center)
+    assert nav.hovered
+    move(buy.rect.center)
+    assert buy.hovered and not nav.hovered
+    menu.update() # no hover work without motion
+    assert buy.hovered
+    menu.handle_events([pygame.event.Event(pygame.WINDOWLEAVE)])
+    assert not buy.hovered
+
+def test_tutorial_overlay_repicks_hint_only_when_its_inputs_change():
+    import utils
+    from game_states import GameMenu
+    user = User(0)
+    user.tutorial_state = {step: False for step in utils.TUTORIAL_STEPS}
+    menu = GameMenu(screen, user, None)
+    overlay = menu.tutorial_hint
+    picks = []
+    original = utils.get_tutorial_hint
+    utils.get_tutorial_hint = lambda *args: picks.append(1) or original(*args)
+    try:
+        assert overlay.visual_state() is None # can't afford the first generator yet
+        user.money = 1 # still under the price, nothing to re-pick
+        overlay.visual_state()
+        assert len(picks) == 1
+        user.money = GENERATOR_PROTOTYPES["g1"]["base_price"]
+        assert overlay.visual_state() is not None
+        assert len(picks) == 2
+        assert overlay.get_sprite() is overlay.get_sprite()
+    finally:
+        utils.get_tutorial_hint = original
+
+def test_virtual_list_recycles_a_fixed_set_of_slots():
+    from virtual_list import VirtualList
+    built, assigned = [], []
+    catalog = VirtualList(range(1000), (0, 0, 100, 250), 50, lambda slot, index: built.append(index),
+                          lambda slot, item: assigned.append(item), columns=2)
+    assert len(catalog.slots) == 10 and len(built) == 10 # only the visible window, however long the catalog
+    assert [slot["item"] for slot in catalog.slots] == list(range(10))
+    assert catalog.scroll(3) and catalog.slot_for(6) is catalog.slots[0]
+    assert catalog.scroll(-10) and catalog.first_row == 0
+    assert not catalog.scroll(-1)
+    catalog.scroll(10**6) # clamped to the last full window
+    assert catalog.slots[-1]["item"] == 999 and len(built) == 10
+    short = VirtualList(range(3), (0, 0, 100, 250), 50, lambda slot, index: None, lambda slot, item: None, columns=2)
+    assert len(short.visible_slots()) == 3 and not short.scroll(1)
+
+def test_game_menu_scrolls_generators_with_the_mouse_wheel(monkeypatch):
+    from game_states import GameMenu
+    for n in range(11, 41): # thirty more generators than fit on screen
+        monkeypatch.setitem(GENERATOR_PROTOTYPES, f"g{n}", dict(GENERATOR_PROTOTYPES["g1"], name=f"Generator {n}"))
+    user = User(0)
+    menu = GameMenu(screen, user, None)
+    slots = menu.generator_list.slots
+    assert len(slots) == 10 and len(menu.get_base_widgets()) == 2 + 4 * 10 + 5
+    wheel = lambda y: menu.handle_events([pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=y, flipped=False)])
+    monkeypatch.setattr(pygame.mouse, "get_pos", lambda: slots[0]["buy"].rect.center)
+    wheel(-15) # down as far as it goes
+    assert slots[0]["item"] == "g31" and menu.generator_list.slot_for("g1") is None
+    user.money = 1e9
+    menu.handle_events([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=slots[0]["buy"].rect.center, button=1)])
+    assert user.generators["g31"].amount == 1
+    menu.render()
+    assert slots[0]["owned"].get_display() == "1" and slots[1]["owned"].get_display() == "0"
+
+def test_content_pack_compiles_once_per_content_hash(tmp_path, monkeypatch):
+    import json
+    import content
+    with open(CONTENT_PACK) as f:
+        pack = json.load(f)
+    pack_path, cache_dir = tmp_path / "pack.json", tmp_path / "cache"
+    pack_path.write_text(json.dumps(pack))
+    tables = content.load_content(pack_path, cache_dir)
+    assert tables.generator_prototypes() == GENERATOR_PROTOTYPES and tables.generator_upgrades() == GENERATOR_UPGRADES
+    assert tables.upgrade_multiplier(tables.tier_of[tables.index["g1"]], 599) == 256 and tables.upgrade_multiplier(-1, 10**6) == 1
+    def no_validating(pack):
+        raise AssertionError("validated a cached pack")
+    monkeypatch.setattr(content, "validate_pack", no_validating)
+    assert content.load_content(pack_path, cache_dir).ids == tables.ids # cache hit
+    pack["generators"][0]["base_price"] = -1 # a new hash, so compiled (and validated) again
+    pack_path.write_text(json.dumps(pack))
+    monkeypatch.undo()
+    with pytest.raises(ValueError, match="base_price of generator 'g1'"):
+        content.load_content(pack_path, cache_dir)
+    assert len(list(cache_dir.iterdir())) == 1
+
+def test_text_layout_wraps_like_measuring_every_word():
+    from text_layout import TextLayout, TextPage
+    font = pygame.font.Font(None, 20)
+    def naive_wrap(text, width): # the old way, measuring the growing line after every word
+        lines, line = [], ""
+        for word in text.split(" "):
+            if font.size(line + word + " ")[0] < width or not line:
+                line += word + " "
+            else:
+                lines.append(line.rstrip(" "))
+                line = word + " "
+        return lines + [line.rstrip(" ")]
+    rng = random.Random(7)
+    layout = TextLayout()
+    text = " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(1, 12))) for _ in range(400))
+    for width in (80, 300, 1100):
+        assert layout.wrap(text, font, width) == naive_wrap(text, width)
+    layout.measures = 0
+    lines = layout.wrap(text, font, 300)
+    assert layout.measures <= 3 * len(lines) # word widths are cached, a line costs a couple of measures rather than one per word
+    surfaces = layout.paragraph(text, font, BLACK, 300)
+    assert layout.paragraph(text, font, BLACK, 300) is surfaces
+    page = TextPage([(surface, surface.get_rect(topleft=(0, i * 20))) for i, surface in enumerate(surfaces)], len(surfaces) * 20)
+    viewport = pygame.Rect(0, 100, 300, 50)
+    assert [dest for _, dest, _ in page.blits(viewport, scroll=30)] == [(0, 100), (0, 110), (0, 130)] # the first line is cropped
+    assert page.max_scroll(viewport) == page.height - 50
+
+def test_state_manager_builds_states_on_first_use():
+    from game_states import StateManager
+    user = User(0)
+    manager = StateManager(screen, user, None)
+    assert manager.states == {}
+    manager.current_state
+    assert list(manager.states) == [MAIN_MENU]
+    assert manager.prewarm_step() and GAME_MENU in manager.states
+    assert not manager.prewarm_step()
+    assert user.generators == {} # generators are only created when bought, the game menu previews the rest
+    manager.set_state(HELP_MENU, pass_back=MAIN_MENU)
+    manager.set_state(MAIN_MENU)
+    assert manager.evict_idle(max_idle=0) == [HELP_MENU]
+    manager.set_state(HELP_MENU, pass_back=MAIN_MENU) # rebuilt on the way back in
+    assert HELP_MENU in manager.states
+
+def test_assets_load_on_first_use_and_unload_with_their_last_holder():
+    from asset_registry import AssetRegistry
+    assets = AssetRegistry()
+    assets.image("arrow", resource_path("assets/images/tutorial_arrow.png"), (100, 100))
+    assets.image("logo", resource_path("assets/images/itt_logo.png"))
+    assert assets.loads == 0
+    assets.acquire(MAIN_MENU, ["arrow"])
+    assets.acquire(GAME_MENU, ["arrow"])
+    assets.preload(["arrow"])
+    arrow = assets.get("arrow")
+    assert arrow.get_size() == (100, 100) and assets.get("arrow") is arrow
+    assert assets.release(MAIN_MENU) == [] # the game menu still holds it
+    assert assets.release(GAME_MENU) == ["arrow"]
+    assert assets.loads == 1 and "logo" not in assets.assets
+
+def test_get_waits_for_an_image_the_preload_thread_is_decoding():
+    import threading
+    from asset_registry import AssetRegistry
+    assets = AssetRegistry()
+    started, release, decodes = threading.Event(), threading.Event(), []
+    def slow_decode(name):
+        def decode():
+            decodes.append(name)
+            started.set()
+            release.wait(5)
+            return pygame.Surface((4, 4))
+        return decode
+    assets.specs["slow"] = (slow_decode("slow"), lambda decoded: decoded)
+    assets.specs["queued"] = (slow_decode("queued"), lambda decoded: decoded)
+    assets.preload(["slow", "queued"])
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    assert assets.get("slow").get_size() == (4, 4) # waited for the preload instead of decoding again
+    assert assets.get("queued").get_size() == (4, 4) # taken off the queue if the thread hadn't got to it, else waited for
+    assets._thread.join(5)
+    assert sorted(decodes) == ["queued", "slow"] and assets.loads == 2 and not assets.decoded
+
+def test_asset_build_step_matches_scaling_at_runtime(tmp_path, monkeypatch):
+    import asset_pipeline
+    from asset_registry import AssetRegistry
+    path = resource_path("assets/images/settings_icon.png")
+    assets = AssetRegistry(build_dir=str(tmp_path))
+    assets.atlas("icons", [("icon", path, (50, 50), None), ("icon_hover", path, (50, 50), GRAY)])
+    assets.image("photo", resource_path("assets/images/williamdu.png"), (165, 165))
+    icon = pygame.transform.scale(pygame.image.load(path).convert_alpha(), (50, 50)) # how the game used to load it
+    hover = icon.copy()
+    hover.fill(GRAY, special_flags=pygame.BLEND_RGB_MULT)
+    for name, expected in (("icon", icon), ("icon_hover", hover)):
+        built = assets.get(name)
+        assert all(built.get_at((x, y)) == expected.get_at((x, y)) for x in range(50) for y in range(50))
+    assert not assets.get("photo").get_flags() & pygame.SRCALPHA # opaque, so converted without per-pixel alpha
+    assert len(os.listdir(tmp_path)) == 2
+    monkeypatch.setattr(asset_pipeline, "fit", None) # a second start loads the built images, nothing is scaled again
+    fresh = AssetRegistry(build_dir=str(tmp_path))
+    fresh.image("photo", resource_path("assets/images/williamdu.png"), (165, 165))
+    assert fresh.get("photo").get_size() == (165, 165)
+
+def test_texture_backend_draws_what_the_surface_backend_draws():
+    from game_states import MainMenu
+    from texture_rendering import TextureDisplay, TextureRenderer
+    try:
+        display = TextureDisplay((SCREEN_WIDTH, SCREEN_HEIGHT), GAME_TITLE, accelerated=False)
+    except (ImportError, pygame.error) as e:
+        pytest.skip(f"no SDL renderer: {e}")
+    menu = MainMenu(screen, User(0), None)
+    menu.render() # the surface backend
+    expected = screen.copy()
+    menu.renderer = TextureRenderer(display, screen, menu.renderer.background)
+    menu.render()
+    menu.render() # nothing changed, nothing uploaded again
+    assert display.uploads == 1 + len(menu.buttons)
+    frame = display.snapshot()
+    assert all(frame.get_at((x, y)) == expected.get_at((x, y)) for x in range(0, SCREEN_WIDTH, 3) for y in range(0, SCREEN_HEIGHT, 3))
+    button = menu.buttons[0]
+    texture = menu.renderer.sprites[button][1]
+    button.set_hovered(True)
+    menu.render()
+    assert menu.renderer.sprites[button][1] is texture # same size, overwritten in place rather than replaced
+    hovered = display.snapshot()
+    assert hovered.get_at(button.rect.center) != frame.get_at(button.rect.center)
+    display.close() # textures, renderer, then windows
+    assert display.renderer is None and not menu.renderer.sprites and menu.renderer.background_texture is None
+    display.close()
+
+def test_frame_pacer_slows_down_when_idle_or_minimized():
+    from frame_pacing import FramePacer
+    now = [0.0]
+    pacer = FramePacer(fps=60, idle_fps=10, hidden_fps=2, idle_after=30, clock=lambda: now[0], cpu_clock=lambda: now[0] / 4)
+    assert pacer.target_fps() == 60
+    now[0] = 31
+    assert pacer.mode == "idle" and pacer.target_fps() == 10
+    pacer.handle_events([pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0), rel=(1, 0), buttons=(0, 0, 0))])
+    assert pacer.target_fps() == 60 # input snaps back to full rate
+    pacer.handle_events([pygame.event.Event(pygame.WINDOWMINIMIZED)])
+    assert pacer.target_fps() == 2 and not pacer.should_render()
+    pacer.handle_events([pygame.event.Event(pygame.WINDOWRESTORED)])
+    assert pacer.should_render() and pacer.take_exposed() and not pacer.take_exposed()
+    clock = pygame.time.Clock()
+    pacer.measure_start, pacer.measure_cpu = now[0], now[0] / 4
+    for _ in range(4):
+        now[0] += 0.25
+        pacer.tick(clock)
+    assert pacer.fps == 4 and pacer.cpu_ms == 62.5
+
+if __name__ == "__main__":
+    report = run_differential()
+    print(f"Differential harness: {report['cases']} random users, {len(report['mismatches'])} mismatches")
+    for mismatch in report["mismatches"]:
+        print(f"  {mismatch}")
+    print(f"fast_forward took {report['fast_seconds'] * 1000:.2f} ms, frame stepping took {report['reference_seconds'] * 1000:.2f} ms"
+          f" ({report['speedup']:.0f}x faster)")
+
+
 # """Load user test"""
 # from game_logic import User
 # from save_loads import *
@@ -0,0 +1,86 @@
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+
+class TextLayout:
+    """
+    Wraps and renders paragraphs of text (the help pages) with everything cached:
+    each word's width per font, and each paragraph's wrapped and rendered lines per (text, font, colour, width).
+    A line break is found by binary search over the running width of the words, then checked against font.size
+    of the chosen line, as kerning can make a line a pixel or two narrower or wider than the sum of its words.
+    """
+    def __init__(self, max_paragraphs=128):
+        self.word_widths = {} # (font, word) -> width of "word " in that font
+        self.paragraphs = OrderedDict() # (text, font, colour, width) -> [rendered lines], least recently used first
+        self.max_paragraphs = max_paragraphs
+        self.measures = 0 # font.size calls made
+
+    def measure(self, font, text):
+        self.measures += 1
+        return font.size(text)[0]
+
+    def word_width(self, font, word):
+        width = self.word_widths.get((font, word))
+        if width is None:
+            width = self.word_widths[(font, word)] = self.measure(font, word + " ")
+        return width
+
+    def wrap(self, text, font, max_width):
+        """Splits text at spaces into the longest lines whose width (with a trailing space) is under max_width."""
+        words = text.split(" ")
+        ends = list(itertools.accumulate(self.word_width(font, word) for word in words)) # running width after each word
+        fits = lambda start, end: self.measure(font, " ".join(words[start:end]) + " ") < max_width
+        lines = []
+        start = 0
+        while start < len(words):
+            offset = ends[start - 1] if start else 0
+            end = max(bisect_left(ends, offset + max_width, lo=start), start + 1) # first word that no longer fits
+            while end > start + 1 and not fits(start, end):
+                end -= 1
+            while end < len(words) and fits(start, end + 1):
+                end += 1
+            lines.append(" ".join(words[start:end]))
+            start = end
+        return lines
+
+    def paragraph(self, text, font, colour, max_width):
+        """The paragraph's lines wrapped to max_width and rendered, built the first time they're asked for."""
+        key = (text, font, tuple(colour), max_width)
+        lines = self.paragraphs.get(key)
+        if lines is None:
+            lines = self.paragraphs[key] = [font.render(line, True, colour) for line in self.wrap(text, font, max_width)]
+            if len(self.paragraphs) > self.max_paragraphs:
+                self.paragraphs.popitem(last=False)
+        else:
+            self.paragraphs.move_to_end(key)
+        return lines
+
+
+TEXT_LAYOUT = TextLayout() # shared by every screen showing wrapped text
+
+
+class TextPage:
+    """
+    Rendered lines laid out down a page, as (surface, rect) with rect.y from the top of the page.
+    blits() returns only the lines inside a viewport for a scroll position, found by bisecting the line positions.
+    """
+    def __init__(self, lines, height):
+        self.lines = lines # in order down the page
+        self.tops = [rect.top for _, rect in lines]
+        self.bottoms = [rect.bottom for _, rect in lines]
+        self.height = height
+
+    def max_scroll(self, viewport):
+        return max(0, self.height - viewport.height)
+
+    def blits(self, viewport, scroll=0):
+        """(surface, screen position, area) for every line visible in viewport, cropped to it, for Surface.blits."""
+        first = bisect_right(self.bottoms, scroll) # first line ending below the top of the view
+        last = bisect_left(self.tops, scroll + viewport.height) # first line starting below the bottom of the view
+        blits = []
+        for surface, rect in self.lines[first:last]:
+            dest = rect.move(0, viewport.top - scroll)
+            visible = dest.clip(viewport)
+            blits.append((surface, visible.topleft, visible.move(-dest.x, -dest.y)))
+        return blits
@@ -0,0 +1,158 @@
+"""
+An optional render backend on SDL's renderer API (pygame._sdl2.video), picked with RENDER_BACKEND = "texture".
+
+Instead of blitting onto the display surface and flipping it, every frame is a list of texture copies:
+the state's static layer is uploaded once as a texture, and each widget's appearance is uploaded as its own
+texture the first time it's shown, then re-uploaded only when its visual_state() changes. With a GPU the copies
+are done by the graphics card; without one SDL's software renderer does them, so the backend works everywhere.
+
+The widgets themselves are unchanged: a widget's texture is made by drawing it onto a transparent canvas and
+uploading the area it covered. Code that draws onto "the screen" gets an offscreen surface (TextureDisplay.screen).
+"""
+import time
+import weakref
+from collections import OrderedDict
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError: # pygame built without the SDL2 renderer API, only the surface backend is available
+    video = None
+
+
+class TextureDisplay:
+    """
+    The game window and the SDL renderer drawing to it, shared by every state's TextureRenderer.
+    Raises pygame.error (or ImportError) if the renderer can't be created, the caller falls back to the surface backend.
+    close() frees it before SDL shuts down, it's registered with pygame.quit() so that happens however the game exits.
+    """
+    def __init__(self, size, title, accelerated=True):
+        if video is None:
+            raise ImportError("pygame._sdl2.video is not available")
+        # convert()/convert_alpha() need a display pixel format, the game window can't have a display surface as well as a renderer
+        self.format_window = video.Window(title, size=(1, 1), hidden=True)
+        self.format_window.get_surface()
+        self.window = video.Window(title, size=size)
+        try:
+            self.renderer = video.Renderer(self.window, accelerated=1 if accelerated else 0, vsync=False)
+        except Exception: # no GPU (or its driver failed), SDL's software renderer always works
+            self.renderer = video.Renderer(self.window, accelerated=0, vsync=False)
+        self.screen = pygame.Surface(size).convert() # offscreen, for code that draws onto the screen directly
+        self.canvas = pygame.Surface(size, pygame.SRCALPHA) # widgets are drawn here to be uploaded as textures
+        self.last_frame = None # TextureRenderer that presented last, see snapshot()
+        self.renderers = weakref.WeakSet() # TextureRenderers holding textures of this renderer, see close()
+        self.uploads = 0 # textures uploaded, made or overwritten
+        self.upload_pixels = 0
+        pygame.register_quit(self.close)
+
+    def upload(self, surface, texture=None):
+        """surface as a texture. texture, if given and the same size, is overwritten instead of making a new one."""
+        self.uploads += 1
+        self.upload_pixels += surface.get_width() * surface.get_height()
+        if texture is not None and (texture.width, texture.height) == surface.get_size():
+            texture.update(surface)
+            return texture
+        return video.Texture.from_surface(self.renderer, surface)
+
+    def close(self):
+        """
+        Frees the SDL objects in the order SDL needs: every renderer's textures, then the Renderer, then the windows.
+        Left to the garbage collector at exit they go in any order, possibly after SDL has shut down, which can crash.
+        Safe to call more than once, the display can't be drawn to afterwards.
+        """
+        if self.renderer is None:
+            return
+        for texture_renderer in list(self.renderers):
+            texture_renderer.release()
+        self.last_frame = None
+        self.renderer = None
+        for window in (self.window, self.format_window):
+            window.destroy()
+        self.window = self.format_window = None
+
+    def set_title(self, title):
+        self.window.title = title
+
+    def snapshot(self):
+        """The last frame shown as a surface (e.g. for the dimmed copy of the game under the settings menu)."""
+        if self.last_frame is None:
+            return self.screen
+        self.last_frame.draw_frame()
+        return self.renderer.to_surface()
+
+
+class TextureRenderer:
+    """
+    Drop-in for rendering.DirtyRectRenderer on the texture backend: render(widgets) draws the background texture
+    and one texture copy per widget, then presents. Nothing is redrawn on the CPU unless a widget changed.
+    """
+    def __init__(self, display, screen, background):
+        self.display = display
+        self.screen = screen
+        self.background = background # surface the frame starts from, uploaded when it's replaced or invalidated
+        self.background_texture = None # (surface it was uploaded from, texture)
+        self.sprites = weakref.WeakKeyDictionary() # widget -> (visual_state, texture, rect), dropped with the widget
+        self.frame = [] # (texture, rect) copies of the last frame, in order
+        self.stats = {"frames": 0, "seconds": 0.0, "copies": 0, "widget_uploads": 0}
+        display.renderers.add(self)
+
+    def release(self):
+        """Drops every texture this renderer holds, they're uploaded again if it renders another frame."""
+        self.sprites.clear()
+        self.background_texture = None
+        self.frame = []
+
+    def invalidate(self):
+        """Re-uploads the background next frame (it may have been drawn over in place), into the same texture."""
+        if self.background_texture is not None:
+            self.background_texture = (None, self.background_texture[1])
+
+    def widget_texture(self, widget):
+        """The widget's current appearance as (texture, rect), uploaded again only when its visual_state() changed."""
+        state = widget.visual_state()
+        cached = self.sprites.pop(widget, None) # a changed widget's old texture is reused or dropped, never kept alongside
+        if cached is not None and cached[0] == state:
+            self.sprites[widget] = cached
+            return cached[1:]
+        bounds = widget.get_bounds()
+        canvas = self.display.canvas
+        bounds = pygame.Rect(bounds).clip(canvas.get_rect()) if bounds is not None else None
+        if not bounds:
+            self.sprites[widget] = (state, None, None)
+            return None, None
+        canvas.set_clip(bounds)
+        canvas.fill((0, 0, 0, 0), bounds)
+        widget.draw(canvas)
+        canvas.set_clip(None)
+        texture = self.display.upload(canvas.subsurface(bounds), cached[1] if cached is not None else None) # overwritten if it's the same size
+        self.sprites[widget] = (state, texture, bounds)
+        self.stats["widget_uploads"] += 1
+        return texture, bounds
+
+    def render(self, widgets, extra_dirty=()):
+        """Draws and presents a frame. extra_dirty is accepted for DirtyRectRenderer compatibility, every frame is complete."""
+        start = time.perf_counter()
+        self.frame = [] # the last frame's copies don't keep replaced textures alive
+        if self.background_texture is None or self.background_texture[0] is not self.background:
+            old = self.background_texture[1] if self.background_texture is not None else None
+            self.background_texture = (self.background, self.display.upload(self.background, old))
+        frame = [(self.background_texture[1], self.background.get_rect())]
+        for widget in widgets:
+            texture, rect = self.widget_texture(widget)
+            if texture is not None:
+                frame.append((texture, rect))
+        self.frame = frame
+        self.draw_frame()
+        self.display.renderer.present()
+        self.display.last_frame = self
+        self.stats["frames"] += 1
+        self.stats["seconds"] += time.perf_counter() - start
+        self.stats["copies"] += len(frame)
+        return [self.screen.get_rect()]
+
+    def draw_frame(self):
+        for texture, rect in self.frame:
+            texture.draw(dstrect=rect)
+
+    def frame_costs(self):
+        return {"texture_ms": self.stats["seconds"] / self.stats["frames"] * 1000 if self.stats["frames"] else None}
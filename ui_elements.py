@@ -1,18 +1,71 @@
 import pygame
 from game_constants import *  # Import constants from game_constants.py
+from render_cache import TEXT_CACHE, get_glyph_atlas # shared caches of rendered text surfaces and glyphs
 from typing import Tuple # Import Tuple for type hinting
+from abc import ABC, abstractmethod
+import math
 
 
-class Button: # global button class
+def bounding_rect(*rects):
+    """Smallest whole-pixel Rect covering every given Rect/FRect, padded by a pixel for rounding."""
+    left = math.floor(min(r.left for r in rects)) - 1
+    top = math.floor(min(r.top for r in rects)) - 1
+    right = math.ceil(max(r.right for r in rects)) + 1
+    bottom = math.ceil(max(r.bottom for r in rects)) + 1
+    return pygame.Rect(left, top, right - left, bottom - top)
+
+
+NOT_DRAWN = object() # drawn_state of a widget that hasn't been drawn yet
+
+class Widget(ABC):
+    """
+    Base class for ui elements, lets each element report when what it draws has changed
+    so the dirty-rect renderer only redraws the parts of the screen that need it.
+    Subclasses provide visual_state() (anything that affects what gets drawn) and get_bounds() (None if nothing is drawn).
+    """
+    drawn_state = NOT_DRAWN # visual state when the widget was last drawn
+    drawn_bounds = None # screen area it covered when last drawn
+
+    @abstractmethod
+    def visual_state(self):
+        """Anything that affects what draw() puts on screen, compared between frames."""
+
+    @abstractmethod
+    def get_bounds(self):
+        """The screen area draw() covers, None if it draws nothing."""
+
+    @abstractmethod
+    def draw(self, screen):
+        pass
+
+    def is_static(self):
+        """True if the widget always looks the same, so it can be pre-drawn into a screen's static layer."""
+        return False
+
+    def check_dirty(self):
+        """Returns the screen area to redraw if the widget's visual output changed since it was last drawn, else None."""
+        state = self.visual_state()
+        if state == self.drawn_state:
+            return None
+        bounds = self.get_bounds()
+        areas = [rect for rect in (bounds, self.drawn_bounds) if rect is not None] # erase the old area, draw the new one
+        self.drawn_state, self.drawn_bounds = state, bounds
+        return areas[0].unionall(areas[1:]) if areas else None
+
+
+class Button(Widget): # global button class
     """
     This is the button class that handles the button creation and rendering.
     It is a simple class that takes in the x, y, width, height, text, colour, font, text_colour, callback and display callback functions and returns an object out of it.
     It handles its own rendering, clicking, hovering and any other events needed through callbacks and lambdas.
+    Each appearance (text, hovered or not) is pre-rendered once into a sprite, so drawing is a single blit.
     """
+    SPRITE_CACHE_SIZE = 8 # sprites kept per button, e.g. "Buy"/"Locked"/"Owned" each in both hover states
+
     def __init__(self, x: int, y: int, width: int, height: int, 
                  text: str, colour: Tuple[int, int, int], 
                  font: pygame.font.Font, text_colour: Tuple[int, int, int], 
-                 callback=None, display_callback=None, icon_image=None, button_id=str, border_radius=30): # callback is a function that is called when the button is clicked
+                 callback=None, display_callback=None, icon_image=None, hover_icon_image=None, button_id=str, border_radius=30): # callback is a function that is called when the button is clicked
         self.rect = pygame.Rect(x, y, width, height)
         self.rect_shadow = pygame.Rect(x+2, y+4, width, height)
         self.text = text
@@ -25,28 +78,31 @@ class Button: # global button class
         self.display_callback = display_callback # for displays requiring dynamic updates
         self.id = button_id # unique identifier
         self.icon_image = icon_image  # Optional icon image for the button
-        self.hover_icon_image = None
-        if self.icon_image:
+        self.hover_icon_image = hover_icon_image # pre-built by the asset build step, else made here
+        if self.icon_image and not self.hover_icon_image:
             self.create_hover_icon()
         self.border_radius = border_radius
+        self.hovered = False # set by set_hovered()
+        self.sprites = {} # sprite_key() -> pre-rendered (surface, offset), see get_sprite()
 
     def create_hover_icon(self): # creates a greyed-out version of the icon for hover effects
         if self.icon_image:
             self.hover_icon_image = self.icon_image.copy()
             self.hover_icon_image.fill(GRAY, special_flags=pygame.BLEND_RGB_MULT)
 
-    def draw(self, screen: pygame.Surface): # draws the button on the screen
+    def current_text(self):
         if self.display_callback: # if display_callback is set, use it to get the text.
             self.text = self.display_callback()
-        pygame.draw.rect(screen, self.shadow_colour, self.rect_shadow, border_radius=self.border_radius) # draw the shadow
-        pygame.draw.rect(screen, self.colour, self.rect, border_radius=self.border_radius) # draw the button
-        
-        text_surf = self.font.render(self.text, True, self.text_colour)
-        text_rect = text_surf.get_rect()
+        return self.text
+
+    def layout(self):
+        """Works out what to draw and where: returns (text_surf, text_rect, icon, icon_rect), text_surf/icon may be None."""
+        text_surf = TEXT_CACHE.render(self.font, self.text, self.text_colour) if self.text else None
+        text_rect = text_surf.get_rect() if text_surf else None
+        current_icon = icon_rect = None
 
         if self.icon_image:
-            is_hovered = self.is_hovered(pygame.mouse.get_pos())
-            current_icon = self.hover_icon_image if is_hovered and self.hover_icon_image else self.icon_image
+            current_icon = self.hover_icon_image if self.hovered and self.hover_icon_image else self.icon_image
             icon_rect = current_icon.get_rect()
 
             if self.text:
@@ -60,30 +116,72 @@ class Button: # global button class
                 
                 text_rect.x = icon_rect.right + padding
                 text_rect.centery = self.rect.centery
-
-                screen.blit(current_icon, icon_rect)
-                screen.blit(text_surf, text_rect)
             else:
                 icon_rect.center = self.rect.center
-                screen.blit(current_icon, icon_rect)
         elif self.text:
             text_rect.center = self.rect.center
-            screen.blit(text_surf, text_rect)
+        return text_surf, text_rect, current_icon, icon_rect
+
+    def sprite_key(self):
+        """Everything the button's appearance depends on, apart from its position."""
+        return (self.current_text(), self.hovered, tuple(self.colour), tuple(self.text_colour), self.rect.size)
+
+    def get_sprite(self):
+        """
+        The button's current appearance pre-rendered into one surface, as (surface, offset from rect.topleft).
+        Built the first time each text/hover combination is shown, so drawing the button is a single blit.
+        """
+        key = self.sprite_key()
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self.render_sprite()
+            if len(self.sprites) > self.SPRITE_CACHE_SIZE:
+                del self.sprites[next(iter(self.sprites))] # drop the oldest, e.g. a price the button no longer shows
+        return sprite
+
+    def render_sprite(self):
+        text_surf, text_rect, current_icon, icon_rect = self.layout()
+        bounds = bounding_rect(*[r for r in (self.rect, self.rect_shadow, text_rect, icon_rect) if r is not None]) # text can spill past the button
+        surface = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        offset = (-bounds.x, -bounds.y)
+        pygame.draw.rect(surface, self.shadow_colour, self.rect_shadow.move(offset), border_radius=self.border_radius) # draw the shadow
+        pygame.draw.rect(surface, self.colour, self.rect.move(offset), border_radius=self.border_radius) # draw the button
+        if current_icon:
+            surface.blit(current_icon, icon_rect.move(offset))
+        if text_surf:
+            surface.blit(text_surf, text_rect.move(offset))
+        return surface, (bounds.x - self.rect.x, bounds.y - self.rect.y)
+
+    def draw(self, screen: pygame.Surface): # draws the button on the screen
+        surface, (dx, dy) = self.get_sprite()
+        screen.blit(surface, (self.rect.x + dx, self.rect.y + dy))
+
+    def visual_state(self):
+        return self.sprite_key() + (self.rect.topleft,)
+
+    def get_bounds(self):
+        surface, (dx, dy) = self.get_sprite()
+        return surface.get_rect(topleft=(self.rect.x + dx, self.rect.y + dy))
     
     def is_hovered(self, pos): # checks if the mouse is hovering over any rect
         return self.rect.collidepoint(pos) 
     
     def click(self):
         """Calls the callback function when the button is clicked"""
-        BUTTON_PRESS_SOUND.play() # play the button press sound
+        ASSETS.get(BUTTON_PRESS_SOUND).play() # play the button press sound
         if self.callback:
             return self.callback() 
         return None
 
     def animations(self, pos):
         """Handles button animations, e.g. hover effects, click effects, etc."""
-        self.colour = BUTTON_HOVER_COLOUR if self.is_hovered(pos) else self.initial_colour  # Change colour on hover
-        self.text_colour = GRAY if self.is_hovered(pos) else WHITE
+        self.set_hovered(self.is_hovered(pos))
+
+    def set_hovered(self, hovered):
+        """Called by the hit-test index when the mouse enters or leaves the button."""
+        self.hovered = hovered
+        self.colour = BUTTON_HOVER_COLOUR if hovered else self.initial_colour  # Change colour on hover
+        self.text_colour = GRAY if hovered else WHITE
 
 class NavButton(Button):
     """Child class of Buttons for the navigation buttons in the game menu."""
@@ -97,12 +195,13 @@ class NavButton(Button):
         )
 
             
-class CreateFrect:
+class CreateFrect(Widget):
     """
     Handles creation of frects for static/dynamic displays of text, or ui elements around screens. 
     Images are centered within the frect, and text is centered within the frect.
+    Set glyphs=True for numeric labels that change every frame, they are then composed from a cached glyph atlas.
     """
-    def __init__(self, x, y, width, height, bg_colour=None, id=None, display=None, font=None, font_colour=None, image=None, display_callback=None, border_radius=0, click_effect = None):
+    def __init__(self, x, y, width, height, bg_colour=None, id=None, display=None, font=None, font_colour=None, image=None, display_callback=None, border_radius=0, click_effect = None, glyphs=False):
         self.frect = pygame.FRect(x, y, width, height)
         self.bg_colour = bg_colour
         self.image = None
@@ -114,6 +213,7 @@ class CreateFrect:
         self.image = image
         self.border_radius = border_radius # Added border_radius
         self.click_effect = click_effect # for frects requiring a click effect
+        self.glyphs = glyphs # compose the text from cached glyphs instead of rendering the whole string
         self.shadow_colour = None
         if self.bg_colour:
             self.frect_shadow = pygame.FRect(x+2, y+4, width, height)
@@ -124,6 +224,33 @@ class CreateFrect:
             except (ValueError, TypeError):
                 self.shadow_colour = None
 
+    def get_display(self):
+        """The text currently shown in the frect, or None if it has no text."""
+        if not (self.font and self.font_colour):
+            return None
+        return str(self.display_callback() if self.display_callback else self.display)
+
+    def visual_state(self):
+        return (self.get_display(), self.font_colour, self.bg_colour, id(self.image), tuple(self.frect))
+
+    def is_static(self):
+        return self.display_callback is None # without a callback the text never changes
+
+    def get_bounds(self):
+        rects = [self.frect]
+        if self.bg_colour is not None and self.shadow_colour:
+            rects.append(self.frect_shadow)
+        if self.image:
+            rects.append(self.image.get_rect(center=self.frect.center))
+        display = self.get_display()
+        if display is not None: # text is centred and can spill out of the frect
+            if self.glyphs:
+                text_size = get_glyph_atlas(self.font, self.font_colour).size(display)
+            else:
+                text_size = TEXT_CACHE.render(self.font, display, self.font_colour).get_size()
+            rects.append(pygame.FRect((0, 0), text_size).move_to(center=self.frect.center))
+        return bounding_rect(*rects)
+
     def render_text(self, position="center", display=None): # render text inside the frect
         position_bank = {
         "center": "center",
@@ -142,7 +269,7 @@ class CreateFrect:
                 display = self.display_callback()
             else:
                 display = display if display is not None else self.display # if display is None, use the default display value
-            text_surface = self.font.render(str(display), True, self.font_colour)
+            text_surface = TEXT_CACHE.render(self.font, str(display), self.font_colour)
             text_surface_rect = text_surface.get_rect()
             
             if position in position_bank:
@@ -168,7 +295,38 @@ class CreateFrect:
             screen.blit(self.image, image_rect)
 
         # render text if applicable
+        if self.glyphs and self.font and self.font_colour:
+            self.draw_glyphs(screen)
+            return
         text_surface, text_rect = self.render_text()
         if text_surface and text_rect:
             screen.blit(text_surface, text_rect)
 
+    def draw_glyphs(self, screen):
+        """Draws the text centred in the frect by blitting pre-rendered glyphs, no font.render per frame."""
+        atlas = get_glyph_atlas(self.font, self.font_colour)
+        text = self.get_display()
+        text_rect = pygame.Rect((0, 0), atlas.size(text))
+        text_rect.center = self.frect.center
+        atlas.blit(screen, text, text_rect.topleft)
+
+
+
+class Panel:
+    """
+    An overlay panel of the game menu (the shop, the upgrades): one header shared by the whole panel
+    (title, money, income, exit button and any extra labels) and the rows, which only hold their own widgets.
+    """
+    def __init__(self, name, header, rows):
+        self.name = name
+        self.header = header # name -> widget, drawn above the rows
+        self.rows = rows # virtual_list.VirtualList, its slots hold each row's widgets in drawing order
+
+    def get_widgets(self):
+        """Every widget on screen in the panel, back to front: the visible rows, then the header."""
+        widgets = [widget for row in self.rows.visible_slots() for widget in row.values() if isinstance(widget, Widget)]
+        widgets.extend(self.header.values())
+        return widgets
+
+    def get_buttons(self):
+        return [widget for widget in self.get_widgets() if isinstance(widget, Button)]
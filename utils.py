@@ -1,6 +1,7 @@
 from game_constants import *
 from game_logic import User
-from ui_elements import CreateFrect
+from events import CYCLE_COMPLETED
+from ui_elements import CreateFrect, Widget, bounding_rect, NOT_DRAWN
 import os
 import random
 import pygame
@@ -35,50 +36,53 @@ def format_large_number(num):
     else:
         return f"{formatted_num}e{magnitude*3}" # if the number is too large, return it in scientific notation
  
-def simulate_offline_progress(user): # simulate offline progress for the user
+def fast_forward(user, seconds):
+    """
+    Advances every generator by the given number of seconds in one go, working out whole cycles
+    arithmetically instead of frame by frame. Gives the same result as calling user.update() every frame
+    for the same amount of time (tests.py checks this). Returns the money earned.
+    """
+    earned = 0
+    for gen_id, gen in user.generators.items():
+        if gen.amount > 0 and (gen.is_generating or gen.id in user.managers): # if the generator is owned and is generating or has a manager
+            remaining_time_for_gen = seconds # the time left to simulate for this generator
+
+            if not gen.is_generating: # managed but idle, start a new cycle straight away
+                gen.start_generation_cycle(user.generators)
+
+            if gen.time_progress > remaining_time_for_gen: # the current cycle doesn't finish in time
+                gen.time_progress -= remaining_time_for_gen
+                continue
+
+            earned += gen.cycle_output # Add money for the cycle that was in progress
+            remaining_time_for_gen -= gen.time_progress # subtract the time it took to finish
+            gen.is_generating = False # reset the generating state
+
+            if gen.id in user.managers: # managed generators restart and run subsequent cycles
+                gen.start_generation_cycle(user.generators) # start a new cycle, time_progress is now the effective time
+                effective_time_for_cycle = gen.time_progress
+                num_full_cycles = int(remaining_time_for_gen // effective_time_for_cycle) # the number of full cycles that can be completed
+                if num_full_cycles > 0:
+                    earned += gen.cycle_output * num_full_cycles # add money for the full cycles
+                    remaining_time_for_gen -= num_full_cycles * effective_time_for_cycle
+                gen.time_progress -= remaining_time_for_gen # progress of the current (new) cycle
+                user.events.publish(CYCLE_COMPLETED, gen, new=gen.cycle_output, count=1 + num_full_cycles)
+            else:
+                user.events.publish(CYCLE_COMPLETED, gen, new=gen.cycle_output)
+    user.money += earned
+    return earned
+
+def simulate_offline_progress(user, time_elapsed_offline=None): # simulate offline progress for the user
     """
     Simulates the progress of the user's generators when the game is offline.
+    The time elapsed is read from the save file unless given.
     """
-    from save_loads import SaveStates
     try: # Load user data from save file
-        
-        time_elapsed_offline = SaveStates.time_elapsed()
+        if time_elapsed_offline is None:
+            from save_loads import SaveStates
+            time_elapsed_offline = SaveStates.time_elapsed()
         print(f"\nTime elapsed when offline:  {time_elapsed_offline}s") if DEBUG_MODE else None
-        lets_see = 0
-        for gen_id, gen in user.generators.items():
-            if gen.amount > 0 and (gen.is_generating or gen.id in user.managers): # if the generator is owned and is generating or has a manager
-                remaining_offline_time_for_gen = time_elapsed_offline # the time elapsed since the last save
-                effective_time_for_cycle = gen.get_effective_time(user.generators) # the effective time for a cycle
-
-                if gen.is_generating: # Cycle was in progress
-                    if gen.time_progress <= remaining_offline_time_for_gen: # if the cycle was in progress and the time elapsed is greater than the time progress
-                        user.money += gen.cycle_output # Add money for this completed cycle
-                        lets_see += gen.cycle_output # for debugging
-                        remaining_offline_time_for_gen -= gen.time_progress # subtract the time progress from the remaining time
-                        gen.is_generating = False # reset the generating state
-                    else:
-                        gen.time_progress -= remaining_offline_time_for_gen # subtract the remaining time from the time progress
-                        remaining_offline_time_for_gen = 0 # reset the remaining time
-                
-                # If managed, or if a cycle just finished, and there's time left, run subsequent cycles
-                if (gen.id in user.managers or not gen.is_generating) and remaining_offline_time_for_gen > 0: # if the generator is managed or not generating and there is time left
-                    if not gen.is_generating and gen.id in user.managers: # if the generator is not generating and is managed
-                        gen.start_generation_cycle(user.generators) # start a new cycle
-                    
-                    if gen.is_generating: # if the generator is generating
-                        num_full_cycles_offline = int(remaining_offline_time_for_gen // effective_time_for_cycle) # the number of full cycles that can be completed
-                        if num_full_cycles_offline > 0: # if there are full cycles
-                            user.money += gen.cycle_output * num_full_cycles_offline # add money for the full cycles
-                            lets_see += gen.cycle_output * num_full_cycles_offline # for debugging
-                            remaining_offline_time_for_gen -= num_full_cycles_offline * effective_time_for_cycle # subtract the effective time for the full cycles from the remaining time
-                        
-                        # Update progress of the current (potentially new) cycle
-                        if remaining_offline_time_for_gen > 0: # if there is time left
-                            gen.time_progress -= remaining_offline_time_for_gen # subtract the remaining time from the time progress
-                        else: # if all time used up by full cycles
-                            gen.is_generating = False # reset the generating state
-                            if gen.id in user.managers: # if the generator is managed   
-                                gen.start_generation_cycle(user.generators) # restart the cycle
+        lets_see = fast_forward(user, time_elapsed_offline) # for debugging
         print(f"\nOffline progress added: ${lets_see}") if DEBUG_MODE else None
 
     except Exception as e:
@@ -212,82 +216,84 @@ class Music:
         return instance
 
 
-def tutorial_progress(user, screen, game_menu):
-    """
-    Handles the display of contextual tutorial hints to guide new players.
+TUTORIAL_FONT = get_font(LOGO_FONT, 22) # loaded once, not every time a hint is laid out
+TUTORIAL_STEPS = ("first_generator", "first_manual_generation", "first_manager", "help_menu_opened", "first_upgrade")
+_oriented_arrows = {} # arrow_pos -> tutorial_arrow flipped/rotated to point the right way
 
-    This function checks the user's tutorial progress state and displays arrows
-    and text to point them towards the next key action, such as buying their
-    first generator, generating manually, hiring a manager, or purchasing an upgrade.
-    
+def get_tutorial_arrow(arrow_pos):
+    arrow_img = _oriented_arrows.get(arrow_pos)
+    if arrow_img is not None:
+        return arrow_img
+    arrow_img = ASSETS.get("tutorial_arrow") # base arrow points right '->'
+    if arrow_pos == 'right':
+        # needs to point left '<-'
+        arrow_img = pygame.transform.flip(arrow_img, True, False)
+    elif arrow_pos == 'top':
+        # needs to point down 'v'
+        arrow_img = pygame.transform.rotate(arrow_img, -90)
+    elif arrow_pos == 'bottom':
+        # needs to point up '^'
+        arrow_img = pygame.transform.rotate(arrow_img, 90)
+    _oriented_arrows[arrow_pos] = arrow_img
+    return arrow_img
+
+def layout_tutorial_hint(target_rect, text, arrow_pos='left'):
     """
-    def draw_tutorial_hint(screen, target_rect, text, arrow_pos='left'):
-        """
-        Draws a tutorial arrow and text hint pointing to a specific UI element.
-        This is a helper function to keep the main tutorial logic cleaner.
-        """
-        arrow_img = tutorial_arrow # the arrow image
-        text_font = pygame.font.Font(LOGO_FONT, 22) 
-        text_surf_temp = text_font.render(text, True, WHITE) # render the text
-        text_rect_temp = text_surf_temp.get_rect() # get the rectangle of the text
-
-        hint_frect = CreateFrect(
-            x=0, y=0, width=text_rect_temp.width + 40,
-            height=text_rect_temp.height + 40, 
-            bg_colour=BLACK,
-            font=text_font,
-            font_colour=WHITE,
-            display=text
-            )
-        hint_frect.shadow_colour = None # no shadow for tutorial hints
-
-        # base arrow points right '->'
-        if arrow_pos == 'right':
-            # needs to point left '<-'
-            arrow_img = pygame.transform.flip(arrow_img, True, False)
-        elif arrow_pos == 'top':
-            # needs to point down 'v'
-            arrow_img = pygame.transform.rotate(arrow_img, -90)
-        elif arrow_pos == 'bottom':
-            # needs to point up '^'
-            arrow_img = pygame.transform.rotate(arrow_img, 90)
-
-        arrow_rect = arrow_img.get_rect() # get the rectangle of the arrow
-
-            # position hint and arrow
-        if arrow_pos == 'left': # if the arrow is pointing left
-            arrow_rect.right = target_rect.left - 10
-            arrow_rect.centery = target_rect.centery
-            hint_frect.frect.right = arrow_rect.left - 10
-            hint_frect.frect.centery = arrow_rect.centery
-        elif arrow_pos == 'right': # if the arrow is pointing right
-            arrow_rect.left = target_rect.right + 10
-            arrow_rect.centery = target_rect.centery
-            hint_frect.frect.left = arrow_rect.right + 10
-            hint_frect.frect.centery = arrow_rect.centery
-        
-        hint_frect.draw(screen)
-        screen.blit(arrow_img, arrow_rect)
+    Works out the text box and arrow of a tutorial hint pointing to a specific UI element.
+    Returns (hint_frect, arrow_img, arrow_rect).
+    """
+    text_width, text_height = TUTORIAL_FONT.size(text) # size of the rendered text
+
+    hint_frect = CreateFrect(
+        x=0, y=0, width=text_width + 40,
+        height=text_height + 40, 
+        bg_colour=BLACK,
+        font=TUTORIAL_FONT,
+        font_colour=WHITE,
+        display=text
+        )
+    hint_frect.shadow_colour = None # no shadow for tutorial hints
 
+    arrow_img = get_tutorial_arrow(arrow_pos)
+    arrow_rect = arrow_img.get_rect() # get the rectangle of the arrow
 
+        # position hint and arrow
+    if arrow_pos == 'left': # if the arrow is pointing left
+        arrow_rect.right = target_rect.left - 10
+        arrow_rect.centery = target_rect.centery
+        hint_frect.frect.right = arrow_rect.left - 10
+        hint_frect.frect.centery = arrow_rect.centery
+    elif arrow_pos == 'right': # if the arrow is pointing right
+        arrow_rect.left = target_rect.right + 10
+        arrow_rect.centery = target_rect.centery
+        hint_frect.frect.left = arrow_rect.right + 10
+        hint_frect.frect.centery = arrow_rect.centery
+    return hint_frect, arrow_img, arrow_rect
+
+def get_tutorial_hint(user, game_menu):
+    """
+    Checks the user's tutorial progress state and picks the hint to show, pointing them towards the next key action,
+    such as buying their first generator, generating manually, hiring a manager, or purchasing an upgrade.
+    Returns (target_rect, text, arrow_pos), or None if no hint should be shown.
+    """
     # Stage 1: Guide the player to buy their first generator.
     if not user.tutorial_state.get('first_generator'):
         first_gen_proto = GENERATOR_PROTOTYPES['g1']
-        if user.money >= first_gen_proto['base_price'] and len(game_menu.rows) > 0:
+        first_gen_row = game_menu.generator_list.slot_for('g1') # None if scrolled out of view
+        if user.money >= first_gen_proto['base_price'] and first_gen_row is not None:
             if game_menu.active_panel is None:
-                first_gen_row = game_menu.rows[0]
                 buy_button_rect = first_gen_row['buy'].rect
                 # The first generator is on the left side, so point from the right.
-                draw_tutorial_hint(screen, buy_button_rect, "Buy, and keep buying your first generator!", 'right')
-        return
+                return buy_button_rect, "Buy, and keep buying your first generator!", 'right'
+        return None
 
     # Stage 1.5: After buying the first generator, teach manual generation and tell them to keep buying generators and keep clicking
     if user.tutorial_state.get('first_generator') and not user.tutorial_state.get('first_manual_generation'):
-        if game_menu.active_panel is None: # 
-            first_gen_row = game_menu.rows[0]
+        first_gen_row = game_menu.generator_list.slot_for('g1')
+        if game_menu.active_panel is None and first_gen_row is not None:
             icon_rect = first_gen_row['icon'].frect
-            draw_tutorial_hint(screen, icon_rect, "Keep on clicking on me to generate!", 'right')
-        return
+            return icon_rect, "Keep on clicking on me to generate!", 'right'
+        return None
 
     # Stage 2: Once manual generation is understood, introduce managers for automation.
     if user.tutorial_state.get('first_manual_generation') and not user.tutorial_state.get('first_manager'):
@@ -297,21 +303,23 @@ def tutorial_progress(user, screen, game_menu):
             if game_menu.active_panel != 'shop':
                 # If not in the shop, point to the 'Managers' navigation button.
                 manager_button = game_menu.nav_buttons[0] # 'Managers' button
-                draw_tutorial_hint(screen, manager_button.rect, "Automatically generate with a manager!", 'right')
+                return manager_button.rect, "Automatically generate with a manager!", 'right'
             else:
                 # If in the shop, point to the buy button for the first manager.
-                first_manager_row = game_menu.shop_rows[0]
+                first_manager_row = game_menu.panels["shop"].rows.slot_for('g1')
+                if first_manager_row is None: # scrolled out of view
+                    return None
                 buy_button_rect = first_manager_row['btn'].rect
-                draw_tutorial_hint(screen, buy_button_rect, "Buy me! I will click for you!", 'left')
-        return
+                return buy_button_rect, "Buy me! I will click for you!", 'left'
+        return None
     
     # Stage 2.5: Introduce the help menu
     if not user.tutorial_state.get('help_menu_opened'):
         if user.tutorial_state.get('first_manager'):
             if game_menu.active_panel is None: 
                 help_menu_btn_rect = game_menu.nav_buttons[3]
-                draw_tutorial_hint(screen, help_menu_btn_rect.rect, "Click here if you need help!", "right")
-        return   
+                return help_menu_btn_rect.rect, "Click here if you need help!", "right"
+        return None
 
     # Stage 3: After the first manager, introduce upgrades to boost income.
     if not user.tutorial_state.get('first_upgrade'):
@@ -321,11 +329,88 @@ def tutorial_progress(user, screen, game_menu):
                 if game_menu.active_panel != 'upgrades':
                     # If not in the upgrades panel, point to the 'Upgrades' navigation button.
                     upgrades_button = game_menu.nav_buttons[1] # 'Upgrades' button
-                    draw_tutorial_hint(screen, upgrades_button.rect, "Time to upgrade!", 'right')
+                    return upgrades_button.rect, "Time to upgrade!", 'right'
                 else:
                     # If in the upgrades panel, point to the first upgrade's buy button.
-                    first_upgrade_row = game_menu.upgrades_rows[0]
+                    first_upgrade_row = game_menu.panels["upgrades"].rows.slot_for('g1')
+                    if first_upgrade_row is None: # scrolled out of view
+                        return None
                     buy_button_rect = first_upgrade_row['btn'].rect
-                    draw_tutorial_hint(screen, buy_button_rect, "Boost your income!", 'left')
-    
+                    return buy_button_rect, "Boost your income!", 'left'
+    return None
+
+def tutorial_hint_inputs(user, game_menu):
+    """
+    Everything get_tutorial_hint() depends on, reduced to what can change its result: the tutorial flags, the open panel,
+    whether the first generator is owned and which of the tutorial's prices the money is over. None once the tutorial is done.
+    """
+    state = user.tutorial_state
+    flags = tuple(bool(state.get(step)) for step in TUTORIAL_STEPS)
+    if all(flags):
+        return None
+    g1 = user.generators.get('g1')
+    thresholds = (GENERATOR_PROTOTYPES['g1']['base_price'], MANAGER_PROTOTYPES['g1']['cost'],
+                  g1.get_next_revenue_multiplier_price() if g1 else float('inf'))
+    return (flags, game_menu.active_panel, g1 is not None and g1.amount > 0, tuple(user.money >= price for price in thresholds))
+
+
+class TutorialOverlay(Widget):
+    """
+    The game menu's tutorial hint. The hint is only re-picked when tutorial_hint_inputs() changes (a tutorial step is done,
+    a panel opens or the money crosses one of the tutorial's prices), and each hint's text box and arrow are pre-rendered
+    into one surface the first time it is shown. Call invalidate() after the game menu's layout changes.
+    """
+    def __init__(self, user, game_menu):
+        self.user = user
+        self.game_menu = game_menu
+        self.inputs = NOT_DRAWN # tutorial_hint_inputs() when the hint was last picked
+        self.hint = None # (target_rect, text, arrow_pos)
+        self.sprites = {} # (target rect, text, arrow_pos) -> (surface, topleft)
+
+    def invalidate(self):
+        """Re-picks the hint and recomputes its position next frame."""
+        self.inputs = NOT_DRAWN
+        self.sprites.clear()
+
+    def update_hint(self):
+        inputs = tutorial_hint_inputs(self.user, self.game_menu)
+        if inputs != self.inputs:
+            self.inputs = inputs
+            self.hint = get_tutorial_hint(self.user, self.game_menu) if inputs is not None else None
+        return self.hint
+
+    def get_sprite(self):
+        """The current hint's text box and arrow as one pre-rendered (surface, topleft), or None if there's no hint."""
+        if self.hint is None:
+            return None
+        target_rect, text, arrow_pos = self.hint
+        key = (tuple(target_rect), text, arrow_pos)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            hint_frect, arrow_img, arrow_rect = layout_tutorial_hint(target_rect, text, arrow_pos)
+            bounds = bounding_rect(hint_frect.get_bounds(), arrow_rect)
+            surface = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            hint_frect.frect.move_ip(-bounds.x, -bounds.y) # draw relative to the sprite
+            hint_frect.draw(surface)
+            surface.blit(arrow_img, arrow_rect.move(-bounds.x, -bounds.y))
+            sprite = self.sprites[key] = (surface, bounds.topleft)
+        return sprite
+
+    def visual_state(self):
+        hint = self.update_hint()
+        if hint is None:
+            return None
+        target_rect, text, arrow_pos = hint
+        return (tuple(target_rect), text, arrow_pos)
+
+    def get_bounds(self):
+        sprite = self.get_sprite()
+        if sprite is None:
+            return None
+        surface, topleft = sprite
+        return surface.get_rect(topleft=topleft)
 
+    def draw(self, screen):
+        sprite = self.get_sprite()
+        if sprite:
+            screen.blit(*sprite)
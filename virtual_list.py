@@ -0,0 +1,62 @@
+import math
+import pygame
+from game_constants import *
+
+
+class VirtualList:
+    """
+    A scrolling window over a catalog (generators, managers, upgrades) that may be longer than the screen.
+    Only the visible window has widgets: one slot per visible position, built once, at a fixed place on screen.
+    Scrolling hands each slot a different catalog entry instead of creating or moving widgets, so a frame costs
+    the same with 10 entries or 1,000. It scrolls by whole rows, so no slot is ever partly outside the viewport.
+
+    A slot is a dict of widgets plus "item", the catalog entry it shows (None past the end of the catalog).
+    build_slot(slot, index) fills in a new slot's widgets, assign_slot(slot, item) points them at an entry.
+    Widgets showing per-entry values must read them through the slot, as the entry changes under them.
+    """
+    def __init__(self, items, viewport, row_height, build_slot, assign_slot, columns=1):
+        self.items = list(items) # the catalog, e.g. generator ids
+        self.viewport = pygame.Rect(viewport) # area the rows fill, the mouse wheel scrolls the list over it
+        self.row_height = row_height
+        self.columns = columns
+        self.visible_rows = max(1, self.viewport.height // row_height)
+        self.assign_slot = assign_slot
+        self.first_row = 0 # catalog row shown in the top row of slots
+        self.slots = []
+        for index in range(self.visible_rows * columns): # reading order: left to right, then down
+            slot = {"item": None}
+            build_slot(slot, index)
+            self.slots.append(slot)
+        self.assign()
+
+    @property
+    def max_first_row(self):
+        return max(0, math.ceil(len(self.items) / self.columns) - self.visible_rows)
+
+    def assign(self):
+        """Hands every slot the catalog entry now at its position."""
+        start = self.first_row * self.columns
+        for index, slot in enumerate(self.slots):
+            item = self.items[start + index] if start + index < len(self.items) else None
+            slot["item"] = item
+            self.assign_slot(slot, item)
+
+    def scroll(self, rows):
+        """Scrolls by a number of rows (negative is up), clamped to the catalog. Returns True if the window moved."""
+        first_row = min(max(self.first_row + rows, 0), self.max_first_row)
+        if first_row == self.first_row:
+            return False
+        self.first_row = first_row
+        self.assign()
+        return True
+
+    def visible_slots(self):
+        """The slots showing a catalog entry, the rest are left out of drawing and hit testing."""
+        return [slot for slot in self.slots if slot["item"] is not None]
+
+    def slot_for(self, item):
+        """The slot showing item, or None if it is scrolled out of view."""
+        for slot in self.slots:
+            if slot["item"] == item:
+                return slot
+        return None